@@ -1,10 +1,13 @@
 """
 Orchestrator Agent - Coordinates multiple specialized agents.
 """
+import logging
 import os
 import sys
 from pathlib import Path
 
+logger = logging.getLogger(__name__)
+
 # Add parent directory to path for imports
 _agents_dir = Path(__file__).parent
 _project_root = _agents_dir.parent
@@ -19,10 +22,10 @@ try:
     STRANDS_AVAILABLE = True
 except ImportError as e:
     STRANDS_AVAILABLE = False
-    print(f"⚠️ Strands framework not available: {e}")
-    print("⚠️ Agent system will use fallback mode. To enable full agent system:")
-    print("   pip install strands-agents")
-    print("   Note: Strands requires C++ compilation and may fail on some systems")
+    logger.warning("⚠️ Strands framework not available: %s", e)
+    logger.warning("⚠️ Agent system will use fallback mode. To enable full agent system:")
+    logger.info("pip install strands-agents")
+    logger.info("Note: Strands requires C++ compilation and may fail on some systems")
 
 if not STRANDS_AVAILABLE:
     # Fallback function when strands is not available
@@ -1,16 +1,20 @@
 """
 Allergy filtering tools for agent system.
 """
+import logging
 import json
 import sys
 import os
 from typing import List
 
+logger = logging.getLogger(__name__)
+
 # Add backend to path
 backend_path = os.path.join(os.path.dirname(__file__), "..", "..", "backend")
 if backend_path not in sys.path:
     sys.path.insert(0, backend_path)
-from services.restaurant_service import allergy_filter, filter_dishes_by_allergy
+from services.restaurant_service import allergy_filter
+from services.allergens import allergy_safety
 from strands import tool
 
 
@@ -21,7 +25,8 @@ def filter_dishes_by_allergy_hybrid(dishes: List[str], allergies: List[str]) ->
     
     Uses BOTH methods and takes INTERSECTION for maximum safety:
     - Keyword filter: Fast, catches explicit mentions
-    - AI filter: Understands hidden allergens (e.g., "Pesto" → nuts/dairy)
+    - AI filter: Allergen bitmasks (Groq-annotated, cached) for known allergens,
+      batched LLM screening for others; understands hidden allergens (e.g., "Pesto" → nuts/dairy)
     - Intersection: Only dishes that pass BOTH filters (safest approach)
     
     Args:
@@ -31,35 +36,36 @@ def filter_dishes_by_allergy_hybrid(dishes: List[str], allergies: List[str]) ->
     Returns:
         JSON string with safe_dishes list and filtering stats
     """
-    print(f"🛡️ [Allergy Filter] Filtering {len(dishes)} dishes for allergies: {', '.join(allergies)}")
+    logger.info("🛡️ [Allergy Filter] Filtering %s dishes for allergies: %s", len(dishes), ', '.join(allergies))
     
     if not dishes or not allergies:
-        print(f"⚠️ [Allergy Filter] No dishes or allergies provided")
+        logger.warning("⚠️ [Allergy Filter] No dishes or allergies provided")
         return json.dumps({"safe_dishes": dishes, "method": "none", "stats": {}})
     
     try:
         # Method 1: Keyword-based filtering (fast, explicit mentions)
-        print(f"🔤 [Allergy Filter] Step 1: Keyword-based filtering...")
+        logger.info("🔤 [Allergy Filter] Step 1: Keyword-based filtering...")
         keyword_safe = [d for d in dishes if allergy_filter([d], allergies)]
-        print(f"   ✅ Keyword filter: {len(keyword_safe)}/{len(dishes)} dishes safe")
+        logger.info("✅ Keyword filter: %s/%s dishes safe", len(keyword_safe), len(dishes))
         
         # Method 2: AI-based filtering (understands hidden allergens)
-        print(f"🤖 [Allergy Filter] Step 2: AI-based filtering (Groq LLM)...")
-        ai_safe = filter_dishes_by_allergy(dishes, allergies)
-        print(f"   ✅ AI filter: {len(ai_safe)}/{len(dishes)} dishes safe")
+        logger.info("🤖 [Allergy Filter] Step 2: AI-based filtering (Groq LLM)...")
+        safety = allergy_safety({d: None for d in dishes}, allergies)
+        ai_safe = [d for d in dishes if safety.get(d, True)]
+        logger.info("✅ AI filter: %s/%s dishes safe", len(ai_safe), len(dishes))
         
         # Method 3: INTERSECTION (safest - must pass both)
-        print(f"🔒 [Allergy Filter] Step 3: Taking intersection (safety-first)...")
+        logger.info("🔒 [Allergy Filter] Step 3: Taking intersection (safety-first)...")
         keyword_set = set(keyword_safe)
         ai_set = set(ai_safe)
         intersection_safe = list(keyword_set & ai_set)  # Only dishes in BOTH sets
         
-        print(f"   ✅ Intersection: {len(intersection_safe)}/{len(dishes)} dishes safe")
-        print(f"   📊 Stats: Keyword={len(keyword_safe)}, AI={len(ai_safe)}, Intersection={len(intersection_safe)}")
+        logger.info("✅ Intersection: %s/%s dishes safe", len(intersection_safe), len(dishes))
+        logger.info("📊 Stats: Keyword=%s, AI=%s, Intersection=%s", len(keyword_safe), len(ai_safe), len(intersection_safe))
         
         # If intersection is too restrictive, use AI results (more permissive but still safe)
         if len(intersection_safe) == 0 and len(ai_safe) > 0:
-            print(f"   ⚠️ [Allergy Filter] Intersection empty, using AI results (more permissive)")
+            logger.warning("⚠️ [Allergy Filter] Intersection empty, using AI results (more permissive)")
             final_safe = ai_safe
             method_used = "ai_fallback"
         else:
@@ -79,11 +85,11 @@ def filter_dishes_by_allergy_hybrid(dishes: List[str], allergies: List[str]) ->
         }, indent=2)
         
     except Exception as e:
-        print(f"❌ [Allergy Filter] Error: {str(e)}")
+        logger.error("❌ [Allergy Filter] Error: %s", str(e))
         # Fallback to keyword-only for safety
         try:
             safe = [d for d in dishes if allergy_filter([d], allergies)]
-            print(f"   ⚠️ Using keyword-only fallback: {len(safe)}/{len(dishes)} dishes safe")
+            logger.warning("⚠️ Using keyword-only fallback: %s/%s dishes safe", len(safe), len(dishes))
             return json.dumps({
                 "safe_dishes": safe,
                 "method": "keyword_fallback",
@@ -91,7 +97,7 @@ def filter_dishes_by_allergy_hybrid(dishes: List[str], allergies: List[str]) ->
                 "stats": {"total_dishes": len(dishes), "final_safe": len(safe)}
             })
         except Exception as e2:
-            print(f"   ❌ Complete failure: {str(e2)}")
+            logger.error("❌ Complete failure: %s", str(e2))
             return json.dumps({
                 "safe_dishes": [],
                 "method": "error",
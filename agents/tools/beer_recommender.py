@@ -5,12 +5,18 @@ import pandas as pd
 import numpy as np
 import os
 import json
-from groq import Groq
+import sys
 from sklearn.preprocessing import MinMaxScaler, OneHotEncoder
 from sklearn.ensemble import GradientBoostingRegressor
 from sklearn.neighbors import NearestNeighbors
 from typing import Dict, List, Optional
 
+# Groq calls go through the backend's shared LLM gateway
+_BACKEND_DIR = os.path.join(os.path.dirname(__file__), "..", "..", "backend")
+if _BACKEND_DIR not in sys.path:
+    sys.path.insert(0, _BACKEND_DIR)
+from integrations.groq_client import chat_completion
+
 # Get data directory path
 _DATA_DIR = os.path.join(os.path.dirname(__file__), "..", "..", "data")
 
@@ -152,8 +158,6 @@ class BeerRecommender:
             if not api_key:
                 raise ValueError("GROQ_API_KEY not found")
             
-            client = Groq(api_key=api_key)
-            
             system_prompt = """
             You are a beer flavor profile translator. Convert natural language beer preferences into numerical flavor profiles.
 
@@ -176,17 +180,15 @@ class BeerRecommender:
             DEFAULT mainstream = 1. Only set to 0 for Belgian styles, Sour/Wild, Imperial/Dessert beers with ABV > 9, or explicit "craft"/"artisanal" requests.
             """
             
-            response = client.chat.completions.create(
+            content = chat_completion(
+                user_input,
                 model="llama-3.1-8b-instant",
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_input}
-                ],
+                system_prompt=system_prompt,
                 temperature=0.3,
                 response_format={"type": "json_object"}
             )
             
-            return json.loads(response.choices[0].message.content)
+            return json.loads(content)
         except Exception as e:
             raise Exception(f"Error calling GROQ API: {e}")
     
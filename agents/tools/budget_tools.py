@@ -1,8 +1,11 @@
 """
 Budget/price filtering tools for agent system.
 """
+import logging
 from strands import tool
 
+logger = logging.getLogger(__name__)
+
 
 @tool
 def calculate_price_filter(max_price: float, price_per_person: bool = True) -> str:
@@ -10,7 +13,7 @@ def calculate_price_filter(max_price: float, price_per_person: bool = True) -> s
     
     Returns Yelp price scale: 1=$, 2=$$, 3=$$$, 4=$$$$
     """
-    print(f"💰 [Price Filter] Calculating filter for ${max_price:.2f} {'per person' if price_per_person else 'total'}")
+    logger.info("💰 [Price Filter] Calculating filter for $%.2f %s", max_price, 'per person' if price_per_person else 'total')
     
     if max_price <= 10:
         result = "1"
@@ -25,5 +28,5 @@ def calculate_price_filter(max_price: float, price_per_person: bool = True) -> s
         result = "3,4"
         price_level = "$$$-$$$$"
     
-    print(f"✅ [Price Filter] Result: {result} ({price_level})")
+    logger.info("✅ [Price Filter] Result: %s (%s)", result, price_level)
     return result
@@ -200,7 +200,7 @@ def is_relevant_query_tool(query: str) -> str:
 
 @tool
 def check_location_match_tool(user_location: str, restaurant_location: str) -> str:
-    """Check if user location matches restaurant location using Groq.
+    """Check if user location matches restaurant location (offline gazetteer lookup).
     
     Uses the same check_location_match function from swaad.
     
@@ -2,11 +2,14 @@
 Menu scraping tools for agent system.
 Uses the exact same MenuURLScraper from swaad/backend/menu_url_scraper.py
 """
+import logging
 import json
 import sys
 import os
 from typing import List
 
+logger = logging.getLogger(__name__)
+
 # Add backend to path
 backend_path = os.path.join(os.path.dirname(__file__), "..", "..", "backend")
 if backend_path not in sys.path:
@@ -27,7 +30,7 @@ def get_menu_scraper() -> MenuURLScraper:
         try:
             _menu_scraper = MenuURLScraper()
         except Exception as e:
-            print(f"❌ [Menu Scraper] Failed to initialize: {e}")
+            logger.error("❌ [Menu Scraper] Failed to initialize: %s", e)
     return _menu_scraper
 
 
@@ -44,17 +47,17 @@ def scrape_menu_url_tool(menu_url: str) -> str:
     Returns:
         JSON string with list of dish names
     """
-    print(f"🍽️ [Menu Scraper] Scraping menu: {menu_url}")
+    logger.info("🍽️ [Menu Scraper] Scraping menu: %s", menu_url)
     
     try:
         scraper = get_menu_scraper()
         if scraper is None:
-            print("❌ [Menu Scraper] Menu scraper not available")
+            logger.error("❌ [Menu Scraper] Menu scraper not available")
             return json.dumps({"error": "Menu scraper not initialized", "dishes": []})
         
         dishes = scraper.scrape_menu_url(menu_url)
         
-        print(f"✅ [Menu Scraper] Extracted {len(dishes)} dishes")
+        logger.info("✅ [Menu Scraper] Extracted %s dishes", len(dishes))
         
         return json.dumps({
             "dishes": dishes,
@@ -63,7 +66,7 @@ def scrape_menu_url_tool(menu_url: str) -> str:
         }, indent=2)
         
     except Exception as e:
-        print(f"❌ [Menu Scraper] Error: {str(e)}")
+        logger.error("❌ [Menu Scraper] Error: %s", str(e))
         return json.dumps({
             "error": str(e),
             "dishes": [],
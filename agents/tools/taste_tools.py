@@ -2,11 +2,14 @@
 Taste analysis tools for agent system.
 Uses the exact same functions from swaad/backend/taste_analysis.py
 """
+import logging
 import json
 import sys
 import os
 from typing import List, Dict, Optional
 
+logger = logging.getLogger(__name__)
+
 # Add backend to path
 backend_path = os.path.join(os.path.dirname(__file__), "..", "..", "backend")
 if backend_path not in sys.path:
@@ -37,19 +40,19 @@ def generate_taste_vector_tool(dish_name: str) -> str:
     Returns JSON: {"sweet": 0.0-1.0, "salty": 0.0-1.0, "sour": 0.0-1.0, 
                    "bitter": 0.0-1.0, "umami": 0.0-1.0, "spicy": 0.0-1.0}
     """
-    print(f"👅 [Taste Vector] Analyzing: '{dish_name}'")
+    logger.info("👅 [Taste Vector] Analyzing: '%s'", dish_name)
     
     # Try keyword matching first
-    print(f"🔤 [Taste Vector] Trying keyword matching...")
+    logger.info("🔤 [Taste Vector] Trying keyword matching...")
     vector = infer_taste_from_text(dish_name)
     
     # If no match, use Groq AI
     if sum(vector) == 0:
-        print(f"🤖 [Taste Vector] No keyword match, using Groq AI...")
+        logger.info("🤖 [Taste Vector] No keyword match, using Groq AI...")
         vector = infer_taste_from_groq(dish_name)
-        print(f"✅ [Taste Vector] Groq AI generated taste profile")
+        logger.info("✅ [Taste Vector] Groq AI generated taste profile")
     else:
-        print(f"✅ [Taste Vector] Keyword matching found taste profile")
+        logger.info("✅ [Taste Vector] Keyword matching found taste profile")
     
     result = {
         "sweet": round(vector[0], 3),
@@ -60,8 +63,7 @@ def generate_taste_vector_tool(dish_name: str) -> str:
         "spicy": round(vector[5], 3)
     }
     
-    print(f"📊 [Taste Vector] Result: sweet={result['sweet']}, salty={result['salty']}, "
-          f"sour={result['sour']}, bitter={result['bitter']}, umami={result['umami']}, spicy={result['spicy']}")
+    logger.info("📊 [Taste Vector] Result: sweet=%s, salty=%s, sour=%s, bitter=%s, umami=%s, spicy=%s", result['sweet'], result['salty'], result['sour'], result['bitter'], result['umami'], result['spicy'])
     
     return json.dumps(result)
 
@@ -78,7 +80,7 @@ def generate_taste_vector_groq_tool(dish_name: str) -> str:
     Returns JSON: {"sweet": 0.0-1.0, "salty": 0.0-1.0, "sour": 0.0-1.0, 
                    "bitter": 0.0-1.0, "umami": 0.0-1.0, "spicy": 0.0-1.0}
     """
-    print(f"🤖 [Taste Vector Groq] Analyzing: '{dish_name}'")
+    logger.info("🤖 [Taste Vector Groq] Analyzing: '%s'", dish_name)
     vector = infer_taste_from_groq(dish_name)
     
     result = {
@@ -105,7 +107,7 @@ def generate_taste_vector_semantic_tool(text: str) -> str:
     Returns JSON: {"sweet": 0.0-1.0, "salty": 0.0-1.0, "sour": 0.0-1.0, 
                    "bitter": 0.0-1.0, "umami": 0.0-1.0, "spicy": 0.0-1.0}
     """
-    print(f"🔍 [Taste Vector Semantic] Analyzing: '{text}'")
+    logger.info("🔍 [Taste Vector Semantic] Analyzing: '%s'", text)
     vector = infer_taste_from_text_semantic(text)
     
     result = {
@@ -1,11 +1,14 @@
 """
 Yelp API tools for agent system.
 """
+import logging
 import json
 import sys
 import os
 from typing import Optional
 
+logger = logging.getLogger(__name__)
+
 # Add backend to path
 backend_path = os.path.join(os.path.dirname(__file__), "..", "..", "backend")
 if backend_path not in sys.path:
@@ -24,7 +27,7 @@ def get_yelp_client() -> Optional[YelpAPIClient]:
         try:
             _yelp_client = YelpAPIClient()
         except Exception as e:
-            print(f"❌ [Yelp Client] Failed to initialize: {e}")
+            logger.error("❌ [Yelp Client] Failed to initialize: %s", e)
     return _yelp_client
 
 
@@ -39,23 +42,23 @@ def yelp_search_tool(query: str, location: str = None) -> str:
     Returns:
         JSON string with restaurant data
     """
-    print(f"🔍 [Yelp Tool] Searching: '{query}'" + (f" in {location}" if location else ""))
+    logger.info("🔍 [Yelp Tool] Searching: '%s'%s", query, f" in {location}" if location else "")
     try:
         yelp_client = get_yelp_client()
         if yelp_client is None:
-            print("❌ [Yelp Tool] Yelp client not available")
+            logger.error("❌ [Yelp Tool] Yelp client not available")
             return json.dumps({"error": "Yelp API client not initialized"})
         
         # If location provided, add it to query
         if location:
             if location.lower() not in query.lower():
                 query = f"{query} in {location}"
-                print(f"📍 [Yelp Tool] Added location to query: '{query}'")
+                logger.info("📍 [Yelp Tool] Added location to query: '%s'", query)
         
-        print(f"📡 [Yelp Tool] Calling Yelp AI Chat API...")
+        logger.info("📡 [Yelp Tool] Calling Yelp AI Chat API...")
         result = yelp_client.ai_chat_search(query=query)
-        print(f"✅ [Yelp Tool] Received response from Yelp API")
+        logger.info("✅ [Yelp Tool] Received response from Yelp API")
         return json.dumps(result, indent=2)
     except Exception as e:
-        print(f"❌ [Yelp Tool] Error: {str(e)}")
+        logger.error("❌ [Yelp Tool] Error: %s", str(e))
         return f"Error: {str(e)}"
@@ -1,10 +1,13 @@
 """
 Guardrail utilities for Bedrock agents.
 """
+import logging
 import os
 import boto3
 from typing import Optional, Tuple
 
+logger = logging.getLogger(__name__)
+
 # Configure AWS clients
 bedrock_client = boto3.client("bedrock", region_name=os.getenv("AWS_REGION", "us-east-1"))
 bedrock_runtime = boto3.client("bedrock-runtime", region_name=os.getenv("AWS_REGION", "us-east-1"))
@@ -25,14 +28,14 @@ def get_guardrail_id(guardrail_name: str = "guardrail-restaurant-safety") -> Opt
         for guardrail in existing_guardrails.get("guardrails", []):
             if guardrail.get("name") == guardrail_name:
                 guardrail_id = guardrail.get("id")
-                print(f"Found guardrail '{guardrail_name}' with ID: {guardrail_id}")
+                logger.info("Found guardrail '%s' with ID: %s", guardrail_name, guardrail_id)
                 return guardrail_id
         
-        print(f"Guardrail '{guardrail_name}' not found")
+        logger.info("Guardrail '%s' not found", guardrail_name)
         return None
         
     except Exception as e:
-        print(f"Error finding guardrail: {e}")
+        logger.error("Error finding guardrail: %s", e)
         return None
 
 
@@ -48,11 +51,11 @@ def create_guardrail(guardrail_name: str = "guardrail-restaurant-safety") -> Opt
         existing_guardrails = bedrock_client.list_guardrails()
         for guardrail in existing_guardrails.get("guardrails", []):
             if guardrail.get("name") == guardrail_name:
-                print(f"Guardrail '{guardrail_name}' already exists")
+                logger.info("Guardrail '%s' already exists", guardrail_name)
                 return (guardrail.get("id"), guardrail.get("arn"))
         
         # Create new guardrail
-        print(f"Creating guardrail '{guardrail_name}'...")
+        logger.info("Creating guardrail '%s'...", guardrail_name)
         response = bedrock_client.create_guardrail(
             name=guardrail_name,
             description="Ensures restaurant recommendations are safe and appropriate",
@@ -79,9 +82,9 @@ def create_guardrail(guardrail_name: str = "guardrail-restaurant-safety") -> Opt
         
         guardrail_id = response.get("guardrailId")
         guardrail_arn = response.get("guardrailArn")
-        print(f"Created guardrail '{guardrail_name}' with ID: {guardrail_id}")
+        logger.info("Created guardrail '%s' with ID: %s", guardrail_name, guardrail_id)
         return (guardrail_id, guardrail_arn)
         
     except Exception as e:
-        print(f"Error creating guardrail: {e}")
+        logger.error("Error creating guardrail: %s", e)
         return None
@@ -0,0 +1,46 @@
+"""
+Annotate restaurant dishes in Pinecone with allergen bitmasks.
+
+Adds an "allergens" mask (see services/allergens.py) to every entry of each
+restaurant's dishes_json, so query-time allergy filtering is a bitwise AND.
+Run it after ingesting restaurants; already annotated dishes are skipped.
+
+Usage (from backend/):
+    python annotate_allergens.py             # annotate dishes that lack a mask
+    python annotate_allergens.py --force     # re-annotate every dish
+    python annotate_allergens.py --limit 20  # stop after 20 restaurants
+"""
+import argparse
+import json
+
+from logging_config import configure_logging
+from integrations.pinecone_client import iter_namespace_metadata, update_metadata
+from services.allergens import annotate_restaurant_metadata
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Annotate restaurant dishes with allergen bitmasks")
+    parser.add_argument("--namespace", default="restaurants")
+    parser.add_argument("--force", action="store_true", help="Re-annotate dishes that already have a mask")
+    parser.add_argument("--limit", type=int, default=None, help="Maximum number of restaurants to process")
+    args = parser.parse_args()
+    configure_logging()
+
+    seen = updated = 0
+    for record_id, meta in iter_namespace_metadata(args.namespace):
+        if args.limit is not None and seen >= args.limit:
+            break
+        seen += 1
+        changes = annotate_restaurant_metadata(meta, force=args.force)
+        if changes["dishes_json"] != meta.get("dishes_json"):
+            update_metadata(record_id, changes, args.namespace)
+            updated += 1
+        dishes = json.loads(changes["dishes_json"])
+        annotated = sum(1 for d in dishes if isinstance(d.get("allergens"), int))
+        print(f"{meta.get('name', record_id)}: {annotated}/{len(dishes)} dishes annotated")
+
+    print(f"Processed {seen} restaurants, updated {updated}.")
+
+
+if __name__ == "__main__":
+    main()
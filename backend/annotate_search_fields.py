@@ -0,0 +1,47 @@
+"""
+Add filterable city/state/geohash/cuisines fields and precomputed keyword
+tokens to restaurants in Pinecone.
+
+The chat and discover searches send location and cuisine as Pinecone
+metadata filters (see services/search_filters.py); restaurants without these
+fields only show up through the unfiltered fallback. The search_tokens and
+menu_tokens fields (services/search_tokens.py) spare the ranker tokenizing
+each restaurant's text per request. Run it after ingesting restaurants.
+
+Usage (from backend/):
+    python annotate_search_fields.py             # add fields that are missing or stale
+    python annotate_search_fields.py --limit 20  # stop after 20 restaurants
+"""
+import argparse
+
+from logging_config import configure_logging
+from integrations.pinecone_client import iter_namespace_metadata, update_metadata
+from services.search_filters import restaurant_filter_fields
+from services.search_tokens import restaurant_token_fields
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Add filterable search fields and keyword tokens to restaurant metadata")
+    parser.add_argument("--namespace", default="restaurants")
+    parser.add_argument("--limit", type=int, default=None, help="Maximum number of restaurants to process")
+    args = parser.parse_args()
+    configure_logging()
+
+    seen = updated = 0
+    for record_id, meta in iter_namespace_metadata(args.namespace):
+        if args.limit is not None and seen >= args.limit:
+            break
+        seen += 1
+        fields = restaurant_filter_fields(meta)
+        fields.update(restaurant_token_fields(meta))
+        changes = {key: value for key, value in fields.items() if meta.get(key) != value}
+        if changes:
+            update_metadata(record_id, changes, args.namespace)
+            updated += 1
+        print(f"{meta.get('name', record_id)}: {', '.join(sorted(fields)) or 'no fields'}")
+
+    print(f"Processed {seen} restaurants, updated {updated}.")
+
+
+if __name__ == "__main__":
+    main()
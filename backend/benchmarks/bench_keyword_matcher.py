@@ -0,0 +1,89 @@
+"""
+Micro-benchmark: compiled KeywordMatcher vs the per-keyword `in` scans it replaced.
+
+Builds a synthetic 1,000-dish menu from the ingredient CSV and times each
+keyword filter both ways (results are checked to be identical).
+
+Usage (from backend/):
+    python -m benchmarks.bench_keyword_matcher
+    python -m benchmarks.bench_keyword_matcher --dishes 5000 --repeat 5
+"""
+import argparse
+import csv
+import random
+import time
+from pathlib import Path
+
+from services.keyword_matcher import KeywordMatcher
+from services.restaurant_service import NON_VEG_KEYWORDS
+
+ALLERGIES = ["peanuts", "dairy", "shellfish", "sesame", "gluten"]
+DISH_WORDS = ["grilled", "spicy", "crispy", "house special", "curry", "salad", "bowl",
+              "with", "and", "stir fry", "soup", "chicken", "paneer", "tikka", "noodles"]
+
+
+def _ingredient_names() -> list:
+    for path in (Path("ingredient-flavor.csv"), Path("../data/ingredient-flavor.csv")):
+        if path.exists():
+            with open(path, "r", encoding="utf-8") as f:
+                return [row["ingredient"].strip().lower() for row in csv.DictReader(f) if row.get("ingredient", "").strip()]
+    raise SystemExit("ingredient-flavor.csv not found (run from backend/)")
+
+
+def _menu(ingredients: list, size: int, seed: int) -> list:
+    rng = random.Random(seed)
+    words = DISH_WORDS + ingredients
+    return [" ".join(rng.choice(words) for _ in range(rng.randint(2, 6))).title() for _ in range(size)]
+
+
+def _time(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the compiled keyword matcher")
+    parser.add_argument("--dishes", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=7)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    ingredients = _ingredient_names()
+    menu = _menu(ingredients, args.dishes, args.seed)
+    nonveg = KeywordMatcher(NON_VEG_KEYWORDS)
+    allergy = KeywordMatcher(ALLERGIES)
+    ingredient_matcher = KeywordMatcher(ingredients)
+
+    cases = [
+        (
+            f"is_nonveg_text ({len(NON_VEG_KEYWORDS)} keywords)",
+            lambda: [any(k in d.lower() for k in NON_VEG_KEYWORDS) for d in menu],
+            lambda: [nonveg.contains_any(d) for d in menu],
+        ),
+        (
+            f"allergy_filter ({len(ALLERGIES)} allergies)",
+            lambda: [not any(a in d.lower() for a in ALLERGIES) for d in menu],
+            lambda: [not allergy.contains_any(d) for d in menu],
+        ),
+        (
+            f"infer_taste_from_text ({len(ingredients)} ingredients)",
+            lambda: [[i for i in ingredients if i in d.lower()] for d in menu],
+            lambda: [ingredient_matcher.find_all(d) for d in menu],
+        ),
+    ]
+
+    print(f"{len(menu)} dishes, best of {args.repeat} runs")
+    print(f"{'filter':<44}{'scan ms':>10}{'matcher ms':>12}{'speedup':>10}")
+    for name, scan, matched in cases:
+        if scan() != matched():
+            raise SystemExit(f"{name}: matcher results differ from the substring scan")
+        scan_ms, matcher_ms = _time(scan, args.repeat), _time(matched, args.repeat)
+        print(f"{name:<44}{scan_ms:>10.2f}{matcher_ms:>12.2f}{scan_ms / matcher_ms:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+"""
+Micro-benchmark: batched ranking in filter_and_rank_recommendations vs the
+per-pair cosine loop it replaced.
+
+Builds synthetic Pinecone matches (taste vectors, menus, dishes_json with
+per-dish taste vectors) and times one ranking request both ways. The
+per-pair reference scores each restaurant and each dish with its own
+sklearn cosine_similarity call, as the ranker used to; results are checked
+to be identical. The batched path is timed with and without the stored
+search/menu tokens (services/search_tokens.py).
+
+Usage (from backend/):
+    python -m benchmarks.bench_ranking
+    python -m benchmarks.bench_ranking --candidates 500 --dishes 80 --repeat 5
+"""
+import argparse
+import copy
+import json
+import random
+import re
+import time
+
+import numpy as np
+from sklearn.metrics.pairwise import cosine_similarity
+
+from services.recommendation_service import filter_and_rank_recommendations
+from services.search_tokens import restaurant_token_fields
+from services.taste_service import favorites_boost
+
+DISH_WORDS = ["grilled", "spicy", "crispy", "house special", "curry", "salad", "bowl", "stir fry",
+              "soup", "paneer", "tikka", "noodles", "tofu", "mushroom", "dumplings", "tacos"]
+CUISINES = ["Italian", "Indian", "Thai", "Mexican", "Japanese", "Chinese", "Korean", "American"]
+STOP_WORDS = {"i", "want", "to", "eat", "some", "a", "the", "in", "at", "near", "me", "place", "restaurant", "find", "show",
+              "give", "food", "good", "best", "delicious", "yummy", "looking", "for"}
+
+
+def _matches(candidates: int, dishes: int, seed: int) -> list:
+    rng = random.Random(seed)
+    matches = []
+    for i in range(candidates):
+        menu = [" ".join(rng.choice(DISH_WORDS) for _ in range(rng.randint(2, 4))).title() for _ in range(dishes)]
+        meta = {
+            "name": f"Restaurant {i}",
+            "cuisine_types": rng.sample(CUISINES, 2),
+            "menu_items": menu,
+            "popular_dishes": menu[:3],
+            "dishes_json": json.dumps([{"name": d, "taste": [round(rng.random(), 3) for _ in range(6)]} for d in menu]),
+        }
+        meta.update({f"taste_{k}": round(rng.random(), 3) for k in range(6)})
+        matches.append({"id": f"r{i}", "score": rng.random(), "metadata": meta})
+    return matches
+
+
+def _cosine(a, b) -> float:
+    return float(cosine_similarity(np.array(a).reshape(1, -1), np.array(b).reshape(1, -1))[0][0])
+
+
+def _per_pair_rank(matches, user_vec, favorites, query_text, query_ingredients, max_results) -> list:
+    """The ranking arithmetic before batching: one cosine call per restaurant and per dish."""
+    query_tokens = set(re.sub(r"[^\w\s]", "", query_text.lower()).split()) - STOP_WORDS
+    ranked = []
+    for match in matches:
+        meta = match["metadata"]
+        menu = meta["menu_items"]
+        taste_vec = [float(meta[f"taste_{k}"]) for k in range(6)]
+        full_text = " ".join(menu).lower() + " " + " ".join(meta["popular_dishes"]).lower() + " " + meta["name"].lower() + " " + " ".join(meta["cuisine_types"]).lower()
+        overlap = len(query_tokens & set(re.sub(r"[^\w\s]", "", full_text).split()))
+        query_boost = 0.5 + (0.2 * overlap) if overlap else 0.0
+        menu_text = " ".join(menu).lower()
+        ingredient_boost = 0.3 * sum(1 for ing in query_ingredients if ing in menu_text)
+        combined = match["score"] + 0.35 * _cosine(user_vec, taste_vec) + favorites_boost(menu, favorites) + query_boost + ingredient_boost
+
+        dishes = [{"name": d["name"], "similarity": round(_cosine(user_vec, d["taste"]) * 100, 1)} for d in json.loads(meta["dishes_json"])]
+        dishes.sort(key=lambda d: d["similarity"], reverse=True)
+        ranked.append({"id": match["id"], "score": combined, "recommended_dishes": dishes[:5]})
+    ranked.sort(key=lambda r: r["score"], reverse=True)
+    return ranked[:max_results]
+
+
+def _time(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.process_time()
+        fn()
+        best = min(best, time.process_time() - start)
+    return best * 1000
+
+
+def _summary(results) -> list:
+    return [(r["id"], round(r["score"], 9), [(d["name"], d["similarity"]) for d in r["recommended_dishes"]]) for r in results]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark batched restaurant/dish ranking")
+    parser.add_argument("--candidates", type=int, default=100)
+    parser.add_argument("--dishes", type=int, default=50)
+    parser.add_argument("--max-results", type=int, default=10)
+    parser.add_argument("--repeat", type=int, default=7)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    matches = _matches(args.candidates, args.dishes, args.seed)
+    tokenized = copy.deepcopy(matches)
+    for match in tokenized:
+        match["metadata"].update(restaurant_token_fields(match["metadata"]))
+    user_vec = [0.6, 0.4, 0.1, 0.05, 0.7, 0.8]
+    favorites = [{"name": "paneer tikka"}, {"name": "spicy noodles"}, {"name": "dumplings"}]
+    query_text = "spicy thai curry near me"
+    query_ingredients = ["tofu", "mushroom"]
+
+    def per_pair():
+        return _per_pair_rank(matches, user_vec, favorites, query_text, query_ingredients, args.max_results)
+
+    def batched(candidates=matches):
+        return filter_and_rank_recommendations(
+            candidates, user_vec, favorites, diet_type=None, allergies=[], max_results=args.max_results,
+            query_text=query_text, query_ingredients=query_ingredients,
+        )
+
+    cases = [
+        ("per-pair cosine (sklearn)", per_pair),
+        ("batched (numpy + argpartition)", batched),
+        ("batched + stored search tokens", lambda: batched(tokenized)),
+    ]
+    expected = _summary(per_pair())
+    for name, rank in cases[1:]:
+        if _summary(rank()) != expected:
+            raise SystemExit(f"{name}: ranking differs from the per-pair reference")
+
+    print(f"{args.candidates} candidates x {args.dishes} dishes, top {args.max_results}, best of {args.repeat} runs (CPU time)")
+    print(f"{'path':<44}{'ms/request':>12}{'speedup':>10}")
+    baseline_ms = None
+    for name, rank in cases:
+        ms = _time(rank, args.repeat)
+        baseline_ms = baseline_ms or ms
+        print(f"{name:<44}{ms:>12.2f}{baseline_ms / ms:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
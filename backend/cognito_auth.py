@@ -1,6 +1,7 @@
 """
 AWS Cognito JWT Token Verification
 """
+import logging
 import os
 import requests
 from typing import Optional, Dict
@@ -11,6 +12,8 @@ import json
 import base64
 from datetime import datetime, timedelta
 
+logger = logging.getLogger(__name__)
+
 COGNITO_USER_POOL_ID = os.getenv("COGNITO_USER_POOL_ID", "us-east-1_jUJj5G3YE")
 AWS_REGION = os.getenv("AWS_REGION", "us-east-1")
 
@@ -39,7 +42,7 @@ def get_jwks() -> Dict:
             _jwks_cache = response.json()
             _jwks_cache_time = now
         except Exception as e:
-            print(f"Error fetching JWKS: {e}")
+            logger.error("Error fetching JWKS: %s", e)
             if _jwks_cache is None:
                 raise
     return _jwks_cache
@@ -103,10 +106,10 @@ def verify_cognito_token(token: str) -> Optional[Dict]:
         
         return claims
     except JWTError as e:
-        print(f"JWT verification error: {e}")
+        logger.error("JWT verification error: %s", e)
         return None
     except Exception as e:
-        print(f"Token verification error: {e}")
+        logger.error("Token verification error: %s", e)
         return None
 
 
@@ -14,6 +14,16 @@ PINECONE_INDEX = os.getenv("PINECONE_INDEX", "menu-buddy")
 
 # Model Configuration
 SENTENCE_TRANSFORMER_MODEL = os.getenv("SENTENCE_TRANSFORMER_MODEL", "all-MiniLM-L6-v2")
+GROQ_MODEL = os.getenv("GROQ_MODEL", "llama-3.3-70b-versatile")
+
+# LLM gateway limits (see integrations/groq_client.py); per process
+GROQ_MAX_CONCURRENCY = int(os.getenv("GROQ_MAX_CONCURRENCY", "8"))
+GROQ_REQUESTS_PER_MINUTE = int(os.getenv("GROQ_REQUESTS_PER_MINUTE", "30"))
+GROQ_TOKENS_PER_MINUTE = int(os.getenv("GROQ_TOKENS_PER_MINUTE", "12000"))
+GROQ_MAX_RETRIES = int(os.getenv("GROQ_MAX_RETRIES", "3"))
+GROQ_BACKOFF_BASE_SECONDS = float(os.getenv("GROQ_BACKOFF_BASE_SECONDS", "0.5"))
+GROQ_BACKOFF_MAX_SECONDS = float(os.getenv("GROQ_BACKOFF_MAX_SECONDS", "8"))
+GROQ_DEADLINE_SECONDS = float(os.getenv("GROQ_DEADLINE_SECONDS", "20"))
 
 # Feature Flags
 USE_SEMANTIC_DISH_TASTE = os.getenv("USE_SEMANTIC_DISH_TASTE", "true").lower() in {"1", "true", "yes", "y"}
@@ -23,7 +33,29 @@ USE_SEMANTIC_INGREDIENT_TASTE = os.getenv("USE_SEMANTIC_INGREDIENT_TASTE", "true
 DEFAULT_USER_LOCATION = os.getenv("DEFAULT_USER_LOCATION", "")
 
 # File Paths
-INGREDIENT_FLAVOR_CSV = "ingredient-flavor.csv"
+INGREDIENT_FLAVOR_CSV = os.getenv("INGREDIENT_FLAVOR_CSV", "ingredient-flavor.csv")
+
+# Local dish diet/course classifier (see services/dish_classifier.py)
+USE_LOCAL_DISH_CLASSIFIER = os.getenv("USE_LOCAL_DISH_CLASSIFIER", "true").lower() in {"1", "true", "yes", "y"}
+DISH_CLASSIFIER_PATH = os.getenv("DISH_CLASSIFIER_PATH", "dish_classifier.joblib")
+DISH_CLASSIFIER_MIN_CONFIDENCE = float(os.getenv("DISH_CLASSIFIER_MIN_CONFIDENCE", "0.9"))
+
+# Embedding intent/relevance router (see services/intent_router.py)
+USE_INTENT_ROUTER = os.getenv("USE_INTENT_ROUTER", "true").lower() in {"1", "true", "yes", "y"}
+INTENT_ROUTER_MIN_MARGIN = float(os.getenv("INTENT_ROUTER_MIN_MARGIN", "0.08"))
+INTENT_ROUTER_MIN_SCORE = float(os.getenv("INTENT_ROUTER_MIN_SCORE", "0.4"))
+
+# Offline location matching (see services/location_service.py)
+GAZETTEER_PATH = os.getenv("GAZETTEER_PATH", "gazetteer.json")
+# Send location/cuisine to Pinecone as metadata filters (see services/search_filters.py)
+USE_PINECONE_METADATA_FILTERS = os.getenv("USE_PINECONE_METADATA_FILTERS", "true").lower() in {"1", "true", "yes", "y"}
+# Build the in-memory restaurant spatial index at startup (see services/spatial_index.py)
+SPATIAL_INDEX_ON_STARTUP = os.getenv("SPATIAL_INDEX_ON_STARTUP", "true").lower() in {"1", "true", "yes", "y"}
+
+# Ingestion
+SEED_INGREDIENTS_ON_STARTUP = os.getenv("SEED_INGREDIENTS_ON_STARTUP", "true").lower() in {"1", "true", "yes", "y"}
+# Id of the seed marker record kept in the Pinecone index (see seed_ingredients_to_pinecone)
+INGREDIENT_SEED_MARKER = os.getenv("INGREDIENT_SEED_MARKER", "ingredient-seed")
 
 # Taste Vector Configuration
 TASTE_DIMENSIONS = ["sweet", "salty", "sour", "bitter", "umami", "spicy"]
@@ -34,6 +66,28 @@ DEFAULT_MAX_RESULTS = 10
 TASTE_SIMILARITY_WEIGHT = 0.35
 FAVORITES_BOOST_WEIGHT = 0.1
 
+# Response cache (see services/response_cache.py)
+RESPONSE_CACHE_BACKEND = os.getenv("RESPONSE_CACHE_BACKEND", "memory").lower()  # memory, sqlite or none
+RESPONSE_CACHE_TTL_SECONDS = int(os.getenv("RESPONSE_CACHE_TTL_SECONDS", "600"))
+RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "1000"))
+RESPONSE_CACHE_PATH = os.getenv("RESPONSE_CACHE_PATH", "response_cache.sqlite3")
+RESPONSE_CACHE_TASTE_STEP = float(os.getenv("RESPONSE_CACHE_TASTE_STEP", "0.1"))
+
+# In-process memo caches (see services/bounded_cache.py); per cache, per worker
+MEMO_CACHE_MAX_ENTRIES = int(os.getenv("MEMO_CACHE_MAX_ENTRIES", "10000"))
+MEMO_CACHE_TTL_SECONDS = int(os.getenv("MEMO_CACHE_TTL_SECONDS", str(6 * 3600)))  # 0 = no expiry
+
+# Persistent memo of Groq classifier answers (see services/llm_memo.py)
+LLM_MEMO_ENABLED = os.getenv("LLM_MEMO_ENABLED", "true").lower() in {"1", "true", "yes", "y"}
+LLM_MEMO_PATH = os.getenv("LLM_MEMO_PATH", "llm_memo.sqlite3")
+LLM_MEMO_TTL_SECONDS = int(os.getenv("LLM_MEMO_TTL_SECONDS", str(30 * 24 * 3600)))
+LLM_MEMO_MAX_ENTRIES = int(os.getenv("LLM_MEMO_MAX_ENTRIES", "50000"))
+
+# Logging (see logging_config.py)
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+LOG_LEVELS = os.getenv("LOG_LEVELS", "")  # e.g. "services.recommendation_service=DEBUG,agents=WARNING"
+LOG_FORMAT = os.getenv("LOG_FORMAT", "text").lower()  # "text" or "json"
+
 # CORS Settings
 CORS_ORIGINS = ["*"]  # Configure as needed for production
 
@@ -1,9 +1,8 @@
 """
 Embedding and vector operations using SentenceTransformer.
 """
-from typing import List, Optional
+from typing import List, Optional, Sequence
 import numpy as np
-from sklearn.metrics.pairwise import cosine_similarity
 
 # Optional import - app can run without sentence-transformers
 try:
@@ -40,9 +39,45 @@ def calculate_cosine_similarity(vec1: List[float], vec2: List[float]) -> float:
     """Calculate cosine similarity between two vectors."""
     if not vec1 or not vec2:
         return 0.0
-    v1 = np.array(vec1).reshape(1, -1)
-    v2 = np.array(vec2).reshape(1, -1)
-    return float(cosine_similarity(v1, v2)[0][0])
+    return float(cosine_similarities(vec1, [vec2])[0])
+
+
+def _unit_rows(matrix: np.ndarray) -> np.ndarray:
+    norms = np.sqrt(np.einsum("ij,ij->i", matrix, matrix))
+    norms[norms == 0.0] = 1.0
+    return matrix / norms[:, np.newaxis]
+
+
+def cosine_similarities(vec: Sequence[float], vectors) -> np.ndarray:
+    """
+    Cosine similarity of one vector against every row of a matrix (or list of vectors).
+
+    Zero vectors score 0, like sklearn's cosine_similarity.
+    """
+    matrix = np.asarray(vectors, dtype=float)
+    if matrix.ndim != 2 or not len(matrix) or not len(vec):
+        return np.zeros(len(matrix), dtype=float)
+    query = _unit_rows(np.asarray(vec, dtype=float).reshape(1, -1))[0]
+    return _unit_rows(matrix) @ query
+
+
+def top_n_indices(scores, n: int) -> np.ndarray:
+    """
+    Indices of the n highest scores, best first.
+
+    argpartition picks the candidates without sorting everything; ties keep
+    their original order (same result as a stable descending sort + slice).
+    """
+    scores = np.asarray(scores, dtype=float)
+    if n <= 0 or not len(scores):
+        return np.empty(0, dtype=int)
+    if n < len(scores):
+        threshold = scores[np.argpartition(-scores, n - 1)[:n]].min()
+        candidates = np.flatnonzero(scores >= threshold)
+    else:
+        candidates = np.arange(len(scores))
+    order = np.lexsort((candidates, -scores[candidates]))
+    return candidates[order][:n]
 
 
 def combine_vectors(primary: List[float], secondary: List[float], secondary_weight: float = 0.35) -> List[float]:
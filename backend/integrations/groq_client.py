@@ -0,0 +1,341 @@
+"""
+Groq LLM gateway.
+
+Every Groq call in the backend and agents goes through this module. One
+AsyncGroq client (pooled httpx connections) runs on a dedicated event-loop
+thread, so async request handlers and sync callers in worker threads share
+the same limits:
+
+- a semaphore bounding concurrent Groq requests
+- token buckets for requests/minute and tokens/minute (GROQ_*_PER_MINUTE;
+  limits are per process, so divide the account limits across workers)
+- jittered exponential backoff on 429, 5xx, connection errors and timeouts,
+  honouring Retry-After
+- a per-call deadline covering queueing, retries and the request itself
+
+chat_completion (sync), achat_completion (async) and achat_completion_stream
+are the public entry points.
+"""
+import asyncio
+import concurrent.futures
+import logging
+import random
+import threading
+import time
+from typing import Optional, Dict, Any, List, AsyncIterator
+
+import httpx
+import groq
+from groq import AsyncGroq
+
+from config import (
+    GROQ_API_KEY,
+    GROQ_MODEL,
+    GROQ_MAX_CONCURRENCY,
+    GROQ_REQUESTS_PER_MINUTE,
+    GROQ_TOKENS_PER_MINUTE,
+    GROQ_MAX_RETRIES,
+    GROQ_BACKOFF_BASE_SECONDS,
+    GROQ_BACKOFF_MAX_SECONDS,
+    GROQ_DEADLINE_SECONDS,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class LLMGatewayError(Exception):
+    """A Groq call failed after retries."""
+
+
+class LLMDeadlineExceeded(LLMGatewayError):
+    """A Groq call did not finish within its deadline."""
+
+
+_RETRYABLE_ERRORS = (
+    groq.RateLimitError,
+    groq.InternalServerError,
+    groq.APIConnectionError,  # includes APITimeoutError
+)
+
+
+class TokenBucket:
+    """Async token bucket; lives on the gateway loop, so no thread locking is needed."""
+
+    def __init__(self, per_minute: float):
+        self.capacity = max(float(per_minute), 1.0)
+        self.rate = self.capacity / 60.0
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self, amount: float, deadline: float) -> None:
+        amount = min(float(amount), self.capacity)
+        async with self._lock:  # FIFO: later callers wait behind earlier ones
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= amount:
+                    self.tokens -= amount
+                    return
+                wait = (amount - self.tokens) / self.rate
+                if now + wait > deadline:
+                    raise LLMDeadlineExceeded("Deadline exceeded waiting for Groq rate limit")
+                await asyncio.sleep(wait)
+
+
+def _build_request(
+    prompt: str,
+    model: Optional[str],
+    temperature: float,
+    max_tokens: Optional[int],
+    response_format: Optional[Dict[str, Any]],
+    system_prompt: Optional[str]
+) -> Dict[str, Any]:
+    """Build keyword arguments for chat.completions.create."""
+    messages: List[Dict[str, str]] = []
+    if system_prompt:
+        messages.append({"role": "system", "content": system_prompt})
+    messages.append({"role": "user", "content": prompt})
+
+    params: Dict[str, Any] = {
+        "messages": messages,
+        "model": model or GROQ_MODEL,
+        "temperature": temperature,
+    }
+    if max_tokens is not None:
+        params["max_tokens"] = max_tokens
+    if response_format is not None:
+        params["response_format"] = response_format
+    return params
+
+
+def _estimate_tokens(params: Dict[str, Any]) -> int:
+    """Rough token cost of a request (~4 chars/token plus the completion budget)."""
+    prompt_chars = sum(len(m.get("content") or "") for m in params["messages"])
+    return prompt_chars // 4 + (params.get("max_tokens") or 512)
+
+
+def _retry_after_seconds(error: Exception) -> Optional[float]:
+    response = getattr(error, "response", None)
+    if response is None:
+        return None
+    try:
+        return float(response.headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+class LLMGateway:
+    """Owns the gateway event loop, the pooled async client and the limits."""
+
+    def __init__(self):
+        if not GROQ_API_KEY:
+            raise ValueError("GROQ_API_KEY not set")
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="llm-gateway", daemon=True)
+        self._thread.start()
+        self.stats = {"calls": 0, "retries": 0, "rate_limited": 0, "deadline_exceeded": 0, "failures": 0}
+        # Loop-bound primitives must be created on the gateway loop
+        self._run_sync(self._init_on_loop())
+
+    async def _init_on_loop(self) -> None:
+        self._semaphore = asyncio.Semaphore(GROQ_MAX_CONCURRENCY)
+        self._request_bucket = TokenBucket(GROQ_REQUESTS_PER_MINUTE)
+        self._token_bucket = TokenBucket(GROQ_TOKENS_PER_MINUTE)
+        self._http = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=GROQ_MAX_CONCURRENCY,
+                max_keepalive_connections=GROQ_MAX_CONCURRENCY,
+            )
+        )
+        # Retries are handled here, not by the SDK
+        self.client = AsyncGroq(api_key=GROQ_API_KEY, http_client=self._http, max_retries=0)
+
+    def _run_sync(self, coro):
+        return asyncio.run_coroutine_threadsafe(coro, self._loop).result()
+
+    # ---------- core call (runs on the gateway loop) ----------
+
+    async def _with_retries(self, params: Dict[str, Any], deadline: float, call):
+        """Acquire limits and run call(remaining_seconds), retrying transient errors."""
+        estimated_tokens = _estimate_tokens(params)
+        attempt = 0
+        while True:
+            await self._request_bucket.acquire(1, deadline)
+            await self._token_bucket.acquire(estimated_tokens, deadline)
+            try:
+                async with self._semaphore:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise asyncio.TimeoutError
+                    self.stats["calls"] += 1
+                    return await asyncio.wait_for(call(remaining), timeout=remaining)
+            except asyncio.TimeoutError:
+                self.stats["deadline_exceeded"] += 1
+                raise LLMDeadlineExceeded(f"Groq call exceeded its deadline ({params['model']})")
+            except _RETRYABLE_ERRORS as e:
+                if isinstance(e, groq.RateLimitError):
+                    self.stats["rate_limited"] += 1
+                if attempt >= GROQ_MAX_RETRIES:
+                    self.stats["failures"] += 1
+                    raise LLMGatewayError(f"Groq call failed after {attempt + 1} attempts: {e}") from e
+                backoff = random.uniform(0, min(GROQ_BACKOFF_MAX_SECONDS, GROQ_BACKOFF_BASE_SECONDS * (2 ** attempt)))
+                retry_after = _retry_after_seconds(e)
+                if retry_after is not None:
+                    backoff = max(backoff, retry_after)
+                if time.monotonic() + backoff >= deadline:
+                    self.stats["deadline_exceeded"] += 1
+                    raise LLMDeadlineExceeded(f"Groq call would exceed its deadline while backing off: {e}") from e
+                attempt += 1
+                self.stats["retries"] += 1
+                logger.warning("Groq call failed (%s), retry %s in %.2fs", type(e).__name__, attempt, backoff)
+                await asyncio.sleep(backoff)
+
+    async def _complete(self, params: Dict[str, Any], deadline: float) -> str:
+        async def call(remaining: float) -> str:
+            completion = await self.client.chat.completions.create(timeout=remaining, **params)
+            return (completion.choices[0].message.content or "").strip()
+
+        return await self._with_retries(params, deadline, call)
+
+    async def _open_stream(self, params: Dict[str, Any], deadline: float):
+        async def call(remaining: float):
+            return await self.client.chat.completions.create(stream=True, timeout=remaining, **params)
+
+        # Retries only cover opening the stream; tokens already sent cannot be replayed
+        return await self._with_retries(params, deadline, call)
+
+    # ---------- entry points (any thread / loop) ----------
+
+    def complete(self, params: Dict[str, Any], deadline_seconds: float) -> str:
+        """Blocking call for sync code (worker threads, agents)."""
+        deadline = time.monotonic() + deadline_seconds
+        future = asyncio.run_coroutine_threadsafe(self._complete(params, deadline), self._loop)
+        try:
+            return future.result(timeout=deadline_seconds + 1)
+        except concurrent.futures.TimeoutError:
+            future.cancel()
+            raise LLMDeadlineExceeded("Groq call exceeded its deadline")
+
+    async def acomplete(self, params: Dict[str, Any], deadline_seconds: float) -> str:
+        """Awaitable call for code running on another event loop (request handlers)."""
+        deadline = time.monotonic() + deadline_seconds
+        future = asyncio.run_coroutine_threadsafe(self._complete(params, deadline), self._loop)
+        return await asyncio.wrap_future(future)
+
+    async def astream(self, params: Dict[str, Any], deadline_seconds: float) -> AsyncIterator[str]:
+        """Stream text deltas from the gateway loop to the caller's loop."""
+        caller_loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue()
+        done = object()
+        deadline = time.monotonic() + deadline_seconds
+
+        async def pump():
+            try:
+                stream = await self._open_stream(params, deadline)
+                async for chunk in stream:
+                    if time.monotonic() > deadline:
+                        raise LLMDeadlineExceeded("Groq stream exceeded its deadline")
+                    if not chunk.choices:
+                        continue
+                    delta = chunk.choices[0].delta.content
+                    if delta:
+                        caller_loop.call_soon_threadsafe(queue.put_nowait, delta)
+            except Exception as e:
+                caller_loop.call_soon_threadsafe(queue.put_nowait, e)
+            finally:
+                caller_loop.call_soon_threadsafe(queue.put_nowait, done)
+
+        future = asyncio.run_coroutine_threadsafe(pump(), self._loop)
+        try:
+            while True:
+                item = await queue.get()
+                if item is done:
+                    break
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+        finally:
+            future.cancel()
+
+    def close(self) -> None:
+        async def _close():
+            await self._http.aclose()
+
+        try:
+            self._run_sync(_close())
+        finally:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+
+
+# Global gateway instance
+_gateway: Optional[LLMGateway] = None
+_gateway_lock = threading.Lock()
+
+
+def get_llm_gateway() -> LLMGateway:
+    """Get or initialize the shared LLM gateway."""
+    global _gateway
+    if _gateway is None:
+        with _gateway_lock:
+            if _gateway is None:
+                _gateway = LLMGateway()
+    return _gateway
+
+
+def shutdown_llm_gateway() -> None:
+    """Close pooled connections and stop the gateway loop."""
+    global _gateway
+    with _gateway_lock:
+        if _gateway is not None:
+            _gateway.close()
+            _gateway = None
+
+
+def gateway_stats() -> Dict[str, Any]:
+    """Call/retry/rate-limit counters for the current process."""
+    return dict(_gateway.stats) if _gateway is not None else {}
+
+
+def chat_completion(
+    prompt: str,
+    model: Optional[str] = None,
+    temperature: float = 0,
+    max_tokens: Optional[int] = None,
+    response_format: Optional[Dict[str, Any]] = None,
+    system_prompt: Optional[str] = None,
+    deadline: Optional[float] = None
+) -> str:
+    """Run a single-prompt completion and return the stripped response text (blocking)."""
+    params = _build_request(prompt, model, temperature, max_tokens, response_format, system_prompt)
+    return get_llm_gateway().complete(params, deadline or GROQ_DEADLINE_SECONDS)
+
+
+async def achat_completion(
+    prompt: str,
+    model: Optional[str] = None,
+    temperature: float = 0,
+    max_tokens: Optional[int] = None,
+    response_format: Optional[Dict[str, Any]] = None,
+    system_prompt: Optional[str] = None,
+    deadline: Optional[float] = None
+) -> str:
+    """Async variant of chat_completion for use inside request handlers."""
+    params = _build_request(prompt, model, temperature, max_tokens, response_format, system_prompt)
+    return await get_llm_gateway().acomplete(params, deadline or GROQ_DEADLINE_SECONDS)
+
+
+async def achat_completion_stream(
+    prompt: str,
+    model: Optional[str] = None,
+    temperature: float = 0,
+    max_tokens: Optional[int] = None,
+    response_format: Optional[Dict[str, Any]] = None,
+    system_prompt: Optional[str] = None,
+    deadline: Optional[float] = None
+) -> AsyncIterator[str]:
+    """Stream a completion, yielding text deltas as Groq produces them."""
+    params = _build_request(prompt, model, temperature, max_tokens, response_format, system_prompt)
+    async for delta in get_llm_gateway().astream(params, deadline or GROQ_DEADLINE_SECONDS):
+        yield delta
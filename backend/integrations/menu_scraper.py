@@ -15,6 +15,7 @@ Usage:
     dishes = scraper.scrape_menu_url("https://restaurant.com/menu")
 """
 
+import logging
 import os
 import re
 import requests
@@ -23,13 +24,15 @@ from urllib.parse import urlparse
 from bs4 import BeautifulSoup
 from dotenv import load_dotenv
 
+logger = logging.getLogger(__name__)
+
 load_dotenv()
 
 try:
-    from groq import Groq
+    from integrations.groq_client import chat_completion
 except ImportError:
-    print("⚠️  Groq not installed. AI extraction will not be available.")
-    Groq = None
+    logger.warning("⚠️  Groq not installed. AI extraction will not be available.")
+    chat_completion = None
 
 
 class MenuURLScraper:
@@ -41,9 +44,9 @@ class MenuURLScraper:
             'Accept-Language': 'en-US,en;q=0.9'
         })
         
-        # Initialize Groq for AI extraction
+        # Groq AI extraction goes through the shared LLM gateway
         groq_key = os.getenv("GROQ_API_KEY")
-        self.groq_client = Groq(api_key=groq_key) if groq_key and Groq else None
+        self.groq_client = chat_completion if groq_key and chat_completion else None
         
         # Category words to filter out
         self.category_words = {
@@ -69,7 +72,7 @@ class MenuURLScraper:
         if not menu_url:
             return []
         
-        print(f"🔍 Scraping menu: {menu_url}")
+        logger.info("🔍 Scraping menu: %s", menu_url)
         
         # Determine URL type and route to appropriate handler
         url_lower = menu_url.lower()
@@ -123,7 +126,7 @@ class MenuURLScraper:
             
             # Strategy 3: Use AI extraction if available and other methods failed
             if len(dishes) < 5 and self.groq_client:
-                print("   Using AI to extract dishes from HTML...")
+                logger.info("Using AI to extract dishes from HTML...")
                 text_content = soup.get_text(separator=' ', strip=True)[:4000]  # Limit text
                 ai_dishes = self._extract_dishes_with_ai(text_content)
                 dishes.extend(ai_dishes)
@@ -137,16 +140,16 @@ class MenuURLScraper:
                     seen.add(dish_lower)
                     unique_dishes.append(dish)
             
-            print(f"   ✅ Extracted {len(unique_dishes)} dishes from HTML")
+            logger.info("✅ Extracted %s dishes from HTML", len(unique_dishes))
             return unique_dishes[:30]  # Limit to 30 dishes
         
         except Exception as e:
-            print(f"   ❌ Error scraping HTML menu: {e}")
+            logger.error("❌ Error scraping HTML menu: %s", e)
             return []
     
     def _scrape_pdf_menu(self, url: str) -> List[str]:
         """Scrape dishes from PDF menu"""
-        print("   📄 PDF menu detected")
+        logger.info("📄 PDF menu detected")
         
         try:
             # Download PDF
@@ -167,25 +170,25 @@ class MenuURLScraper:
                 
                 # Extract dishes from text using AI
                 if self.groq_client and text:
-                    print("   Using AI to extract dishes from PDF...")
+                    logger.info("Using AI to extract dishes from PDF...")
                     dishes = self._extract_dishes_with_ai(text[:4000])
-                    print(f"   ✅ Extracted {len(dishes)} dishes from PDF")
+                    logger.info("✅ Extracted %s dishes from PDF", len(dishes))
                     return dishes
                 else:
-                    print("   ⚠️  No AI client available for PDF extraction")
+                    logger.warning("⚠️  No AI client available for PDF extraction")
                     return []
             
             except ImportError:
-                print("   ⚠️  PyPDF2 not installed. Install with: pip install PyPDF2")
+                logger.warning("⚠️  PyPDF2 not installed. Install with: pip install PyPDF2")
                 return []
         
         except Exception as e:
-            print(f"   ❌ Error scraping PDF menu: {e}")
+            logger.error("❌ Error scraping PDF menu: %s", e)
             return []
     
     def _scrape_image_menu(self, url: str) -> List[str]:
         """Scrape dishes from image menu using OCR"""
-        print("   🖼️  Image menu detected")
+        logger.info("🖼️  Image menu detected")
         
         try:
             # Download image
@@ -203,21 +206,21 @@ class MenuURLScraper:
                 
                 # Extract dishes from OCR text using AI
                 if self.groq_client and text:
-                    print("   Using AI to extract dishes from OCR text...")
+                    logger.info("Using AI to extract dishes from OCR text...")
                     dishes = self._extract_dishes_with_ai(text)
-                    print(f"   ✅ Extracted {len(dishes)} dishes from image")
+                    logger.info("✅ Extracted %s dishes from image", len(dishes))
                     return dishes
                 else:
-                    print("   ⚠️  No AI client available for OCR extraction")
+                    logger.warning("⚠️  No AI client available for OCR extraction")
                     return []
             
             except ImportError:
-                print("   ⚠️  pytesseract not installed. Install with: pip install pytesseract")
-                print("   Also install Tesseract-OCR: https://github.com/tesseract-ocr/tesseract")
+                logger.warning("⚠️  pytesseract not installed. Install with: pip install pytesseract")
+                logger.info("Also install Tesseract-OCR: https://github.com/tesseract-ocr/tesseract")
                 return []
         
         except Exception as e:
-            print(f"   ❌ Error scraping image menu: {e}")
+            logger.error("❌ Error scraping image menu: %s", e)
             return []
     
     def _extract_dishes_with_ai(self, text: str) -> List[str]:
@@ -240,15 +243,13 @@ Menu text:
 
 Dish names (comma-separated):"""
             
-            response = self.groq_client.chat.completions.create(
+            content = self.groq_client(
+                prompt,
                 model="llama-3.3-70b-versatile",
-                messages=[{"role": "user", "content": prompt}],
                 temperature=0.1,
                 max_tokens=500
             )
             
-            content = response.choices[0].message.content.strip()
-            
             # Parse comma-separated dishes
             dishes = [d.strip() for d in content.split(',')]
             dishes = [d for d in dishes if self._is_valid_dish_name(d)]
@@ -256,7 +257,7 @@ Dish names (comma-separated):"""
             return dishes[:30]
         
         except Exception as e:
-            print(f"   ❌ AI extraction error: {e}")
+            logger.error("❌ AI extraction error: %s", e)
             return []
     
     def _is_valid_dish_name(self, dish: str) -> bool:
@@ -1,17 +1,30 @@
 """
 Pinecone vector database client and operations.
 """
-from typing import Optional, List, Dict, Any
+import logging
+from typing import Optional, List, Dict, Any, Iterable, Iterator
 from pinecone import Pinecone
-from config import PINECONE_API_KEY, PINECONE_INDEX
+from config import PINECONE_API_KEY, PINECONE_INDEX, INGREDIENT_FLAVOR_CSV, INGREDIENT_SEED_MARKER
 import csv
+import hashlib
+from datetime import datetime, timezone
 from pathlib import Path
 from integrations.embeddings import embed_text, get_embedding_model
 
+logger = logging.getLogger(__name__)
+
 
 # Global Pinecone index instance
 _pinecone_index = None
-_ingredient_upsert_done = False
+
+# all-MiniLM-L6-v2 dimension
+INDEX_DIMENSION = 384
+
+# Namespace holding bookkeeping records such as the ingredient seed marker
+SEED_MARKER_NAMESPACE = "seed-markers"
+
+# How long a "seeding" claim keeps other workers from seeding the same version
+SEED_CLAIM_TTL_SECONDS = 600
 
 
 def get_pinecone_index():
@@ -30,7 +43,7 @@ def get_pinecone_index():
             from pinecone import ServerlessSpec
             pc.create_index(
                 name=PINECONE_INDEX,
-                dimension=384,  # all-MiniLM-L6-v2 dimension
+                dimension=INDEX_DIMENSION,
                 metric="cosine",
                 spec=ServerlessSpec(cloud="aws", region="us-east-1")
             )
@@ -44,7 +57,8 @@ def query_pinecone(
     query_vector: List[float],
     top_k: int = 10,
     filter_dict: Optional[Dict[str, Any]] = None,
-    include_metadata: bool = True
+    include_metadata: bool = True,
+    namespace: Optional[str] = None
 ) -> List[Dict[str, Any]]:
     """Query Pinecone index for similar vectors."""
     index = get_pinecone_index()
@@ -57,6 +71,8 @@ def query_pinecone(
     
     if filter_dict:
         query_params["filter"] = filter_dict
+    if namespace:
+        query_params["namespace"] = namespace
     
     result = index.query(**query_params)
     
@@ -65,81 +81,231 @@ def query_pinecone(
     return matches
 
 
+def query_pinecone_widening(
+    query_vector: List[float],
+    filters: List[Dict[str, Any]],
+    top_k: int,
+    min_results: int,
+    unfiltered_top_k: Optional[int] = None,
+    namespace: Optional[str] = None
+) -> List[Dict[str, Any]]:
+    """
+    Try metadata filters from strictest to widest until one returns min_results.
+
+    Falls back to an unfiltered query (unfiltered_top_k, default top_k), e.g.
+    for records that predate the filterable fields.
+    """
+    for filter_dict in filters:
+        matches = query_pinecone(query_vector, top_k, filter_dict, namespace=namespace)
+        if len(matches) >= min_results:
+            logger.debug("Pinecone filter %s returned %s matches", filter_dict, len(matches))
+            return matches
+        logger.debug("Pinecone filter %s returned %s matches, widening", filter_dict, len(matches))
+    return query_pinecone(query_vector, unfiltered_top_k or top_k, namespace=namespace)
+
+
+# Largest top_k Pinecone serves with metadata
+PINECONE_MAX_TOP_K = 1000
+
+
+def query_pinecone_pages(
+    query_vector: List[float],
+    top_k: int,
+    filter_dict: Optional[Dict[str, Any]] = None,
+    namespace: Optional[str] = None,
+    seen_ids: Iterable[str] = (),
+) -> Iterator[List[Dict[str, Any]]]:
+    """
+    Further pages after a query of top_k, fetched lazily.
+
+    Pinecone has no offset, so each page re-queries with twice the top_k and
+    yields the matches not seen yet. Stops when the index runs out or at
+    PINECONE_MAX_TOP_K.
+    """
+    seen = set(seen_ids)
+    while top_k < PINECONE_MAX_TOP_K:
+        top_k = min(top_k * 2, PINECONE_MAX_TOP_K)
+        matches = query_pinecone(query_vector, top_k, filter_dict, namespace=namespace)
+        page = []
+        for match in matches:
+            record_id = match.get("id") if isinstance(match, dict) else getattr(match, "id", None)
+            if record_id not in seen:
+                seen.add(record_id)
+                page.append(match)
+        logger.debug("Pinecone page at top_k=%s: %s new matches", top_k, len(page))
+        if page:
+            yield page
+        if len(matches) < top_k:
+            return
+
+
 def upsert_to_pinecone(vectors: List[Dict[str, Any]]) -> None:
     """Upsert vectors to Pinecone index."""
     index = get_pinecone_index()
     index.upsert(vectors=vectors)
 
 
-def maybe_upsert_ingredients_to_pinecone() -> None:
+def iter_namespace_metadata(namespace: str, batch_size: int = 100):
+    """Yield (id, metadata) for every record in a namespace (list + fetch in pages)."""
+    index = get_pinecone_index()
+    for ids in index.list(namespace=namespace, limit=batch_size):
+        if ids:
+            yield from fetch_metadata(list(ids), namespace).items()
+
+
+def fetch_metadata(ids: List[str], namespace: str) -> Dict[str, Dict[str, Any]]:
+    """{id: metadata} for records fetched by id."""
+    fetched = get_pinecone_index().fetch(ids=ids, namespace=namespace)
+    vectors = fetched.get("vectors", {}) if isinstance(fetched, dict) else getattr(fetched, "vectors", {})
+    result = {}
+    for record_id, vector in vectors.items():
+        meta = vector.get("metadata") if isinstance(vector, dict) else getattr(vector, "metadata", None)
+        result[record_id] = meta or {}
+    return result
+
+
+def update_metadata(record_id: str, metadata: Dict[str, Any], namespace: str) -> None:
+    """Set (merge) metadata fields on one record without touching its vector."""
+    get_pinecone_index().update(id=record_id, set_metadata=metadata, namespace=namespace)
+
+
+def resolve_ingredient_csv_path() -> Optional[Path]:
+    """Locate the ingredient flavor CSV (configured path, then the repo data/ dir)."""
+    candidates = [
+        Path(INGREDIENT_FLAVOR_CSV),
+        Path(__file__).resolve().parents[2] / "data" / Path(INGREDIENT_FLAVOR_CSV).name,
+    ]
+    for path in candidates:
+        if path.exists():
+            return path
+    return None
+
+
+def ingredient_csv_version(csv_path: Path) -> str:
+    """Content hash of the ingredient CSV, used as the seeding version."""
+    digest = hashlib.sha256()
+    with open(csv_path, "rb") as f:
+        for block in iter(lambda: f.read(65536), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def read_ingredient_seed_marker() -> Optional[Dict[str, Any]]:
+    """Read the "seeded at version X" marker record from the index, if any."""
+    try:
+        return fetch_metadata([INGREDIENT_SEED_MARKER], SEED_MARKER_NAMESPACE).get(INGREDIENT_SEED_MARKER)
+    except Exception as e:
+        logger.warning("Could not read ingredient seed marker: %s", e)
+        return None
+
+
+def _write_ingredient_seed_marker(version: str, status: str, count: int = 0) -> None:
     """
-    Upsert ingredient flavor data to Pinecone if not already done.
-    This is called once on startup to ensure ingredient data is available.
+    Upsert the seed marker record.
+
+    It lives in the index it describes (in its own namespace, so searches
+    never see it), which keeps it valid across containers and restarts.
     """
-    global _ingredient_upsert_done
-    
-    if _ingredient_upsert_done:
-        return
-    
-    csv_path = Path("ingredient-flavor.csv")
-    if not csv_path.exists():
-        print(f"[WARNING] {csv_path} not found, skipping ingredient upsert")
-        _ingredient_upsert_done = True
-        return
-    
+    get_pinecone_index().upsert(
+        vectors=[{
+            "id": INGREDIENT_SEED_MARKER,
+            # Cosine indexes reject all-zero vectors
+            "values": [1.0] + [0.0] * (INDEX_DIMENSION - 1),
+            "metadata": {
+                "version": version,
+                "status": status,
+                "count": count,
+                "seeded_at": datetime.now(timezone.utc).isoformat(),
+            },
+        }],
+        namespace=SEED_MARKER_NAMESPACE,
+    )
+
+
+def _seed_in_progress(marker: Dict[str, Any], version: str) -> bool:
+    """True if another worker claimed seeding this version recently."""
+    if marker.get("status") != "seeding" or marker.get("version") != version:
+        return False
+    try:
+        started = datetime.fromisoformat(marker["seeded_at"])
+    except (KeyError, TypeError, ValueError):
+        return False
+    return (datetime.now(timezone.utc) - started).total_seconds() < SEED_CLAIM_TTL_SECONDS
+
+
+def seed_ingredients_to_pinecone(force: bool = False) -> bool:
+    """
+    Upsert ingredient flavor data to Pinecone unless this CSV version is already seeded.
+
+    Run at startup or from seed_ingredients.py; never from a request handler.
+    The CSV content hash is recorded in a marker record in the index itself
+    (id INGREDIENT_SEED_MARKER in the SEED_MARKER_NAMESPACE namespace), so
+    later runs, in any container, skip the embedding model until the CSV
+    changes. Workers starting together see each other's "seeding" claim and
+    leave the upsert to the first one.
+
+    Returns:
+        True if vectors were upserted, False if skipped or failed.
+    """
+    csv_path = resolve_ingredient_csv_path()
+    if csv_path is None:
+        logger.warning("%s not found, skipping ingredient upsert", INGREDIENT_FLAVOR_CSV)
+        return False
+
+    version = ingredient_csv_version(csv_path)
+    marker = read_ingredient_seed_marker()
+    if not force and marker:
+        if marker.get("version") == version and marker.get("status") == "seeded":
+            logger.info("Ingredients already seeded at version %s, skipping upsert", version[:12])
+            return False
+        if _seed_in_progress(marker, version):
+            logger.info("Another worker is seeding ingredients at version %s, skipping upsert", version[:12])
+            return False
+
     try:
         index = get_pinecone_index()
+        _write_ingredient_seed_marker(version, "seeding")
         model = get_embedding_model()
-        
-        # Check if ingredients already exist
-        stats = index.describe_index_stats()
-        total_vectors = stats.get("total_vector_count", 0) if isinstance(stats, dict) else getattr(stats, "total_vector_count", 0)
-        
-        if total_vectors > 100:  # Assume ingredients are already loaded
-            print(f"[INFO] Pinecone already has {total_vectors} vectors, skipping ingredient upsert")
-            _ingredient_upsert_done = True
-            return
-        
-        # Load and upsert ingredients
-        vectors = []
+
+        rows = []
         with open(csv_path, "r", encoding="utf-8") as f:
             reader = csv.DictReader(f)
             for row in reader:
                 ingredient = row.get("ingredient", "").strip()
-                if not ingredient:
-                    continue
-                
-                # Create embedding
-                embedding = model.encode(ingredient).tolist()
-                
-                # Create metadata
-                metadata = {
-                    "type": "ingredient",
-                    "name": ingredient,
-                    "sweet": float(row.get("sweet", 0)),
-                    "salty": float(row.get("salty", 0)),
-                    "sour": float(row.get("sour", 0)),
-                    "bitter": float(row.get("bitter", 0)),
-                    "umami": float(row.get("umami", 0)),
-                    "spicy": float(row.get("spicy", 0)),
-                }
-                
-                vectors.append({
-                    "id": f"ingredient:{ingredient}",
-                    "values": embedding,
-                    "metadata": metadata
-                })
-        
+                if ingredient:
+                    rows.append((ingredient, row))
+
+        # Encode in one batch rather than one model call per ingredient
+        embeddings = model.encode([ingredient for ingredient, _ in rows])
+
+        vectors = []
+        for (ingredient, row), embedding in zip(rows, embeddings):
+            metadata = {
+                "type": "ingredient",
+                "name": ingredient,
+                "sweet": float(row.get("sweet") or 0),
+                "salty": float(row.get("salty") or 0),
+                "sour": float(row.get("sour") or 0),
+                "bitter": float(row.get("bitter") or 0),
+                "umami": float(row.get("umami") or 0),
+                "spicy": float(row.get("spicy") or 0),
+            }
+            vectors.append({
+                "id": f"ingredient:{ingredient}",
+                "values": embedding.tolist(),
+                "metadata": metadata
+            })
+
         # Upsert in batches
         batch_size = 100
         for i in range(0, len(vectors), batch_size):
             batch = vectors[i:i + batch_size]
             index.upsert(vectors=batch)
-        
-        print(f"[INFO] Upserted {len(vectors)} ingredients to Pinecone")
-        _ingredient_upsert_done = True
-        
-    except Exception as e:
-        print(f"[ERROR] Failed to upsert ingredients: {e}")
-        _ingredient_upsert_done = True  # Don't retry on every request
 
+        _write_ingredient_seed_marker(version, "seeded", len(vectors))
+        logger.info("Upserted %s ingredients to Pinecone (version %s)", len(vectors), version[:12])
+        return True
+
+    except Exception as e:
+        logger.error("Failed to upsert ingredients: %s", e)
+        return False
@@ -13,12 +13,15 @@ Environment Variables:
     YELP_API_KEY=your_yelp_api_key_here
 """
 
+import logging
 import os
 import json
 import requests
 from typing import List, Dict, Optional
 from dotenv import load_dotenv
 
+logger = logging.getLogger(__name__)
+
 load_dotenv()
 
 
@@ -60,7 +63,7 @@ class YelpAPIClient:
             data = response.json()
             return data.get("businesses", [])
         except Exception as e:
-            print(f"❌ Error searching businesses: {e}")
+            logger.error("❌ Error searching businesses: %s", e)
             return []
     
     def get_business_details(self, business_id: str) -> Optional[Dict]:
@@ -80,7 +83,7 @@ class YelpAPIClient:
             response.raise_for_status()
             return response.json()
         except Exception as e:
-            print(f"❌ Error getting business details: {e}")
+            logger.error("❌ Error getting business details: %s", e)
             return None
     
     def ai_chat_search(self, query: str, latitude: float = None, longitude: float = None, 
@@ -115,7 +118,7 @@ class YelpAPIClient:
             response.raise_for_status()
             return response.json()
         except Exception as e:
-            print(f"❌ Error with AI chat search: {e}")
+            logger.error("❌ Error with AI chat search: %s", e)
             return {}
     
     def extract_menu_urls(self, businesses: List[Dict]) -> List[Dict]:
@@ -179,15 +182,15 @@ class YelpAPIClient:
         Returns:
             List of restaurant data with menu URLs
         """
-        print(f"🔍 Searching for '{term}' in {location}...")
+        logger.info("🔍 Searching for '%s' in %s...", term, location)
         businesses = self.search_businesses(term, location, limit)
-        print(f"   Found {len(businesses)} businesses")
+        logger.info("Found %s businesses", len(businesses))
         
-        print(f"📋 Extracting menu URLs...")
+        logger.info("📋 Extracting menu URLs...")
         restaurants = self.extract_menu_urls(businesses)
         
         menu_count = sum(1 for r in restaurants if r.get("menu_url"))
-        print(f"   Found {menu_count} restaurants with menu URLs")
+        logger.info("Found %s restaurants with menu URLs", menu_count)
         
         return restaurants
 
@@ -0,0 +1,83 @@
+"""
+Logging setup for the backend and agents.
+
+Modules log through `logging.getLogger(__name__)` with lazy %-style
+arguments; configure_logging() is called once at startup and applies:
+
+- LOG_LEVEL:  root level (default INFO)
+- LOG_LEVELS: per-module overrides, e.g.
+              "services.recommendation_service=DEBUG,agents=WARNING"
+- LOG_FORMAT: "text" (default) or "json" (one JSON object per line)
+"""
+import json
+import logging
+import sys
+from datetime import datetime, timezone
+from typing import Dict
+
+from config import LOG_LEVEL, LOG_LEVELS, LOG_FORMAT
+
+
+_TEXT_FORMAT = "%(asctime)s %(levelname)s [%(name)s] %(message)s"
+
+# Attributes every LogRecord has; anything else was passed via `extra=`
+_RESERVED_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime"}
+
+
+class JsonFormatter(logging.Formatter):
+    """Render records as single-line JSON, including any `extra=` fields."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        payload = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RESERVED_ATTRS and not key.startswith("_"):
+                payload[key] = value
+        if record.exc_info:
+            payload["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(payload, ensure_ascii=False, default=str)
+
+
+def parse_level_overrides(spec: str) -> Dict[str, int]:
+    """Parse "module=LEVEL,other=LEVEL" into {logger name: level}."""
+    overrides: Dict[str, int] = {}
+    for item in (spec or "").split(","):
+        if "=" not in item:
+            continue
+        name, level = item.split("=", 1)
+        level_value = logging.getLevelName(level.strip().upper())
+        if name.strip() and isinstance(level_value, int):
+            overrides[name.strip()] = level_value
+    return overrides
+
+
+_configured = False
+
+
+def configure_logging(force: bool = False) -> None:
+    """Install the root handler and per-module levels (idempotent)."""
+    global _configured
+    if _configured and not force:
+        return
+
+    handler = logging.StreamHandler(sys.stdout)
+    if LOG_FORMAT == "json":
+        handler.setFormatter(JsonFormatter())
+    else:
+        handler.setFormatter(logging.Formatter(_TEXT_FORMAT))
+
+    root = logging.getLogger()
+    for existing in list(root.handlers):
+        root.removeHandler(existing)
+    root.addHandler(handler)
+    root_level = logging.getLevelName(LOG_LEVEL.upper())
+    root.setLevel(root_level if isinstance(root_level, int) else logging.INFO)
+
+    for name, level in parse_level_overrides(LOG_LEVELS).items():
+        logging.getLogger(name).setLevel(level)
+
+    _configured = True
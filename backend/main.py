@@ -2,18 +2,42 @@
 Swaad Recipe Recommendation API - Main Application
 Modularized version with clean separation of concerns.
 """
-from fastapi import FastAPI
+import logging
+
+from logging_config import configure_logging
+
+# Configure logging before importing modules that log at import time
+configure_logging()
+
+from fastapi import FastAPI, HTTPException
+from fastapi.responses import StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 
-from config import CORS_ORIGINS, SENTENCE_TRANSFORMER_MODEL, GROQ_API_KEY
+import asyncio
+
+from config import (
+    CORS_ORIGINS, SENTENCE_TRANSFORMER_MODEL, GROQ_API_KEY, PINECONE_API_KEY,
+    SEED_INGREDIENTS_ON_STARTUP, SPATIAL_INDEX_ON_STARTUP,
+)
 from integrations.embeddings import get_embedding_model
-from services.restaurant_service import get_groq_client
+from integrations.groq_client import get_llm_gateway, shutdown_llm_gateway, gateway_stats
+from integrations.pinecone_client import seed_ingredients_to_pinecone
+from middleware.timing import ServerTimingMiddleware
 from models import ChatRequest
-from routes.chat import chat_endpoint
+from routes.chat import chat_endpoint, chat_stream_endpoint
+from services.response_cache import get_response_cache
+from services.singleflight import chat_flights, discover_flights
+from services.llm_memo import get_llm_memo
+from services.bounded_cache import memo_cache_stats
 from routes import users, friends, groups, collections, restaurants
 from recipe_database import load_recipes_database
+from services.dish_classifier import load_dish_classifier
+from services.intent_router import get_intent_router
+from services.spatial_index import build_spatial_index
 from db import init_db
 
+logger = logging.getLogger(__name__)
+
 
 # Initialize FastAPI app
 app = FastAPI(title="Swaad Recipe Recommendation API")
@@ -25,8 +49,12 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Server-Timing"],
 )
 
+# Per-stage latency (Server-Timing header); added last so it wraps everything
+app.add_middleware(ServerTimingMiddleware)
+
 # Include routers
 app.include_router(users.router)
 app.include_router(friends.router)
@@ -39,27 +67,46 @@ app.include_router(restaurants.router)
 async def startup():
     """Preload models and initialize database on startup."""
     # Initialize database
-    print("Initializing database...")
+    logger.info("Initializing database...")
     await init_db()
-    print("Database initialized.")
+    logger.info("Database initialized.")
     
     # Preload models (optional - skip if sentence-transformers not installed)
     try:
-        print(f"Preloading sentence-transformer model: {SENTENCE_TRANSFORMER_MODEL}")
+        logger.info("Preloading sentence-transformer model: %s", SENTENCE_TRANSFORMER_MODEL)
         get_embedding_model()
-        print("Sentence-transformer model loaded.")
+        logger.info("Sentence-transformer model loaded.")
+        get_intent_router()
     except ImportError as e:
-        print(f"⚠️ Sentence-transformer model not available: {e}")
-        print("⚠️ Some features may be limited. Install with: pip install sentence-transformers")
+        logger.warning("⚠️ Sentence-transformer model not available: %s", e)
+        logger.warning("⚠️ Some features may be limited. Install with: pip install sentence-transformers")
 
     if GROQ_API_KEY:
-        get_groq_client()
-        print("Groq client initialized.")
+        get_llm_gateway()
+        logger.info("LLM gateway initialized.")
 
     # Load recipe database (231K recipes)
-    print("Loading recipe database...")
+    logger.info("Loading recipe database...")
     load_recipes_database()
-    print("Recipe database loaded.")
+    logger.info("Recipe database loaded.")
+
+    # Local diet/course classifier (trained offline by train_dish_classifier.py)
+    await asyncio.to_thread(load_dish_classifier)
+
+    # Seed ingredient vectors once per CSV version (requests never do this)
+    if SEED_INGREDIENTS_ON_STARTUP and PINECONE_API_KEY:
+        await asyncio.to_thread(seed_ingredients_to_pinecone)
+
+    # Restaurant spatial index: scans the whole namespace, so build it in the
+    # background; location filtering works without it until it is ready
+    if SPATIAL_INDEX_ON_STARTUP and PINECONE_API_KEY:
+        app.state.spatial_index_task = asyncio.create_task(asyncio.to_thread(build_spatial_index))
+
+
+@app.on_event("shutdown")
+def shutdown():
+    """Close pooled LLM connections."""
+    shutdown_llm_gateway()
 
 
 @app.get("/")
@@ -82,6 +129,38 @@ async def chat_with_restaurants(request: ChatRequest):
     return await chat_endpoint(request)
 
 
+@app.post("/api/chat/stream")
+async def chat_with_restaurants_stream(request: ChatRequest):
+    """
+    Streaming chat endpoint (Server-Sent Events).
+
+    Sends the ranked recommendations as soon as they are ready, then the
+    response text token by token, then a final "done" event carrying the
+    same payload /api/chat returns.
+    """
+    if not GROQ_API_KEY:
+        raise HTTPException(status_code=500, detail="Missing GROQ_API_KEY")
+    return StreamingResponse(
+        chat_stream_endpoint(request),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.get("/api/chat/cache/stats")
+def chat_cache_stats():
+    """Response cache, request coalescing and memo cache counters (per worker)."""
+    cache = get_response_cache()
+    memo = get_llm_memo()
+    return {
+        "response_cache": cache.stats() if cache else {"backend": None},
+        "coalescing": {"chat": chat_flights.stats(), "discover": discover_flights.stats()},
+        "llm_gateway": gateway_stats(),
+        "llm_memo": memo.stats() if memo is not None else None,
+        "memo_caches": memo_cache_stats(),
+    }
+
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
@@ -0,0 +1,130 @@
+"""
+Per-request stage timing.
+
+`span("name")` (context manager) and `@traced("name")` (decorator) record how
+long a stage took on the current request's timer. ServerTimingMiddleware
+creates that timer for every HTTP request and reports it in the
+`Server-Timing` response header. Outside a request (CLI scripts, startup)
+spans are no-ops.
+
+The timer lives in a contextvar, so spans recorded inside
+`asyncio.to_thread` workers land on the same request.
+"""
+import functools
+import inspect
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional, Dict, Any, List
+
+
+class RequestTimer:
+    """Accumulates span durations for one request. Repeated span names are summed."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self._lock = threading.Lock()
+        self._spans: Dict[str, Dict[str, float]] = {}
+        self._order: List[str] = []
+
+    def record(self, name: str, duration_ms: float) -> None:
+        with self._lock:
+            entry = self._spans.get(name)
+            if entry is None:
+                entry = self._spans[name] = {"ms": 0.0, "count": 0}
+                self._order.append(name)
+            entry["ms"] += duration_ms
+            entry["count"] += 1
+
+    def total_ms(self) -> float:
+        return (time.perf_counter() - self.started) * 1000
+
+    def as_dict(self) -> Dict[str, Any]:
+        """JSON timing block: per-stage milliseconds (and call counts) plus the total."""
+        with self._lock:
+            stages = {
+                name: {"ms": round(self._spans[name]["ms"], 1), "count": int(self._spans[name]["count"])}
+                for name in self._order
+            }
+        return {"stages": stages, "total_ms": round(self.total_ms(), 1)}
+
+    def server_timing_header(self) -> str:
+        """Format spans as a Server-Timing header value."""
+        with self._lock:
+            parts = [f"{name};dur={self._spans[name]['ms']:.1f}" for name in self._order]
+        parts.append(f"total;dur={self.total_ms():.1f}")
+        return ", ".join(parts)
+
+
+_current_timer: ContextVar[Optional[RequestTimer]] = ContextVar("request_timer", default=None)
+
+
+def get_request_timer() -> Optional[RequestTimer]:
+    """Return the timer of the request being served, if any."""
+    return _current_timer.get()
+
+
+@contextmanager
+def span(name: str):
+    """Time a block and record it on the current request timer."""
+    timer = _current_timer.get()
+    if timer is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timer.record(name, (time.perf_counter() - start) * 1000)
+
+
+def traced(name: str):
+    """Decorator form of span(); works for sync and async functions."""
+    def decorator(func):
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with span(name):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+class ServerTimingMiddleware:
+    """
+    ASGI middleware that starts a RequestTimer per HTTP request and adds a
+    Server-Timing header when the response starts.
+
+    For streaming responses the header only covers work done before the
+    first byte; the chat stream reports the rest in its final event.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timer = RequestTimer()
+        token = _current_timer.set(timer)
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", timer.server_timing_header().encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current_timer.reset(token)
@@ -1,7 +1,7 @@
 """
 Pydantic models and data structures for the Swaad API.
 """
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import List, Dict, Optional, Any
 
 
@@ -66,6 +66,22 @@ class ChatRequest(BaseModel):
     max_results: Optional[int] = None
     diet_type: Optional[str] = None
     user_key: Optional[str] = "default"
+    include_timing: bool = False  # add a per-stage "timing" block to the response
+
+
+class ParsedQuery(BaseModel):
+    """Structured understanding of a chat query (see restaurant_service.parse_query)."""
+    intent: str = "other"  # dish_search, restaurant_search, greeting, other
+    relevant: bool = True
+    dish: Optional[str] = None
+    normalized_dish: Optional[str] = None
+    restaurant: Optional[str] = None
+    diet: Optional[str] = None
+    cuisine: Optional[str] = None
+    location: Optional[str] = None
+    llm_used: bool = False
+    # Embedding of the raw query when the intent router computed one; reused for Pinecone
+    query_embedding: Optional[List[float]] = Field(default=None, exclude=True, repr=False)
 
 
 class RestaurantRecommendation(BaseModel):
@@ -3,16 +3,25 @@ Recipe Database Module
 Handles loading and searching the recipes_with_flavour_profiles.csv database
 """
 
+import logging
 import csv
 import json
 from pathlib import Path
 from typing import Optional, Dict, Any, List
 from difflib import SequenceMatcher
 
+from services.bounded_cache import BoundedCache
+
+logger = logging.getLogger(__name__)
+
 # Global cache for recipes
 _recipes_cache: Optional[Dict[str, Dict[str, Any]]] = None
 _recipes_list: Optional[List[Dict[str, Any]]] = None
 
+# Fuzzy lookups scan up to 10K recipes, so remember their outcome (misses too)
+_fuzzy_match_cache = BoundedCache("recipe_fuzzy_match")
+_NO_MATCH = object()
+
 
 def load_recipes_database() -> None:
     """
@@ -40,12 +49,12 @@ def load_recipes_database() -> None:
             break
 
     if csv_path is None:
-        print(f"[WARNING] recipes_with_flavour_profiles.csv not found in any location, recipe database will not be available")
+        logger.warning("recipes_with_flavour_profiles.csv not found in any location, recipe database will not be available")
         _recipes_cache = {}
         _recipes_list = []
         return
     
-    print(f"[INFO] Loading recipe database from {csv_path}...")
+    logger.info("Loading recipe database from %s...", csv_path)
     
     _recipes_cache = {}
     _recipes_list = []
@@ -90,14 +99,21 @@ def load_recipes_database() -> None:
                 _recipes_cache[recipe_name] = recipe_data
                 _recipes_list.append(recipe_data)
         
-        print(f"[INFO] Loaded {len(_recipes_cache)} recipes into memory")
+        logger.info("Loaded %s recipes into memory", len(_recipes_cache))
         
     except Exception as e:
-        print(f"[ERROR] Failed to load recipe database: {e}")
+        logger.error("Failed to load recipe database: %s", e)
         _recipes_cache = {}
         _recipes_list = []
 
 
+def get_recipes() -> List[Dict[str, Any]]:
+    """Return every loaded recipe (loading the database if needed)."""
+    if _recipes_cache is None:
+        load_recipes_database()
+    return _recipes_list or []
+
+
 def similarity_score(str1: str, str2: str) -> float:
     """Calculate similarity score between two strings (0-1)."""
     return SequenceMatcher(None, str1.lower(), str2.lower()).ratio()
@@ -128,10 +144,15 @@ def search_recipe_by_name(dish_name: str, threshold: float = 0.6) -> Optional[Di
     # Try exact match first
     if dish_name_lower in _recipes_cache:
         recipe = _recipes_cache[dish_name_lower]
-        print(f"[DEBUG] Found exact match for '{dish_name}' in recipe database")
+        logger.debug("Found exact match for '%s' in recipe database", dish_name)
         return recipe
     
     # Try fuzzy matching
+    cache_key = (dish_name_lower, threshold)
+    cached = _fuzzy_match_cache.get(cache_key)
+    if cached is not None:
+        return None if cached is _NO_MATCH else cached
+
     best_match = None
     best_score = threshold
     
@@ -141,11 +162,13 @@ def search_recipe_by_name(dish_name: str, threshold: float = 0.6) -> Optional[Di
             best_score = score
             best_match = recipe
     
+    _fuzzy_match_cache.set(cache_key, best_match or _NO_MATCH)
+
     if best_match:
-        print(f"[DEBUG] Found fuzzy match for '{dish_name}': '{best_match['original_name']}' (score: {best_score:.2f})")
+        logger.debug("Found fuzzy match for '%s': '%s' (score: %.2f)", dish_name, best_match['original_name'], best_score)
         return best_match
     
-    print(f"[DEBUG] No match found for '{dish_name}' in recipe database")
+    logger.debug("No match found for '%s' in recipe database", dish_name)
     return None
 
 
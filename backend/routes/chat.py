@@ -1,10 +1,12 @@
 """
 Chat endpoint for restaurant recommendations.
 """
+import logging
 from fastapi import HTTPException
-from typing import Dict, Any, Optional, Tuple
+from dataclasses import dataclass
+from typing import Dict, Any, List, Optional, Tuple, AsyncIterator
+import asyncio
 import json
-import re
 import csv
 import os
 
@@ -15,13 +17,26 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from fastapi import Depends
 from middleware.auth import get_current_user_id
+from middleware.timing import span, traced, get_request_timer
 from typing import Optional
 from integrations.embeddings import embed_text, combine_vectors, get_embedding_model
 from services.taste_service import user_profile_to_taste_vector, infer_taste_from_text_hybrid, taste_similarity
-from integrations.pinecone_client import get_pinecone_index, maybe_upsert_ingredients_to_pinecone
-from services.recommendation_service import filter_and_rank_recommendations
-from services.restaurant_service import get_groq_client, classify_dish_diet_with_groq
-from config import GROQ_API_KEY, USE_SEMANTIC_INGREDIENT_TASTE, USE_SEMANTIC_DISH_TASTE
+from integrations.pinecone_client import get_pinecone_index, query_pinecone_pages, query_pinecone_widening
+from services.recommendation_service import filter_and_rank_with_cuisine_fallback
+from services.response_cache import ResponseCache, get_response_cache, chat_cache_key
+from services.singleflight import chat_flights
+from services.llm_memo import recall, remember
+from services.keyword_matcher import KeywordMatcher
+from services.location_service import LocationFilter, location_text
+from services.search_filters import restaurant_query_filters
+from services.spatial_index import intersect_with_spatial
+from services.restaurant_service import (
+    parse_query,
+    extract_location_from_query,
+    is_greeting
+)
+from integrations.groq_client import achat_completion, achat_completion_stream
+from config import GROQ_API_KEY, USE_SEMANTIC_INGREDIENT_TASTE, USE_SEMANTIC_DISH_TASTE, USE_PINECONE_METADATA_FILTERS
 from recipe_database import (
     load_recipes_database,
     search_recipe_by_name,
@@ -32,17 +47,20 @@ from recipe_database import (
 # Agent system integration
 import sys
 import os
+
+logger = logging.getLogger(__name__)
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", ".."))
 try:
     from agents.orchestrator import process_query as orchestrator_process
     AGENTS_AVAILABLE = True
 except ImportError:
     AGENTS_AVAILABLE = False
-    print("⚠️ Agent system not available - using direct service calls")
+    logger.warning("⚠️ Agent system not available - using direct service calls")
 
 
 # Load all ingredients from CSV at startup (cached globally)
 _INGREDIENT_LIST = None
+_INGREDIENT_MATCHER = None
 
 def load_ingredients_from_csv() -> list[str]:
     """Load all ingredient names from ingredient-flavor.csv"""
@@ -63,197 +81,15 @@ def load_ingredients_from_csv() -> list[str]:
                     ingredients.append(ingredient)
         
         _INGREDIENT_LIST = ingredients
-        print(f"[INFO] Loaded {len(ingredients)} ingredients from CSV")
+        logger.info("Loaded %s ingredients from CSV", len(ingredients))
         return ingredients
     except Exception as e:
-        print(f"[ERROR] Failed to load ingredients from CSV: {e}")
+        logger.error("Failed to load ingredients from CSV: %s", e)
         # Fallback to basic list
         _INGREDIENT_LIST = ['chicken', 'paneer', 'ginger', 'garlic', 'tomato', 'onion']
         return _INGREDIENT_LIST
 
 
-def extract_location_from_query(query: str) -> Optional[str]:
-    """
-    Extract location from the query text.
-
-    Returns:
-        Location string if found, None otherwise
-    """
-    query_lower = query.lower()
-
-    # Location patterns
-    patterns = [
-        r'\bnear\s+(.+?)(?:\s*,|\s+also|\s+and|\s*$)',
-        r'\bin\s+(.+?)(?:\s*,|\s+also|\s+and|\s*$)',
-        r'\bat\s+(.+?)(?:\s*,|\s+also|\s+and|\s*$)',
-        r'\baround\s+(.+?)(?:\s*,|\s+also|\s+and|\s*$)',
-    ]
-
-    for pattern in patterns:
-        match = re.search(pattern, query_lower)
-        if match:
-            location = match.group(1).strip()
-            # Filter out common non-location words
-            non_locations = ["me", "here", "there", "my place", "home"]
-            if location not in non_locations and len(location) > 2:
-                return location
-
-    return None
-
-
-def extract_cuisine_from_query(query: str) -> Optional[str]:
-    """
-    Extract cuisine type from the query text.
-
-    Returns:
-        Cuisine string if found (e.g., 'Thai', 'Italian', 'Chinese'), None otherwise
-    """
-    query_lower = query.lower()
-
-    # Common cuisine types with their variations
-    cuisines = {
-        'thai': ['thai'],
-        'italian': ['italian', 'pizza', 'pasta'],
-        'chinese': ['chinese'],
-        'japanese': ['japanese', 'sushi', 'ramen'],
-        'indian': ['indian', 'curry'],
-        'mexican': ['mexican', 'taco', 'burrito'],
-        'korean': ['korean', 'kimchi', 'bibimbap'],
-        'vietnamese': ['vietnamese', 'pho'],
-        'american': ['american', 'burger'],
-        'french': ['french'],
-        'greek': ['greek'],
-        'mediterranean': ['mediterranean'],
-        'middle eastern': ['middle eastern', 'falafel', 'shawarma'],
-        'spanish': ['spanish', 'tapas', 'paella'],
-    }
-
-    # Pattern: look for cuisine keywords in query
-    # Examples: "Thai food", "Italian restaurant", "I want Chinese"
-    for cuisine_name, keywords in cuisines.items():
-        for keyword in keywords:
-            # Check if keyword appears as a whole word
-            pattern = r'\b' + re.escape(keyword) + r'\b'
-            if re.search(pattern, query_lower):
-                print(f"[DEBUG] Cuisine type detected in query: {cuisine_name}")
-                return cuisine_name
-
-    return None
-
-
-def extract_diet_from_query(query: str) -> Optional[str]:
-    """
-    Extract diet preference from the query text.
-
-    This function checks:
-    1. Explicit diet mentions (e.g., "I want veg food")
-    2. Dish-based diet detection (e.g., "I want chicken curry" -> non-veg)
-
-    Returns:
-        'veg', 'vegetarian', 'non-veg', or None if not specified
-    """
-    query_lower = query.lower()
-
-    # STEP 1: Check for explicit diet preference
-    # Vegetarian indicators
-    veg_patterns = [
-        r'\b(?:i am|i\'m|looking for|want|need|prefer)\s+(?:a\s+)?veg(?:etarian)?\s+(?:food|dish|meal|option)',
-        r'\bveg(?:etarian)?\s+(?:\w+\s+)?(?:food|dish|meal|option|restaurant|cuisine)',  # Allows "vegetarian Thai food"
-        r'\bonly\s+veg(?:etarian)?',
-        r'\bpure\s+veg(?:etarian)?',
-        r'\bvegetarian\s+only',
-        r'\bno\s+(?:meat|non-veg|nonveg)',
-        r'\bplant[-\s]?based',
-    ]
-
-    # Non-vegetarian indicators
-    nonveg_patterns = [
-        r'\b(?:i am|i\'m|looking for|want|need|prefer)\s+(?:a\s+)?non[-\s]?veg(?:etarian)?\s+(?:food|dish|meal|option)',
-        r'\bnon[-\s]?veg(?:etarian)?\s+(?:\w+\s+)?(?:food|dish|meal|option|restaurant|cuisine)',  # Allows "non-veg Thai food"
-        r'\b(?:meat|chicken|fish|seafood)\s+(?:lover|eater)',
-        r'\bonly\s+non[-\s]?veg',
-    ]
-
-    # Check for explicit vegetarian
-    for pattern in veg_patterns:
-        if re.search(pattern, query_lower):
-            print(f"[DEBUG] Explicit veg preference detected in query")
-            return "veg"
-
-    # Check for explicit non-vegetarian
-    for pattern in nonveg_patterns:
-        if re.search(pattern, query_lower):
-            print(f"[DEBUG] Explicit non-veg preference detected in query")
-            return "non-veg"
-
-    # STEP 2: Check for dish-based diet detection
-    # Extract potential dish names from query
-    dish_patterns = [
-        # Specific pattern for "to eat/have/try X" - must come first
-        r'(?:i want|i need)\s+to\s+(?:eat|have|try)\s+(?:some\s+)?(.+?)(?:\s+(?:near|in|at|and)|$)',
-        # "I want to X" (where X is dish, not "to eat") - captures the dish after "to"
-        r'(?:i want|i need)\s+to\s+(?!(?:eat|have|try)\s)(?:some\s+)?(.+?)(?:\s+(?:near|in|at|and)|$)',
-        # General patterns (exclude "to" prefix)
-        r'(?:i want|i need|looking for|get me|find|show me|give me)\s+(?!to\s)(?:some\s+)?(.+?)(?:\s+(?:near|in|at|and)|$)',
-        r'(?:where.*get|where.*find)\s+(.+?)(?:\s+(?:near|in|at|and)|$)',
-        r'(?:is there|do you have|any)\s+(.+?)(?:\s+(?:available|near|in|at)|$)',
-    ]
-
-    detected_dishes = []
-    for pattern in dish_patterns:
-        matches = re.findall(pattern, query_lower)
-        for match in matches:
-            # Clean up the match
-            dish = match.strip()
-            # Remove common words
-            dish = re.sub(r'\b(a|an|the|some|any|place|restaurant|where|that|has)\b', '', dish).strip()
-            
-            # Filter out generic/preference-only terms (same as is_dish_query)
-            if dish and len(dish) > 2:
-                # Check if it's just preferences/generic terms
-                generic_terms = ["food", "something", "anything", "restaurant", "place", "restaurants", "places"]
-                preference_words = ["spicy", "savory", "sweet", "sour", "salty", "bitter", "hot", "mild", 
-                                   "delicious", "tasty", "good", "fresh", "healthy", "light", "heavy"]
-                
-                words = dish.split()
-                meaningful_words = [w for w in words if w not in (generic_terms + preference_words + ["and", "or"])]
-                
-                # Only add if there are meaningful dish words
-                if len(meaningful_words) > 0 and dish not in generic_terms:
-                    detected_dishes.append(dish)
-
-    # Classify detected dishes
-    if detected_dishes:
-        print(f"[DEBUG] Detected potential dishes in query: {detected_dishes}")
-
-        veg_count = 0
-        nonveg_count = 0
-
-        for dish in detected_dishes:
-            classification = classify_dish_diet_with_groq(dish)
-            if classification == "veg":
-                veg_count += 1
-            else:
-                nonveg_count += 1
-
-        # If all dishes are veg, return veg
-        if veg_count > 0 and nonveg_count == 0:
-            print(f"[DEBUG] All detected dishes are vegetarian -> diet: veg")
-            return "veg"
-
-        # If all dishes are non-veg, return non-veg
-        if nonveg_count > 0 and veg_count == 0:
-            print(f"[DEBUG] All detected dishes are non-vegetarian -> diet: non-veg")
-            return "non-veg"
-
-        # If mixed, return None (use user profile default)
-        if veg_count > 0 and nonveg_count > 0:
-            print(f"[DEBUG] Mixed veg/non-veg dishes detected -> using user profile default")
-            return None
-
-    return None
-
-
 def search_dish_in_db(dish_name: str) -> Optional[Dict[str, Any]]:
     """
     Search for a dish using hybrid approach:
@@ -289,7 +125,7 @@ def search_dish_in_db(dish_name: str) -> Optional[Dict[str, Any]]:
 
             if score > 0.8:
                 metadata = best_match.get("metadata") if isinstance(best_match, dict) else getattr(best_match, "metadata", {})
-                print(f"[DEBUG] Found dish '{dish_name}' in Pinecone with score {score}")
+                logger.debug("Found dish '%s' in Pinecone with score %s", dish_name, score)
                 return {
                     "found": True,
                     "source": "pinecone",
@@ -307,7 +143,7 @@ def search_dish_in_db(dish_name: str) -> Optional[Dict[str, Any]]:
                 }
 
     except Exception as e:
-        print(f"[ERROR] Failed to search dish in Pinecone: {e}")
+        logger.error("Failed to search dish in Pinecone: %s", e)
 
     # STEP 2: Search in recipe CSV database (231K recipes)
     try:
@@ -315,7 +151,7 @@ def search_dish_in_db(dish_name: str) -> Optional[Dict[str, Any]]:
 
         if recipe and has_valid_taste_profile(recipe):
             taste_vector = get_taste_vector_from_recipe(recipe)
-            print(f"[DEBUG] Found dish '{dish_name}' in recipe database: '{recipe['original_name']}'")
+            logger.debug("Found dish '%s' in recipe database: '%s'", dish_name, recipe['original_name'])
             return {
                 "found": True,
                 "source": "csv",
@@ -329,26 +165,32 @@ def search_dish_in_db(dish_name: str) -> Optional[Dict[str, Any]]:
                 }
             }
         elif recipe and not has_valid_taste_profile(recipe):
-            print(f"[DEBUG] Found dish '{dish_name}' in CSV but has zero taste vector, will use Groq")
+            logger.debug("Found dish '%s' in CSV but has zero taste vector, will use Groq", dish_name)
             return None
 
     except Exception as e:
-        print(f"[ERROR] Failed to search dish in recipe database: {e}")
+        logger.error("Failed to search dish in recipe database: %s", e)
 
-    print(f"[DEBUG] Dish '{dish_name}' not found in any database")
+    logger.debug("Dish '%s' not found in any database", dish_name)
     return None
 
 
-def get_ingredients_from_groq(dish_name: str) -> Optional[Dict[str, Any]]:
+# Bump after editing the prompt below so stale memoized answers are ignored
+DISH_INGREDIENTS_PROMPT_VERSION = "v1"
+
+
+async def get_ingredients_from_groq(dish_name: str) -> Optional[Dict[str, Any]]:
     """
     Get ingredients and taste profile for a dish using Groq API.
 
     Returns:
         Dict with ingredients and taste vector, or None if failed
     """
-    try:
-        groq_client = get_groq_client()
+    memoized = await asyncio.to_thread(recall, "dish_ingredients", DISH_INGREDIENTS_PROMPT_VERSION, dish_name)
+    if memoized is not None:
+        return memoized
 
+    try:
         prompt = f"""Analyze the dish "{dish_name}" and provide:
 1. Main ingredients (comma-separated list)
 2. Taste profile on a scale of 0-1 for each: sweet, salty, sour, bitter, umami, spicy
@@ -369,14 +211,7 @@ Respond in this exact JSON format:
 
 Only respond with valid JSON, nothing else."""
 
-        completion = groq_client.chat.completions.create(
-            messages=[{"role": "user", "content": prompt}],
-            model="llama-3.3-70b-versatile",
-            temperature=0.3,
-            max_tokens=500
-        )
-
-        response_text = completion.choices[0].message.content.strip()
+        response_text = await achat_completion(prompt, temperature=0.3, max_tokens=500)
 
         # Try to parse JSON
         # Remove markdown code blocks if present
@@ -387,12 +222,13 @@ Only respond with valid JSON, nothing else."""
 
         dish_info = json.loads(response_text)
 
-        print(f"[DEBUG] Got ingredients from Groq for '{dish_name}': {dish_info.get('ingredients', [])}")
+        logger.debug("Got ingredients from Groq for '%s': %s", dish_name, dish_info.get('ingredients', []))
 
+        await asyncio.to_thread(remember, "dish_ingredients", DISH_INGREDIENTS_PROMPT_VERSION, dish_name, dish_info)
         return dish_info
 
     except Exception as e:
-        print(f"[ERROR] Failed to get ingredients from Groq: {e}")
+        logger.error("Failed to get ingredients from Groq: %s", e)
         return None
 
 
@@ -473,291 +309,287 @@ def save_dish_to_db(dish_name: str, dish_info: Dict[str, Any]) -> bool:
         # Upsert to Pinecone
         pc_index.upsert(vectors=vectors, namespace="ingredients")
 
-        print(f"[DEBUG] Saved dish '{dish_name}' and {len(ingredients)} ingredients to DB")
+        logger.debug("Saved dish '%s' and %s ingredients to DB", dish_name, len(ingredients))
         return True
 
     except Exception as e:
-        print(f"[ERROR] Failed to save dish to DB: {e}")
+        logger.error("Failed to save dish to DB: %s", e)
         return False
 
 
-def is_greeting(query: str) -> bool:
-    """
-    Check if the query is a greeting.
+def ingredient_matcher() -> KeywordMatcher:
+    """Compiled matcher over the CSV ingredients (built once, after the CSV loads)."""
+    global _INGREDIENT_MATCHER
+    if _INGREDIENT_MATCHER is None:
+        # Longest first, e.g. "soy sauce" before "soy"
+        _INGREDIENT_MATCHER = KeywordMatcher(sorted(load_ingredients_from_csv(), key=len, reverse=True))
+    return _INGREDIENT_MATCHER
 
+
+def extract_ingredients_from_query(query: str) -> list[str]:
+    """
+    Extract ingredient names mentioned in the query.
+    Uses the comprehensive ingredient list from ingredient-flavor.csv (622 ingredients).
+    
     Returns:
-        True if query is a greeting, False otherwise
+        List of ingredient names found in query
+    """
+    # Whole words only, e.g. "ham" shouldn't match "graham"
+    return ingredient_matcher().find_all(query, whole_words=True)
+
+
+def search_restaurants_namespace(
+    text: str,
+    top_k: int,
+    vector: Optional[List[float]] = None,
+    filters: Optional[List[Dict[str, Any]]] = None,
+    min_results: int = 1,
+    unfiltered_top_k: Optional[int] = None,
+) -> list:
     """
-    query_lower = query.lower().strip()
-    greetings = [
-        "hi", "hello", "hey", "hola", "greetings", "good morning",
-        "good afternoon", "good evening", "howdy", "what's up",
-        "whats up", "sup", "yo", "hiya", "heya"
-    ]
+    Embed text and query the Pinecone restaurants namespace (blocking).
 
-    # Check if query is exactly a greeting or starts with greeting
-    for greeting in greetings:
-        if query_lower == greeting or query_lower.startswith(greeting + " "):
-            return True
+    Pass vector when the text was already embedded (e.g. by the intent router).
+    With filters (see services/search_filters.py), they are tried strictest
+    first until one returns min_results, then an unfiltered query of
+    unfiltered_top_k.
+    """
+    if vector is None:
+        with span("embed"):
+            vector = embed_text(text)
+    if filters:
+        with span("pinecone"):
+            return query_pinecone_widening(
+                vector, filters, top_k, min_results, unfiltered_top_k=unfiltered_top_k, namespace="restaurants"
+            )
+    pc_index = get_pinecone_index()
+    with span("pinecone"):
+        result = pc_index.query(vector=vector, top_k=top_k, include_metadata=True, namespace="restaurants")
+    return result.get("matches", []) if isinstance(result, dict) else getattr(result, "matches", [])
+
+
+def more_restaurant_pages(
+    text: str,
+    top_k: int,
+    vector: Optional[List[float]] = None,
+    filters: Optional[List[Dict[str, Any]]] = None,
+    matches: Optional[list] = None,
+):
+    """
+    Next pages of a search_restaurants_namespace query, for the ranker to pull
+    when too many matches are filtered out.
 
-    return False
+    Lazy and blocking: nothing is queried until the first page is requested.
+    Pages stay within the widest of the filters and skip matches already seen.
+    """
+    if vector is None:
+        vector = embed_text(text)
+    seen_ids = [m.get("id") if isinstance(m, dict) else getattr(m, "id", None) for m in matches or []]
+    yield from query_pinecone_pages(vector, top_k, filters[-1] if filters else None, "restaurants", seen_ids)
 
 
-def normalize_dish_name_with_groq(dish_name: str) -> str:
+def filter_dish_restaurants_by_location(restaurants_with_dish: list, location_filter: str) -> list:
     """
-    Use Groq to normalize/correct misspelled or partial dish names.
-    
-    Args:
-        dish_name: Raw dish name extracted from query (may be misspelled)
-        
-    Returns:
-        Normalized dish name or original if Groq fails
+    Keep only restaurants (from a dish search) that match the location filter.
+
+    Offline (gazetteer + coordinates); the query location is resolved once.
     """
-    try:
-        groq_client = get_groq_client()
-        
-        prompt = f"""You are a food name correction assistant. Given a potentially misspelled or partial dish name, return the correct, most likely full dish name.
+    location_matcher = LocationFilter(location_filter)
+    filtered_restaurants = []
+    for rest in restaurants_with_dish:
+        meta = rest["metadata"]
+        try:
+            loc_json = meta.get("location_json", "{}")
+            location = json.loads(loc_json) if isinstance(loc_json, str) else loc_json
+            loc_str = location_text(location)
+            coordinates = meta.get("coordinates") or meta.get("coordinates_json")
+
+            if location_matcher.matches(loc_str, coordinates):
+                logger.debug("Location match: %s in %s", rest['name'], loc_str)
+                filtered_restaurants.append(rest)
+            else:
+                logger.debug("Filtered out %s - wrong location: %s", rest['name'], loc_str)
+        except Exception as e:
+            logger.debug("Error checking location for %s: %s", rest['name'], e)
+            continue
 
-Examples:
-- "pizz" -> "pizza"
-- "burgr" -> "burger"  
-- "pasta alfrd" -> "pasta alfredo"
-- "panr tikka" -> "paneer tikka"
-- "biryani" -> "biryani" (already correct)
+    logger.debug("After location filter: %s restaurants", len(filtered_restaurants))
+    return filtered_restaurants
 
-Dish name: "{dish_name}"
 
-Respond with ONLY the corrected dish name, nothing else. If the name seems correct, return it as is."""
+@traced("rank")
+def rank_dish_restaurants(
+    restaurants_with_dish: list,
+    dish_query: str,
+    user_taste_vec: list,
+    diet_type: Optional[str],
+    allergies: list
+) -> list:
+    """
+    Build recommendations for restaurants that serve the requested dish.
 
-        response = groq_client.chat.completions.create(
-            model="llama-3.3-70b-versatile",
-            messages=[{"role": "user", "content": prompt}],
-            temperature=0.1,
-            max_tokens=50
+    Blocking (dish filtering may call Groq), so run it in a worker thread.
+    """
+    from services.recommendation_service import dish_recommendations_for_restaurant
+    from services.allergens import allergy_safety, dish_masks_from_metadata
+    stored_masks = [dish_masks_from_metadata(rest["metadata"]) for rest in restaurants_with_dish[:10]]
+    if allergies:
+        # Screen unannotated dishes of all ten menus in one batched pass
+        unannotated = {}
+        for rest, stored in zip(restaurants_with_dish[:10], stored_masks):
+            for item in rest["metadata"].get("menu_items", []):
+                name = item.get("name") if isinstance(item, dict) else item
+                if stored.get(name) is None:
+                    unannotated[name] = None
+        if unannotated:
+            allergy_safety(unannotated, allergies)
+    ranked_restaurants = []
+    for rest, stored in zip(restaurants_with_dish[:10], stored_masks):  # Limit to top 10
+        # Get the matched dish
+        matched_dish = rest.get("dish", dish_query)
+
+        # Get all recommended dishes (including the matched one)
+        menu_items = rest["metadata"].get("menu_items", [])
+        all_dishes = dish_recommendations_for_restaurant(
+            menu_items=menu_items,
+            user_taste_vec=user_taste_vec,
+            diet_type=diet_type,
+            allergies=allergies,
+            top_n=10,  # Get more to ensure we have the matched dish
+            allergen_masks=stored,
         )
-        
-        corrected_name = response.choices[0].message.content.strip().lower()
-        
-        # Clean up the response (remove quotes, extra spaces)
-        corrected_name = corrected_name.strip('"\'').strip()
-        
-        if corrected_name and corrected_name != dish_name.lower():
-            print(f"[DEBUG] Groq corrected '{dish_name}' -> '{corrected_name}'")
-            return corrected_name
-        
-        return dish_name
-        
-    except Exception as e:
-        print(f"[ERROR] Groq normalization failed: {e}")
-        return dish_name
 
+        # Find the matched dish in the recommendations (it will have proper similarity)
+        recommended_dishes = []
+        matched_dish_obj = None
 
-def is_dish_query(query: str) -> Optional[str]:
-    """
-    Check if the query is asking for a specific dish (not at a specific restaurant).
-
-    Handles both single and multiple dishes (e.g., "paratha and paneer curry").
+        for dish in all_dishes:
+            dish_name = dish.get("name") if isinstance(dish, dict) else dish
+            if dish_name.lower() == matched_dish.lower():
+                matched_dish_obj = dish
+                break
 
-    Returns:
-        Dish name(s) if detected (comma-separated if multiple), None otherwise
-    """
-    query_lower = query.lower().strip()
-
-    # Patterns for dish queries - more specific patterns
-    patterns = [
-        # "is there a place where X is available"
-        r"is\s+there\s+(?:a\s+)?(?:place|restaurant)\s+(?:where|that\s+has)\s+(.+?)\s+(?:is\s+)?available",
-        # "where can I find X" or "where can I get X" or "where i can get X"
-        r"where\s+(?:can\s+)?i\s+(?:can\s+)?(?:find|get)\s+(.+?)(?:\s+near|\s+in|\s+at|\s*$)",
-        # "do you have X" or "is there X"
-        r"^(?:do\s+you\s+have|is\s+there)\s+(?:any\s+)?(.+?)(?:\s+available|\s+near|\s+in|\s+at|\s*$)",
-        # "I want to eat/have/try X" - specific pattern to skip "to eat/have/try"
-        r"^(?:i\s+want|i'd\s+like|i\s+need)\s+to\s+(?:eat|have|try)\s+(?:some\s+)?(.+?)(?:\s+near|\s+in|\s+at|\s*$)",
-        # "I want to X" (where X is dish, not "to eat") - captures the dish after "to"
-        r"^(?:i\s+want|i'd\s+like|i\s+need)\s+to\s+(?!(?:eat|have|try)\s)(?:some\s+)?(.+?)(?:\s+near|\s+in|\s+at|\s*$)",
-        # "I want X" or "show me X" (no "to" involved)
-        r"^(?:i\s+want|i'd\s+like|i\s+need|give\s+me|show\s+me|find|get\s+me|looking\s+for)\s+(?!to\s)(?:some\s+)?(.+?)(?:\s+near|\s+in|\s+at|\s*$)",
-        # "can I get X"
-        r"^can\s+i\s+get\s+(.+?)(?:\s+near|\s+in|\s+at|\s*$)",
-    ]
-
-    # Don't treat greetings or very short queries as dish queries
-    if len(query_lower.split()) <= 1:
-        return None
+        # Put matched dish first (with its calculated similarity)
+        if matched_dish_obj:
+            recommended_dishes.append(matched_dish_obj)
+        else:
+            # Calculate similarity for matched dish if not in recommendations
+            dish_taste_vec = infer_taste_from_text_hybrid(matched_dish, semantic=USE_SEMANTIC_DISH_TASTE)
+            similarity = taste_similarity(user_taste_vec, dish_taste_vec)
+            recommended_dishes.append({
+                "name": matched_dish, 
+                "similarity": round(similarity * 100, 1)
+            })
+
+        # Add other dishes
+        for dish in all_dishes:
+            dish_name = dish.get("name") if isinstance(dish, dict) else dish
+            if dish_name.lower() != matched_dish.lower():
+                recommended_dishes.append(dish)
+                if len(recommended_dishes) >= 5:  # Limit to 5 total
+                    break
 
-    for pattern in patterns:
-        match = re.search(pattern, query_lower)
-        if match:
-            dish_name = match.group(1).strip()
-            # Clean up the dish name
-            dish_name = re.sub(r'\s+(?:near|in|at|from)\s+.*$', '', dish_name).strip()
-            # Remove articles and common words
-            dish_name = re.sub(r'^(?:a|an|the|some)\s+', '', dish_name).strip()
-            
-            # Filter out generic/vague terms that aren't dish names
-            generic_terms = ["food", "something", "anything", "restaurant", "place", "restaurants", "places"]
-            
-            # Filter out preference descriptors (not actual dish names)
-            preference_words = ["spicy", "savory", "sweet", "sour", "salty", "bitter", "hot", "mild", 
-                               "delicious", "tasty", "good", "fresh", "healthy", "light", "heavy"]
-            
-            # Check if dish_name contains only generic terms and preferences
-            words = dish_name.split()
-            meaningful_words = [w for w in words if w not in (generic_terms + preference_words + ["and", "or"])]
-            
-            # If no meaningful dish name words remain, it's not a dish query
-            if len(meaningful_words) == 0:
-                return None  # It's just preferences/generic terms, not a dish name
-            
-            # Also reject if the whole phrase is a generic term
-            if dish_name in generic_terms:
-                return None
-            
-            if len(dish_name) > 2:
-                return dish_name
+        ranked_restaurants.append({
+            "name": rest["name"],
+            "rating": rest["rating"],
+            "price_range": rest["price_range"],
+            "cuisine_types": rest["cuisine_types"],
+            "recommended_dishes": recommended_dishes
+        })
 
-    return None
+    return ranked_restaurants
 
 
-def extract_ingredients_from_query(query: str) -> list[str]:
+@traced("taste_vector")
+def compute_user_taste_vector(dummy_profile, favorite_dishes) -> list[float]:
     """
-    Extract ingredient names mentioned in the query.
-    Uses the comprehensive ingredient list from ingredient-flavor.csv (622 ingredients).
-    
-    Returns:
-        List of ingredient names found in query
+    Compute the user's taste vector from profile favorites.
+
+    Blocking (may query Pinecone), so callers on the event loop should run it
+    in a worker thread.
     """
-    query_lower = query.lower()
-    
-    # Load all ingredients from CSV (cached after first call)
-    all_ingredients = load_ingredients_from_csv()
-    
-    found_ingredients = []
-    
-    # Check for each ingredient in the query
-    # Sort by length (descending) to match longer phrases first
-    # e.g., "soy sauce" before "soy"
-    sorted_ingredients = sorted(all_ingredients, key=len, reverse=True)
+    user_taste_vec = user_profile_to_taste_vector(dummy_profile) if dummy_profile else [0.0] * 6
+    logger.debug("Initial user_taste_vec from profile: %s", [round(x, 2) for x in user_taste_vec])
     
-    for ingredient in sorted_ingredients:
-        # Use word boundaries to avoid partial matches
-        # e.g., "ham" shouldn't match "graham"
-        pattern = r'\b' + re.escape(ingredient) + r'\b'
-        if re.search(pattern, query_lower):
-            found_ingredients.append(ingredient)
+    fav_text = ""
+    if favorite_dishes:
+        try:
+            fav_text = " ".join([
+                (d.name if hasattr(d, "name") else (d.get("name") if isinstance(d, dict) else str(d)))
+                for d in favorite_dishes
+            ])
+        except Exception:
+            fav_text = ""
     
-    return found_ingredients
-
+    logger.debug("Favorite dishes text for taste inference: '%s'", fav_text)
+    inferred_user = infer_taste_from_text_hybrid(fav_text, semantic=USE_SEMANTIC_INGREDIENT_TASTE)
+    logger.debug("Inferred taste vector: %s", [round(x, 2) for x in inferred_user])
+    user_taste_vec = combine_vectors(user_taste_vec, inferred_user, secondary_weight=0.35)
+    logger.debug("Final combined user_taste_vec: %s", [round(x, 2) for x in user_taste_vec])
+    return user_taste_vec
 
-def is_restaurant_menu_query(query: str) -> Optional[str]:
-    """
-    Check if the query is asking for a specific restaurant's menu.
 
-    Returns:
-        Restaurant name if detected, None otherwise
-    """
-    query_lower = query.lower().strip()
-
-    # Patterns for restaurant menu queries
-    patterns = [
-        r"(?:what'?s|show|tell me|get)\s+(?:the\s+)?menu\s+(?:for|of|at)\s+(.+?)(?:\s+restaurant)?$",
-        r"menu\s+(?:for|of|at)\s+(.+?)(?:\s+restaurant)?$",
-        r"(?:show|tell)\s+me\s+(.+?)(?:'s|\s+)menu",
-        r"what\s+does\s+(.+?)\s+(?:have|serve|offer)",
-        r"what\s+can\s+i\s+(?:get|order)\s+(?:at|from)\s+(.+?)$",
-    ]
-
-    for pattern in patterns:
-        match = re.search(pattern, query_lower)
-        if match:
-            restaurant_name = match.group(1).strip()
-            # Clean up common words
-            restaurant_name = re.sub(r'\s+restaurant$', '', restaurant_name).strip()
-            if len(restaurant_name) > 2:
-                return restaurant_name
+@traced("agent")
+def run_agent_fallback(query: str) -> str:
+    """Answer via the agent orchestrator (live Yelp search); blocking."""
+    return orchestrator_process(query)
 
-    return None
 
+@dataclass
+class ChatContext:
+    """Per-request user state resolved before the pipeline runs (and before the cache lookup)."""
+    user_key: str
+    dummy_user: Dict[str, Any]
+    dummy_profile: Any
+    allergies: List[str]
+    favorite_dishes: List[Dict[str, Any]]
+    diet_type: str
+    query_location: Optional[str]
+    is_first_turn: bool
+    fallback_location: Optional[str]
+    final_max_results: int
+    user_taste_vec: List[float]
 
-def parse_specific_query(query: str) -> Optional[Tuple[str, str]]:
-    """
-    Parse query to detect if user is asking about a specific dish at a specific restaurant.
 
-    Returns:
-        Tuple of (dish_name, restaurant_name) if specific query detected, None otherwise
+async def _prepare_chat_context(request: ChatRequest) -> ChatContext:
     """
-    query_lower = query.lower()
-
-    # Pattern: "dish ... where restaurant is X" or "dish ... at/from X"
-    pattern1 = r"(.+?)\s+where\s+restaurant\s+is\s+(.+?)$"
-    match = re.search(pattern1, query_lower)
-    if match:
-        dish = match.group(1).strip()
-        restaurant = match.group(2).strip()
-        # Clean up common prefixes
-        dish = re.sub(r"^(?:i want|i'd like|give me|show me|find)\s+", "", dish).strip()
-        dish = re.sub(r"\s+like\s+", " ", dish).strip()  # Remove "like"
-        return (dish, restaurant)
-
-    return None
-
+    Load the user profile, resolve location and compute the taste vector.
 
-async def chat_endpoint(request: ChatRequest) -> Dict[str, Any]:
-    """
-    Main chat endpoint for restaurant recommendations.
-    
-    Flow:
-    1. First: Query Pinecone (pre-populated restaurants) → Return if results found
-    2. Fallback: If no results from Pinecone → Use Agents → Yelp API (live) → Return results
-    
-    This ensures we use pre-populated data first (faster, cheaper) and only use live Yelp API
-    when needed (hackathon requirement: Yelp as primary source when Pinecone has no results).
+    May rewrite request.query/request.location (pending-query handling), so it
+    runs before the response cache key is computed.
     """
     # Setup: Direct service calls (required for Pinecone search)
     if not GROQ_API_KEY:
         raise HTTPException(status_code=500, detail="Missing GROQ_API_KEY")
 
-    groq_client = get_groq_client()
-    
-    # Ensure ingredients are loaded into Pinecone
-    maybe_upsert_ingredients_to_pinecone()
-
     # Sync user metadata from request
-    sync_dummy_user_from_request(request)
-    user_key = (request.user_key or "default").strip() or "default"
-    dummy_user = get_dummy_user(user_key)
-    dummy_profile = dummy_user_to_user_profile(dummy_user)
+    with span("profile"):
+        sync_dummy_user_from_request(request)
+        user_key = (request.user_key or "default").strip() or "default"
+        dummy_user = get_dummy_user(user_key)
+        dummy_profile = dummy_user_to_user_profile(dummy_user)
 
     # Extract user preferences
     allergies = (dummy_user.get("allergies") or []) if isinstance(dummy_user, dict) else []
     favorite_dishes = (dummy_user.get("favorite_dishes") or []) if isinstance(dummy_user, dict) else []
     diet_type = (dummy_user.get("diet_type") if isinstance(dummy_user, dict) else None) or "mix"
 
-    print(f"[DEBUG] Using dummy user: {user_key}")
-    print(f"[DEBUG] Allergies: {allergies}")
-    print(f"[DEBUG] Favorite dishes: {favorite_dishes}")
-    print(f"[DEBUG] Diet type: {diet_type}")
+    logger.debug("Using dummy user: %s", user_key)
+    logger.debug("Allergies: %s", allergies)
+    logger.debug("Favorite dishes: %s", favorite_dishes)
+    logger.debug("Diet type: %s", diet_type)
 
     if dummy_profile:
         allergies = dummy_profile.allergies or allergies
         favorite_dishes = [d.model_dump() for d in (dummy_profile.favorite_dishes or [])] or favorite_dishes
         diet_type = dummy_profile.diet_type or diet_type
 
-    # Extract diet preference from query (overrides user profile)
-    query_diet = extract_diet_from_query(request.query)
-    if query_diet:
-        diet_type = query_diet
-        print(f"[DEBUG] Diet type overridden from query: {diet_type}")
-
-    # Extract cuisine type from query
-    query_cuisine = extract_cuisine_from_query(request.query)
-
     # Extract location from query (PRIORITY: query location overrides everything)
     query_location = extract_location_from_query(request.query)
     if query_location:
         # Query location takes highest priority
         request.location = query_location
-        print(f"[DEBUG] Location extracted from query (PRIORITY): {query_location}")
+        logger.debug("Location extracted from query (PRIORITY): %s", query_location)
         
         # If location is generic (downtown, nearby, etc.) and user has home city, contextualize it
         generic_locations = ["downtown", "nearby", "near me", "around here", "local", "in the area"]
@@ -766,30 +598,10 @@ async def chat_endpoint(request: ChatRequest) -> Dict[str, Any]:
             if user_db_location:
                 # Append user's city to make it specific
                 request.location = f"{query_location}, {user_db_location}"
-                print(f"[DEBUG] Contextualized generic location '{query_location}' with user city: {request.location}")
+                logger.debug("Contextualized generic location '%s' with user city: %s", query_location, request.location)
     elif not query_location and not request.location:
         # No location in query or request, will use fallback later
-        print(f"[DEBUG] No location in query, will use fallback location")
-
-    # Calculate user taste vector
-    user_taste_vec = user_profile_to_taste_vector(dummy_profile) if dummy_profile else [0.0] * 6
-    print(f"[DEBUG] Initial user_taste_vec from profile: {[round(x, 2) for x in user_taste_vec]}")
-    
-    fav_text = ""
-    if favorite_dishes:
-        try:
-            fav_text = " ".join([
-                (d.name if hasattr(d, "name") else (d.get("name") if isinstance(d, dict) else str(d)))
-                for d in favorite_dishes
-            ])
-        except Exception:
-            fav_text = ""
-    
-    print(f"[DEBUG] Favorite dishes text for taste inference: '{fav_text}'")
-    inferred_user = infer_taste_from_text_hybrid(fav_text, semantic=USE_SEMANTIC_INGREDIENT_TASTE)
-    print(f"[DEBUG] Inferred taste vector: {[round(x, 2) for x in inferred_user]}")
-    user_taste_vec = combine_vectors(user_taste_vec, inferred_user, secondary_weight=0.35)
-    print(f"[DEBUG] Final combined user_taste_vec: {[round(x, 2) for x in user_taste_vec]}")
+        logger.debug("No location in query, will use fallback location")
 
     # Handle location and pending queries
     is_first_turn = not request.chat_id
@@ -805,14 +617,57 @@ async def chat_endpoint(request: ChatRequest) -> Dict[str, Any]:
     if not fallback_location and user_db_location:
         fallback_location = user_db_location
     
-    print(f"[DEBUG] user_key: {user_key}")
-    print(f"[DEBUG] user_db_location: {user_db_location}")
-    print(f"[DEBUG] request.location: {request.location}")
-    print(f"[DEBUG] fallback_location: {fallback_location}")
+    logger.debug("user_key: %s", user_key)
+    logger.debug("user_db_location: %s", user_db_location)
+    logger.debug("request.location: %s", request.location)
+    logger.debug("fallback_location: %s", fallback_location)
 
     # Set max results
     final_max_results = request.max_results or 10
-    print(f"[DEBUG] max_results set to: {final_max_results}")
+    logger.debug("max_results set to: %s", final_max_results)
+
+    user_taste_vec = await asyncio.to_thread(compute_user_taste_vector, dummy_profile, favorite_dishes)
+
+    return ChatContext(
+        user_key=user_key,
+        dummy_user=dummy_user,
+        dummy_profile=dummy_profile,
+        allergies=allergies,
+        favorite_dishes=favorite_dishes,
+        diet_type=diet_type,
+        query_location=query_location,
+        is_first_turn=is_first_turn,
+        fallback_location=fallback_location,
+        final_max_results=final_max_results,
+        user_taste_vec=user_taste_vec,
+    )
+
+
+async def _run_chat_pipeline(request: ChatRequest, ctx: ChatContext) -> Tuple[Dict[str, Any], Optional[str]]:
+    """
+    Retrieval and ranking for a chat turn, up to (but not including) the text rewrite.
+
+    Flow:
+    1. First: Query Pinecone (pre-populated restaurants) → Return if results found
+    2. Fallback: If no results from Pinecone → Use Agents → Yelp API (live) → Return results
+
+    This ensures we use pre-populated data first (faster, cheaper) and only use live Yelp API
+    when needed (hackathon requirement: Yelp as primary source when Pinecone has no results).
+
+    Returns:
+        (ai_json, rewrite_prompt). rewrite_prompt is None when the response text
+        is already final; otherwise the caller runs it through Groq to produce
+        the response text (in one shot or streamed).
+    """
+    dummy_user = ctx.dummy_user
+    allergies = ctx.allergies
+    favorite_dishes = ctx.favorite_dishes
+    diet_type = ctx.diet_type
+    query_location = ctx.query_location
+    is_first_turn = ctx.is_first_turn
+    fallback_location = ctx.fallback_location
+    final_max_results = ctx.final_max_results
+    user_taste_vec = ctx.user_taste_vec
 
     # Initialize flags
     dish_not_found = False
@@ -820,7 +675,7 @@ async def chat_endpoint(request: ChatRequest) -> Dict[str, Any]:
 
     # Check if this is a greeting
     if is_greeting(request.query):
-        print(f"[DEBUG] Greeting detected")
+        logger.debug("Greeting detected")
         greeting_responses = [
             "Hello! 👋 I'm Swaad, your AI food companion. I can help you discover amazing restaurants and dishes based on your taste preferences. What are you craving today?",
             "Hey there! 🍽️ Welcome to Swaad! Tell me what kind of food you're in the mood for, and I'll find the perfect restaurants for you.",
@@ -833,12 +688,35 @@ async def chat_endpoint(request: ChatRequest) -> Dict[str, Any]:
             },
             "chat_id": request.chat_id,
             "menu_buddy": {"recommendations": []}
-        }
+        }, None
+
+    # Query understanding (regex fast paths + at most one LLM call)
+    parsed_query = await parse_query(request.query)
+    logger.debug("Parsed query: %s", parsed_query.model_dump())
+
+    query_cuisine = parsed_query.cuisine
+    query_is_relevant = parsed_query.relevant
+    # Routing fields are set by the regex detectors only, never by the LLM
+    restaurant_name_query = parsed_query.restaurant if not parsed_query.dish else None
+    dish_query = parsed_query.dish if not parsed_query.restaurant else None
+    specific_query = (parsed_query.dish, parsed_query.restaurant) if parsed_query.dish and parsed_query.restaurant else None
+    normalized_dish = parsed_query.normalized_dish or dish_query
+
+    # Location understood by the LLM when the regex found none
+    if not query_location and parsed_query.location:
+        query_location = parsed_query.location
+        request.location = query_location
+        fallback_location = query_location
+        logger.debug("Location extracted from query by LLM: %s", query_location)
+
+    # Diet preference from query overrides user profile
+    if parsed_query.diet:
+        diet_type = parsed_query.diet
+        logger.debug("Diet type overridden from query: %s", diet_type)
 
     # Check if query is relevant to food/restaurants
-    from services.restaurant_service import is_relevant_query
-    if not is_relevant_query(request.query):
-        print(f"[DEBUG] Non-food query detected: '{request.query}'")
+    if not query_is_relevant:
+        logger.debug("Non-food query detected: '%s'", request.query)
         out_of_scope_responses = [
             "I'm Swaad, your food and restaurant recommendation assistant! 🍽️ I specialize in helping you discover amazing dishes and restaurants. For questions about tourist attractions, hotels, or other travel info, you might want to check a travel guide. But if you're hungry and looking for great food recommendations, I'm here to help! What are you craving?",
             "I focus on food and restaurant recommendations! 😊 While I can't help with general travel or tourist spots, I'm excellent at finding delicious restaurants and dishes that match your taste. Want to explore some amazing food options instead?",
@@ -851,29 +729,14 @@ async def chat_endpoint(request: ChatRequest) -> Dict[str, Any]:
             },
             "chat_id": request.chat_id,
             "menu_buddy": {"recommendations": []}
-        }
+        }, None
 
     # Check if this is a restaurant menu query
-    restaurant_name_query = is_restaurant_menu_query(request.query)
     if restaurant_name_query:
-        print(f"[DEBUG] Restaurant menu query detected: '{restaurant_name_query}'")
+        logger.debug("Restaurant menu query detected: '%s'", restaurant_name_query)
 
-        # Search for the restaurant in Pinecone
-        pc_index = get_pinecone_index()
-        model = get_embedding_model()
-
-        # Create embedding for restaurant name
-        restaurant_embedding = model.encode(restaurant_name_query).tolist()
-
-        # Search in restaurants namespace
-        result = pc_index.query(
-            vector=restaurant_embedding,
-            top_k=5,
-            include_metadata=True,
-            namespace="restaurants"
-        )
-
-        matches = result.get("matches", []) if isinstance(result, dict) else getattr(result, "matches", [])
+        # Search for the restaurant in Pinecone (restaurants namespace)
+        matches = await asyncio.to_thread(search_restaurants_namespace, restaurant_name_query, 5)
 
         # Find the best matching restaurant
         best_match = None
@@ -916,13 +779,13 @@ async def chat_endpoint(request: ChatRequest) -> Dict[str, Any]:
                         "recommended_dishes": recommended_dishes
                     }]
                 }
-            }
+            }, None
         else:
             # Restaurant not found in Pinecone - fallback to Yelp API via agents
-            print(f"[DEBUG] Restaurant '{restaurant_name_query}' not found in Pinecone, falling back to Yelp API")
+            logger.debug("Restaurant '%s' not found in Pinecone, falling back to Yelp API", restaurant_name_query)
             if AGENTS_AVAILABLE:
                 try:
-                    agent_response = orchestrator_process(request.query)
+                    agent_response = await asyncio.to_thread(run_agent_fallback, request.query)
                     return {
                         "response": {
                             "text": agent_response
@@ -931,9 +794,9 @@ async def chat_endpoint(request: ChatRequest) -> Dict[str, Any]:
                         "menu_buddy": {
                             "recommendations": []
                         }
-                    }
+                    }, None
                 except Exception as e:
-                    print(f"⚠️ Agent system error: {e}, showing no results message")
+                    logger.warning("⚠️ Agent system error: %s, showing no results message", e)
             
             # If agents unavailable or failed
             return {
@@ -942,30 +805,28 @@ async def chat_endpoint(request: ChatRequest) -> Dict[str, Any]:
                 },
                 "chat_id": request.chat_id,
                 "menu_buddy": {"recommendations": []}
-            }
+            }, None
 
     # Check if this is a dish-specific query (not at a specific restaurant)
-    dish_query = is_dish_query(request.query)
-    if dish_query and "where restaurant is" not in request.query.lower():
-        # Normalize dish name with Groq (correct typos, partial names)
-        normalized_dish = normalize_dish_name_with_groq(dish_query)
-        print(f"[DEBUG] Dish-specific query detected: '{dish_query}'" + 
-              (f" -> normalized to '{normalized_dish}'" if normalized_dish != dish_query else ""))
+    if dish_query:
+        # Dish name was normalized with Groq above (correct typos, partial names)
+        logger.debug("Dish-specific query detected: '%s'%s", dish_query,
+                     f" -> normalized to '{normalized_dish}'" if normalized_dish != dish_query else "")
         
         # Use normalized name for search
         dish_query = normalized_dish
 
         # STEP 1: Search for dish in our database
-        dish_in_db = search_dish_in_db(dish_query)
+        dish_in_db = await asyncio.to_thread(search_dish_in_db, dish_query)
 
         # STEP 2: If not found, get ingredients from Groq and save to DB
         if not dish_in_db:
-            print(f"[DEBUG] Dish '{dish_query}' not in DB, calling Groq API...")
-            dish_info_from_groq = get_ingredients_from_groq(dish_query)
+            logger.debug("Dish '%s' not in DB, calling Groq API...", dish_query)
+            dish_info_from_groq = await get_ingredients_from_groq(dish_query)
 
             if dish_info_from_groq:
                 # Save to database
-                save_dish_to_db(dish_query, dish_info_from_groq)
+                await asyncio.to_thread(save_dish_to_db, dish_query, dish_info_from_groq)
 
                 # Create dish_in_db structure from Groq response
                 taste_profile = dish_info_from_groq.get("taste_profile", {})
@@ -989,19 +850,9 @@ async def chat_endpoint(request: ChatRequest) -> Dict[str, Any]:
 
         # STEP 3: Search for restaurants that have this dish
         try:
-            pc_index = get_pinecone_index()
-            # Use dish embedding to find restaurants with similar dishes
-            model = get_embedding_model()
-            dish_embedding = model.encode(dish_query).tolist()
-            
             # Search restaurants using dish embedding (semantic search)
-            all_restaurants = pc_index.query(
-                vector=dish_embedding,
-                top_k=500,  # Fetch more restaurants to ensure we find all with this dish
-                include_metadata=True,
-                namespace="restaurants"
-            )
-            matches = all_restaurants.get("matches", []) if isinstance(all_restaurants, dict) else getattr(all_restaurants, "matches", [])
+            # Fetch more restaurants to ensure we find all with this dish
+            matches = await asyncio.to_thread(search_restaurants_namespace, dish_query, 500)
 
             # Search for restaurants that have this dish
             restaurants_with_dish = []
@@ -1024,11 +875,11 @@ async def chat_endpoint(request: ChatRequest) -> Dict[str, Any]:
 
             if not restaurants_with_dish:
                 # Dish not found in restaurants - but we have dish info from DB/Groq
-                print(f"[DEBUG] Dish '{dish_query}' not found in any restaurant")
+                logger.debug("Dish '%s' not found in any restaurant", dish_query)
 
                 if dish_in_db:
                     # We have dish info, use it for taste-based recommendations
-                    print(f"[DEBUG] Using dish taste profile for recommendations")
+                    logger.debug("Using dish taste profile for recommendations")
                     dish_taste_vec = dish_in_db.get("taste_vector", [0.0] * 6)
                     # Combine user taste with dish taste
                     user_taste_vec = combine_vectors(user_taste_vec, dish_taste_vec, secondary_weight=0.6)
@@ -1038,95 +889,19 @@ async def chat_endpoint(request: ChatRequest) -> Dict[str, Any]:
                 dish_not_found_name = dish_query
             else:
                 # Dish found - return restaurants that have it
-                print(f"[DEBUG] Found '{dish_query}' at {len(restaurants_with_dish)} restaurants")
+                logger.debug("Found '%s' at %s restaurants", dish_query, len(restaurants_with_dish))
 
                 # Apply location filtering
-                from services.restaurant_service import check_location_match
                 if fallback_location:
-                    print(f"[DEBUG] Applying location filter to dish results: {fallback_location}")
-                    filtered_restaurants = []
-                    for rest in restaurants_with_dish:
-                        loc_json = rest["metadata"].get("location_json", "{}")
-                        try:
-                            import json
-                            location = json.loads(loc_json) if isinstance(loc_json, str) else loc_json
-                            loc_str = location
-                            if isinstance(location, dict):
-                                parts = []
-                                for key in ["address", "city", "state", "zip_code", "country"]:
-                                    if key in location and location[key]:
-                                        parts.append(str(location[key]))
-                                if parts:
-                                    loc_str = ", ".join(parts)
-                                else:
-                                    loc_str = ", ".join([str(v) for v in location.values() if isinstance(v, (str, int))])
-                            
-                            if check_location_match(fallback_location, str(loc_str)):
-                                print(f"[DEBUG] Location match: {rest['name']} in {loc_str}")
-                                filtered_restaurants.append(rest)
-                            else:
-                                print(f"[DEBUG] Filtered out {rest['name']} - wrong location: {loc_str}")
-                        except Exception as e:
-                            print(f"[DEBUG] Error checking location for {rest['name']}: {e}")
-                            continue
-                    
-                    restaurants_with_dish = filtered_restaurants
-                    print(f"[DEBUG] After location filter: {len(restaurants_with_dish)} restaurants")
-
-                # Rank by rating and taste similarity
-                from services.recommendation_service import dish_recommendations_for_restaurant
-                ranked_restaurants = []
-                for rest in restaurants_with_dish[:10]:  # Limit to top 10
-                    # Get the matched dish
-                    matched_dish = rest.get("dish", dish_query)
-
-                    # Get all recommended dishes (including the matched one)
-                    menu_items = rest["metadata"].get("menu_items", [])
-                    all_dishes = dish_recommendations_for_restaurant(
-                        menu_items=menu_items,
-                        user_taste_vec=user_taste_vec,
-                        diet_type=diet_type,
-                        allergies=allergies,
-                        top_n=10  # Get more to ensure we have the matched dish
+                    logger.debug("Applying location filter to dish results: %s", fallback_location)
+                    restaurants_with_dish = await asyncio.to_thread(
+                        filter_dish_restaurants_by_location, restaurants_with_dish, fallback_location
                     )
 
-                    # Find the matched dish in the recommendations (it will have proper similarity)
-                    recommended_dishes = []
-                    matched_dish_obj = None
-                    
-                    for dish in all_dishes:
-                        dish_name = dish.get("name") if isinstance(dish, dict) else dish
-                        if dish_name.lower() == matched_dish.lower():
-                            matched_dish_obj = dish
-                            break
-                    
-                    # Put matched dish first (with its calculated similarity)
-                    if matched_dish_obj:
-                        recommended_dishes.append(matched_dish_obj)
-                    else:
-                        # Calculate similarity for matched dish if not in recommendations
-                        dish_taste_vec = infer_taste_from_text_hybrid(matched_dish, semantic=USE_SEMANTIC_DISH_TASTE)
-                        similarity = taste_similarity(user_taste_vec, dish_taste_vec)
-                        recommended_dishes.append({
-                            "name": matched_dish, 
-                            "similarity": round(similarity * 100, 1)
-                        })
-                    
-                    # Add other dishes
-                    for dish in all_dishes:
-                        dish_name = dish.get("name") if isinstance(dish, dict) else dish
-                        if dish_name.lower() != matched_dish.lower():
-                            recommended_dishes.append(dish)
-                            if len(recommended_dishes) >= 5:  # Limit to 5 total
-                                break
-
-                    ranked_restaurants.append({
-                        "name": rest["name"],
-                        "rating": rest["rating"],
-                        "price_range": rest["price_range"],
-                        "cuisine_types": rest["cuisine_types"],
-                        "recommended_dishes": recommended_dishes
-                    })
+                # Rank by rating and taste similarity
+                ranked_restaurants = await asyncio.to_thread(
+                    rank_dish_restaurants, restaurants_with_dish, dish_query, user_taste_vec, diet_type, allergies
+                )
 
                 # Sort by rating
                 ranked_restaurants.sort(key=lambda x: x.get("rating", 0), reverse=True)
@@ -1137,26 +912,20 @@ async def chat_endpoint(request: ChatRequest) -> Dict[str, Any]:
                     },
                     "chat_id": request.chat_id,
                     "menu_buddy": {"recommendations": ranked_restaurants[:final_max_results]}
-                }
+                }, None
 
         except Exception as e:
-            print(f"[DEBUG] Error in dish query: {e}")
-            import traceback
-            traceback.print_exc()
+            logger.exception("Error in dish query: %s", e)
 
     # Check if this is a specific query (dish at specific restaurant)
-    specific_query = parse_specific_query(request.query)
     if specific_query:
         dish_name, restaurant_name = specific_query
-        print(f"[DEBUG] Specific query detected: dish='{dish_name}', restaurant='{restaurant_name}'")
+        logger.debug("Specific query detected: dish='%s', restaurant='%s'", dish_name, restaurant_name)
 
         # Search for the specific restaurant and dish
         try:
-            pc_index = get_pinecone_index()
             # Search for the restaurant
-            restaurant_vec = embed_text(restaurant_name)
-            query_res = pc_index.query(vector=restaurant_vec, top_k=20, include_metadata=True, namespace="restaurants")
-            matches = query_res.get("matches", []) if isinstance(query_res, dict) else getattr(query_res, "matches", [])
+            matches = await asyncio.to_thread(search_restaurants_namespace, restaurant_name, 20)
 
             # Find the matching restaurant
             target_restaurant = None
@@ -1170,10 +939,10 @@ async def chat_endpoint(request: ChatRequest) -> Dict[str, Any]:
 
             if not target_restaurant:
                 # Restaurant not found in Pinecone - fallback to Yelp API via agents
-                print(f"[DEBUG] Restaurant '{restaurant_name}' not found in Pinecone, falling back to Yelp API")
+                logger.debug("Restaurant '%s' not found in Pinecone, falling back to Yelp API", restaurant_name)
                 if AGENTS_AVAILABLE:
                     try:
-                        agent_response = orchestrator_process(request.query)
+                        agent_response = await asyncio.to_thread(run_agent_fallback, request.query)
                         return {
                             "response": {
                                 "text": agent_response
@@ -1182,9 +951,9 @@ async def chat_endpoint(request: ChatRequest) -> Dict[str, Any]:
                             "menu_buddy": {
                                 "recommendations": []
                             }
-                        }
+                        }, None
                     except Exception as e:
-                        print(f"⚠️ Agent system error: {e}, showing no results message")
+                        logger.warning("⚠️ Agent system error: %s, showing no results message", e)
                 
                 # If agents unavailable or failed
                 return {
@@ -1193,7 +962,7 @@ async def chat_endpoint(request: ChatRequest) -> Dict[str, Any]:
                     },
                     "chat_id": request.chat_id,
                     "menu_buddy": {"recommendations": []}
-                }
+                }, None
 
             # Find the specific dish in the restaurant's menu
             menu_items = target_restaurant.get("menu_items", [])
@@ -1210,7 +979,7 @@ async def chat_endpoint(request: ChatRequest) -> Dict[str, Any]:
                     },
                     "chat_id": request.chat_id,
                     "menu_buddy": {"recommendations": []}
-                }
+                }, None
 
             # Return minimal response with just the dish and restaurant
             avg_rating = target_restaurant.get("avg_rating", "N/A")
@@ -1228,11 +997,9 @@ async def chat_endpoint(request: ChatRequest) -> Dict[str, Any]:
                         "location": target_restaurant.get("location")
                     }]
                 }
-            }
+            }, None
         except Exception as e:
-            print(f"[DEBUG] Error in specific query: {e}")
-            import traceback
-            traceback.print_exc()
+            logger.exception("Error in specific query: %s", e)
 
     # Check if location is provided (for general queries)
     if is_first_turn and not fallback_location:
@@ -1243,10 +1010,10 @@ async def chat_endpoint(request: ChatRequest) -> Dict[str, Any]:
                 "text": "Please share your location (city or ZIP/postal code) so I can find restaurants near you."
             },
             "chat_id": request.chat_id
-        }
+        }, None
 
     # Query Pinecone for restaurant recommendations
-    print(f"[DEBUG] Querying Pinecone for restaurant recommendations")
+    logger.debug("Querying Pinecone for restaurant recommendations")
 
     # Initialize response structure
     if dish_not_found:
@@ -1266,38 +1033,43 @@ async def chat_endpoint(request: ChatRequest) -> Dict[str, Any]:
     }
 
     ranked = []
+
+    # Use location from query if available, otherwise use fallback_location
+    location_to_filter = query_location if query_location else fallback_location
+
     try:
-        pc_index = get_pinecone_index()
-        qvec = embed_text(request.query)
-        
-        # IMPORTANT: When filtering by location, fetch MORE results since many will be filtered out
-        # Use location from query if available, otherwise use fallback_location
-        location_to_filter = query_location if query_location else fallback_location
-        
-        # Increase top_k significantly when location filter is active
+        # Location/cuisine go to Pinecone as metadata filters (widened if too few
+        # come back); only the unfiltered fallback over-fetches for client-side filtering
+        filters = restaurant_query_filters(location_to_filter, query_cuisine) if USE_PINECONE_METADATA_FILTERS else []
         if location_to_filter:
-            top_k = max(final_max_results * 10, 50)  # Fetch 10x more to account for location filtering
-            print(f"[DEBUG] Location filter active, fetching top_k={top_k} (will filter to {final_max_results})")
+            unfiltered_top_k = max(final_max_results * 10, 50)  # Fetch 10x more to account for location filtering
         else:
-            top_k = max(final_max_results, 10)
-            
-        print(f"[DEBUG] Querying Pinecone with top_k={top_k}")
-        query_res = pc_index.query(vector=qvec, top_k=top_k, include_metadata=True, namespace="restaurants")
-        matches = query_res.get("matches", []) if isinstance(query_res, dict) else getattr(query_res, "matches", [])
-        print(f"[DEBUG] Pinecone returned {len(matches)} matches")
+            unfiltered_top_k = max(final_max_results, 10)
+        top_k = max(final_max_results * 2, 10) if filters else unfiltered_top_k
+
+        logger.debug("Querying Pinecone with top_k=%s and %s filter stages", top_k, len(filters))
+        matches = await asyncio.to_thread(
+            search_restaurants_namespace, request.query, top_k, parsed_query.query_embedding,
+            filters, final_max_results, unfiltered_top_k
+        )
+        logger.debug("Pinecone returned %s matches", len(matches))
+        if location_to_filter:
+            matches = await asyncio.to_thread(intersect_with_spatial, matches, location_to_filter, final_max_results)
         
         # Extract ingredients from query for ingredient-based boosting
         query_ingredients = extract_ingredients_from_query(request.query)
         if query_ingredients:
-            print(f"[DEBUG] Detected ingredients in query: {query_ingredients}")
+            logger.debug("Detected ingredients in query: %s", query_ingredients)
 
         # Filter and rank recommendations
         if location_to_filter:
-            print(f"[DEBUG] Applying location filter: {location_to_filter}")
+            logger.debug("Applying location filter: %s", location_to_filter)
         else:
-            print(f"[DEBUG] No location filter applied")
+            logger.debug("No location filter applied")
 
-        ranked = filter_and_rank_recommendations(
+        # With a cuisine, the other cuisines are ranked in the same pass as a fallback
+        ranked, cuisine_matched = await asyncio.to_thread(
+            filter_and_rank_with_cuisine_fallback,
             matches=matches,
             user_taste_vec=user_taste_vec,
             favorite_dishes=favorite_dishes,
@@ -1307,50 +1079,34 @@ async def chat_endpoint(request: ChatRequest) -> Dict[str, Any]:
             query_text=request.query,
             location_filter=location_to_filter,
             cuisine_filter=query_cuisine,
-            query_ingredients=query_ingredients
+            query_ingredients=query_ingredients,
+            more_matches=more_restaurant_pages(request.query, top_k, parsed_query.query_embedding, filters, matches),
         )
 
-        print(f"[DEBUG] Total ranked restaurants: {len(ranked)}")
+        logger.debug("Total ranked restaurants: %s", len(ranked))
         
-        # If no results with cuisine filter, retry without it
-        if len(ranked) == 0 and query_cuisine:
-            print(f"[DEBUG] No {query_cuisine} restaurants found, retrying without cuisine filter")
-            ranked = filter_and_rank_recommendations(
-                matches=matches,
-                user_taste_vec=user_taste_vec,
-                favorite_dishes=favorite_dishes,
-                diet_type=diet_type,
-                allergies=allergies,
-                max_results=final_max_results,
-                query_text=request.query,
-                location_filter=location_to_filter,
-                cuisine_filter=None  # Retry without cuisine filter
-            )
-            print(f"[DEBUG] Found {len(ranked)} restaurants without cuisine filter")
-            
-            # Update the response message to inform user
-            if len(ranked) > 0:
-                location_name = location_to_filter or "your area"
-                diet_label = "vegetarian " if diet_type == 'veg' else ""
-                initial_text = f"I couldn't find any {query_cuisine.title()} restaurants in {location_name}, but here are some other great {diet_label}options nearby:"
-                ai_json["response"]["text"] = initial_text
+        # Tell the user when none of the requested cuisine was found
+        if not cuisine_matched and len(ranked) > 0:
+            logger.debug("No %s restaurants found, showing %s without cuisine filter", query_cuisine, len(ranked))
+            location_name = location_to_filter or "your area"
+            diet_label = "vegetarian " if diet_type == 'veg' else ""
+            initial_text = f"I couldn't find any {query_cuisine.title()} restaurants in {location_name}, but here are some other great {diet_label}options nearby:"
+            ai_json["response"]["text"] = initial_text
         
-        print(f"[DEBUG] Returning top {len(ranked)} recommendations")
+        logger.debug("Returning top %s recommendations", len(ranked))
         
     except Exception as e:
-        print(f"[DEBUG] Error in ranking: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Error in ranking: %s", e)
         ranked = []
 
     # Check if no results found from Pinecone
     if len(ranked) == 0:
         # Fallback to Yelp API via agents (hackathon requirement: Yelp as primary source)
-        print(f"[DEBUG] No results from Pinecone, falling back to Yelp API via agents")
+        logger.debug("No results from Pinecone, falling back to Yelp API via agents")
         if AGENTS_AVAILABLE:
             try:
                 # Use orchestrator agent with Yelp API
-                agent_response = orchestrator_process(request.query)
+                agent_response = await asyncio.to_thread(run_agent_fallback, request.query)
                 
                 # Parse agent response and format for frontend
                 return {
@@ -1361,9 +1117,9 @@ async def chat_endpoint(request: ChatRequest) -> Dict[str, Any]:
                     "menu_buddy": {
                         "recommendations": []  # Agent will provide recommendations in text
                     }
-                }
+                }, None
             except Exception as e:
-                print(f"⚠️ Agent system error: {e}, continuing with no results message")
+                logger.warning("⚠️ Agent system error: %s, continuing with no results message", e)
                 # Fall through to no results message
         
         # If agents unavailable or failed, show no results message
@@ -1408,15 +1164,16 @@ async def chat_endpoint(request: ChatRequest) -> Dict[str, Any]:
         "recommendations": filtered_recommendations
     }
     
-    # Rewrite response text to match filtered results
-    try:
-        original_text = ai_json.get("response", {}).get("text", "")
-        if original_text and ranked:
-            restaurant_names = [r.get("name") for r in ranked if r.get("name")]
-            diet_label = "vegetarian" if diet_type in {"veg", "vegetarian"} else diet_type or "any diet"
+    # Build the prompt that rewrites the response text to match filtered results
+    original_text = ai_json.get("response", {}).get("text", "")
+    if not (original_text and ranked):
+        return ai_json, None
 
-            if dish_not_found:
-                rewrite_prompt = f"""The user asked for '{dish_not_found_name}' but we don't have it at our partner restaurants.
+    restaurant_names = [r.get("name") for r in ranked if r.get("name")]
+    diet_label = "vegetarian" if diet_type in {"veg", "vegetarian"} else diet_type or "any diet"
+
+    if dish_not_found:
+        rewrite_prompt = f"""The user asked for '{dish_not_found_name}' but we don't have it at our partner restaurants.
 Rewrite this text to:
 1. Apologize that '{dish_not_found_name}' is not available at our partner restaurants
 2. Mention these {len(ranked)} alternative restaurants: {', '.join(restaurant_names[:5])}
@@ -1428,8 +1185,8 @@ Rewrite this text to:
 Original text: {original_text}
 
 Rewritten text:"""
-            else:
-                rewrite_prompt = f"""Rewrite this restaurant recommendation text to:
+    else:
+        rewrite_prompt = f"""Rewrite this restaurant recommendation text to:
 1. Match the actual {len(ranked)} restaurants shown: {', '.join(restaurant_names[:5])}
 2. Only mention dishes suitable for {diet_label} diet (NO meat, fish, eggs, or animal products if vegetarian)
 3. Keep the tone friendly and helpful
@@ -1439,18 +1196,190 @@ Original text: {original_text}
 
 Rewritten text:"""
 
-            completion = groq_client.chat.completions.create(
-                messages=[{"role": "user", "content": rewrite_prompt}],
-                model="llama-3.3-70b-versatile",
-                temperature=0.7,
-                max_tokens=200
-            )
+    return ai_json, rewrite_prompt
+
+
+REWRITE_TEMPERATURE = 0.7
+REWRITE_MAX_TOKENS = 200
+
+
+async def chat_endpoint(request: ChatRequest) -> Dict[str, Any]:
+    """
+    Main chat endpoint for restaurant recommendations.
 
-            rewritten_text = completion.choices[0].message.content.strip()
+    Runs the retrieval/ranking pipeline, then rewrites the response text so it
+    matches the restaurants that survived filtering.
+    """
+    ctx = await _prepare_chat_context(request)
+    cache_key = _chat_request_key(request, ctx)
+    cache, cached = await _lookup_cached_response(request, cache_key)
+    if cached is not None:
+        _attach_timing(request, cached)
+        return cached
+
+    if _can_coalesce(ctx):
+        # Identical concurrent requests share one pipeline + rewrite
+        ai_json, shared = await chat_flights.do(
+            cache_key, lambda: _compute_chat_response(request, ctx, cache, cache_key)
+        )
+        ai_json["chat_id"] = request.chat_id
+        if shared and "cache" in ai_json:
+            ai_json["cache"]["coalesced"] = True
+    else:
+        ai_json = await _compute_chat_response(request, ctx, cache, cache_key)
+
+    _attach_timing(request, ai_json)
+    return ai_json
+
+
+async def _compute_chat_response(
+    request: ChatRequest, ctx: ChatContext, cache: Optional[ResponseCache], cache_key: str
+) -> Dict[str, Any]:
+    """Run the pipeline, rewrite the response text and store it in the cache."""
+    ai_json, rewrite_prompt = await _run_chat_pipeline(request, ctx)
+    if rewrite_prompt is not None:
+        try:
+            with span("rewrite"):
+                rewritten_text = await achat_completion(
+                    rewrite_prompt, temperature=REWRITE_TEMPERATURE, max_tokens=REWRITE_MAX_TOKENS
+                )
             ai_json["response"]["text"] = rewritten_text
-            print(f"[DEBUG] Rewrote response text for {diet_label} diet")
-    except Exception as e:
-        print(f"[DEBUG] Failed to rewrite response text: {e}")
+            logger.debug("Rewrote response text")
+        except Exception as e:
+            logger.debug("Failed to rewrite response text: %s", e)
 
+    await _store_cached_response(cache, cache_key, ai_json)
     return ai_json
 
+
+def _chat_request_key(request: ChatRequest, ctx: ChatContext) -> str:
+    """Key shared by the response cache and request coalescing."""
+    return chat_cache_key(
+        query=request.query,
+        location=ctx.fallback_location,
+        diet_type=ctx.diet_type,
+        allergies=ctx.allergies,
+        taste_vec=ctx.user_taste_vec,
+        favorite_dishes=ctx.favorite_dishes,
+        max_results=ctx.final_max_results,
+    )
+
+
+def _can_coalesce(ctx: ChatContext) -> bool:
+    """
+    The first-turn location prompt updates the caller's pending query, so
+    it must run per user; every other path only depends on the key.
+    """
+    return not (ctx.is_first_turn and not ctx.fallback_location)
+
+
+async def _lookup_cached_response(
+    request: ChatRequest, cache_key: str
+) -> Tuple[Optional[ResponseCache], Optional[Dict[str, Any]]]:
+    """Return (cache or None when caching is off, cached response or None)."""
+    cache = get_response_cache()
+    if cache is None:
+        return None, None
+
+    with span("cache"):
+        cached = await cache.get(cache_key)
+    if cached is not None:
+        logger.debug("Response cache hit for '%s'", request.query)
+        cached["chat_id"] = request.chat_id
+    return cache, cached
+
+
+async def _store_cached_response(
+    cache: Optional[ResponseCache], cache_key: str, ai_json: Dict[str, Any]
+) -> None:
+    """
+    Cache responses that carry recommendations and mark the response as a miss.
+
+    Greetings, location prompts and agent fallbacks are not cached: they are
+    either free or depend on per-user conversation state.
+    """
+    if cache is None:
+        return
+    if ai_json.get("menu_buddy", {}).get("recommendations"):
+        await cache.set(cache_key, ai_json)
+    ai_json["cache"] = {"hit": False}
+
+
+def _attach_timing(request: ChatRequest, ai_json: Dict[str, Any]) -> None:
+    """Add the per-stage timing block to the response when the client asked for it."""
+    timer = get_request_timer()
+    if request.include_timing and timer is not None:
+        ai_json["timing"] = timer.as_dict()
+
+
+def _sse_event(event: str, data: Dict[str, Any]) -> str:
+    """Format one Server-Sent Events frame."""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+async def chat_stream_endpoint(request: ChatRequest) -> AsyncIterator[str]:
+    """
+    Streaming variant of chat_endpoint (Server-Sent Events).
+
+    Events, in order:
+    - "recommendations": ranked menu_buddy payload plus chat_id, as soon as ranking is done
+    - "token": {"text": delta} for each chunk of the rewritten response text
+    - "done": the full response object, same shape as /api/chat (timing block
+      included here when requested, since the Server-Timing header is sent
+      before the pipeline runs)
+    - "error": {"detail": ...} if the pipeline itself fails
+    """
+    try:
+        ctx = await _prepare_chat_context(request)
+        cache_key = _chat_request_key(request, ctx)
+        cache, cached = await _lookup_cached_response(request, cache_key)
+        if cached is not None:
+            ai_json, rewrite_prompt = cached, None
+        elif _can_coalesce(ctx):
+            # Streams share the retrieval/ranking work; each streams its own rewrite
+            (ai_json, rewrite_prompt), _ = await chat_flights.do(
+                "pipeline:" + cache_key, lambda: _run_chat_pipeline(request, ctx)
+            )
+            ai_json["chat_id"] = request.chat_id
+        else:
+            ai_json, rewrite_prompt = await _run_chat_pipeline(request, ctx)
+    except HTTPException as e:
+        yield _sse_event("error", {"detail": e.detail})
+        return
+    except Exception as e:
+        logger.exception("Chat stream pipeline failed: %s", e)
+        yield _sse_event("error", {"detail": "Chat pipeline failed"})
+        return
+
+    yield _sse_event("recommendations", {
+        "chat_id": ai_json.get("chat_id"),
+        "menu_buddy": ai_json.get("menu_buddy", {"recommendations": []}),
+    })
+
+    if rewrite_prompt is not None:
+        parts: list[str] = []
+        try:
+            with span("rewrite"):
+                async for delta in achat_completion_stream(
+                    rewrite_prompt, temperature=REWRITE_TEMPERATURE, max_tokens=REWRITE_MAX_TOKENS
+                ):
+                    parts.append(delta)
+                    yield _sse_event("token", {"text": delta})
+            rewritten_text = "".join(parts).strip()
+            if rewritten_text:
+                ai_json["response"]["text"] = rewritten_text
+        except Exception as e:
+            # Keep whatever streamed; otherwise the original text stands
+            logger.debug("Failed to stream response rewrite: %s", e)
+            if parts:
+                ai_json["response"]["text"] = "".join(parts).strip()
+    else:
+        # Nothing to rewrite: send the final text as a single token event
+        text = ai_json.get("response", {}).get("text", "")
+        if text:
+            yield _sse_event("token", {"text": text})
+
+    if cached is None:
+        await _store_cached_response(cache, cache_key, ai_json)
+    _attach_timing(request, ai_json)
+    yield _sse_event("done", ai_json)
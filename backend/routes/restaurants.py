@@ -1,6 +1,8 @@
 """
 Restaurant routes for discover feed and restaurant details
 """
+import logging
+import asyncio
 from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
@@ -8,15 +10,105 @@ from pydantic import BaseModel
 from typing import Optional, List, Dict, Any
 from db import get_db, User
 from middleware.auth import get_current_user_id
+from middleware.timing import span
 from integrations.embeddings import embed_text, combine_vectors
-from integrations.pinecone_client import get_pinecone_index, query_pinecone
+from integrations.pinecone_client import get_pinecone_index, query_pinecone, query_pinecone_pages, query_pinecone_widening
 from services.taste_service import user_profile_to_taste_vector, infer_taste_from_text_hybrid, taste_similarity
 from services.recommendation_service import filter_and_rank_recommendations
-from config import USE_SEMANTIC_INGREDIENT_TASTE
+from services.response_cache import chat_cache_key
+from services.search_filters import restaurant_query_filters
+from services.spatial_index import intersect_with_spatial
+from services.singleflight import discover_flights
+from config import USE_SEMANTIC_INGREDIENT_TASTE, USE_PINECONE_METADATA_FILTERS
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/api/restaurants", tags=["restaurants"])
 
 
+def _discover_ranked_restaurants(
+    query_text: str,
+    location: Optional[str],
+    cuisine: Optional[str],
+    max_results: int,
+    user_taste_vec: List[float],
+    allergies: List[str],
+    diet_type: str,
+    favorite_dishes: List[Dict[str, Any]],
+) -> Dict[str, Any]:
+    """Embed the discover query, search Pinecone and rank (blocking)."""
+    # Get embedding for query
+    with span("embed"):
+        query_embedding = embed_text(query_text)
+    
+    # Query Pinecone (location/cuisine as metadata filters, widened if too few match)
+    filters = restaurant_query_filters(location, cuisine) if USE_PINECONE_METADATA_FILTERS else []
+    with span("pinecone"):
+        if filters:
+            matches = query_pinecone_widening(query_embedding, filters, top_k=max_results * 2, min_results=max_results)
+        else:
+            matches = query_pinecone(
+                query_vector=query_embedding,
+                top_k=max_results * 2,  # Get more to filter
+                include_metadata=True
+            )
+    if location:
+        matches = intersect_with_spatial(matches, location, max_results)
+    
+    if not matches:
+        return {
+            "restaurants": [],
+            "message": "No restaurants found. Try adjusting your filters."
+        }
+    
+    # Filter and rank recommendations
+    ranked = filter_and_rank_recommendations(
+        matches=matches,
+        user_taste_vec=user_taste_vec,
+        favorite_dishes=favorite_dishes,
+        diet_type=diet_type,
+        allergies=allergies,
+        max_results=max_results,
+        query_text=query_text,
+        location_filter=location,
+        cuisine_filter=cuisine,
+        # Lazily query further pages if too many matches are filtered out
+        more_matches=query_pinecone_pages(
+            query_embedding, max_results * 2, filters[-1] if filters else None,
+            seen_ids=[m.get("id") if isinstance(m, dict) else getattr(m, "id", None) for m in matches],
+        ),
+    )
+    
+    # Format response
+    restaurants = []
+    for r in ranked:
+        restaurants.append({
+            "id": r.get("id"),
+            "name": r.get("name"),
+            "rating": r.get("avg_rating"),
+            "price_range": r.get("price_range"),
+            "cuisine_types": r.get("cuisine_types", []),
+            "location": r.get("location", {}),
+            "coordinates": r.get("coordinates"),
+            "taste_vector": r.get("taste_vector", [0.0] * 6),
+            "recommended_dishes": [
+                {
+                    "name": d.get("name"),
+                    "similarity": d.get("similarity", 0.0)
+                }
+                for d in r.get("recommended_dishes", [])[:3]
+            ],
+            "photos": r.get("photos", []),
+            "menu_url": r.get("menu_url"),
+            "score": r.get("score", 0.0)
+        })
+    
+    return {
+        "restaurants": restaurants,
+        "count": len(restaurants)
+    }
+
+
 @router.get("/discover")
 async def discover_restaurants(
     location: Optional[str] = Query(None, description="Location filter (e.g., 'Boston, MA')"),
@@ -56,67 +148,28 @@ async def discover_restaurants(
         
         query_text = " ".join(query_parts)
         
-        # Get embedding for query
-        query_embedding = embed_text(query_text)
-        
-        # Query Pinecone
-        index = get_pinecone_index()
-        matches = query_pinecone(
-            query_vector=query_embedding,
-            top_k=max_results * 2,  # Get more to filter
-            include_metadata=True
-        )
-        
-        if not matches:
-            return {
-                "restaurants": [],
-                "message": "No restaurants found. Try adjusting your filters."
-            }
-        
-        # Filter and rank recommendations
-        ranked = filter_and_rank_recommendations(
-            matches=matches,
-            user_taste_vec=user_taste_vec,
-            favorite_dishes=favorite_dishes,
+        # Identical concurrent discover requests share one embed/Pinecone/rank pass
+        flight_key = chat_cache_key(
+            query=query_text,
+            location=location,
             diet_type=diet_type,
             allergies=allergies,
+            taste_vec=user_taste_vec,
+            favorite_dishes=favorite_dishes,
             max_results=max_results,
-            query_text=query_text,
-            location_filter=location,
-            cuisine_filter=cuisine
         )
-        
-        # Format response
-        restaurants = []
-        for r in ranked:
-            restaurants.append({
-                "id": r.get("id"),
-                "name": r.get("name"),
-                "rating": r.get("avg_rating"),
-                "price_range": r.get("price_range"),
-                "cuisine_types": r.get("cuisine_types", []),
-                "location": r.get("location", {}),
-                "coordinates": r.get("coordinates"),
-                "taste_vector": r.get("taste_vector", [0.0] * 6),
-                "recommended_dishes": [
-                    {
-                        "name": d.get("name"),
-                        "similarity": d.get("similarity", 0.0)
-                    }
-                    for d in r.get("recommended_dishes", [])[:3]
-                ],
-                "photos": r.get("photos", []),
-                "menu_url": r.get("menu_url"),
-                "score": r.get("score", 0.0)
-            })
-        
-        return {
-            "restaurants": restaurants,
-            "count": len(restaurants)
-        }
+        result, _ = await discover_flights.do(
+            flight_key,
+            lambda: asyncio.to_thread(
+                _discover_ranked_restaurants,
+                query_text, location, cuisine, max_results,
+                user_taste_vec, allergies, diet_type, favorite_dishes,
+            ),
+        )
+        return result
         
     except Exception as e:
-        print(f"[ERROR] Discover endpoint error: {e}")
+        logger.error("Discover endpoint error: %s", e)
         raise HTTPException(status_code=500, detail=f"Error fetching restaurants: {str(e)}")
 
 
@@ -242,5 +295,5 @@ async def get_restaurant(
     except HTTPException:
         raise
     except Exception as e:
-        print(f"[ERROR] Restaurant details endpoint error: {e}")
+        logger.error("Restaurant details endpoint error: %s", e)
         raise HTTPException(status_code=500, detail=f"Error fetching restaurant details: {str(e)}")
@@ -0,0 +1,31 @@
+"""
+Seed ingredient flavor vectors into Pinecone.
+
+Usage (from backend/):
+    python seed_ingredients.py          # upsert only if the CSV changed since the last seed
+    python seed_ingredients.py --force  # re-upsert regardless of the marker
+"""
+import argparse
+
+from logging_config import configure_logging
+from integrations.pinecone_client import (
+    seed_ingredients_to_pinecone,
+    read_ingredient_seed_marker,
+)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Seed ingredient flavor vectors into Pinecone")
+    parser.add_argument("--force", action="store_true", help="Upsert even if this CSV version is already seeded")
+    args = parser.parse_args()
+    configure_logging()
+
+    seeded = seed_ingredients_to_pinecone(force=args.force)
+    marker = read_ingredient_seed_marker()
+    if marker:
+        print(f"Seed marker: version={marker.get('version')} status={marker.get('status')} count={marker.get('count')} seeded_at={marker.get('seeded_at')}")
+    print("Seeded." if seeded else "Nothing to seed.")
+
+
+if __name__ == "__main__":
+    main()
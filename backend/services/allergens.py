@@ -0,0 +1,222 @@
+"""
+Allergen bitmasks for menu dishes.
+
+A dish's allergens never change, so they are worked out once at ingest
+time (see annotate_allergens.py) over a fixed vocabulary and stored on each
+entry of a restaurant's `dishes_json` as an integer bitmask:
+
+    {"name": "Pad Thai", "taste": [...], "allergens": 0b000100011}
+
+At query time the user's allergies are mapped onto the same bits, and a dish
+is safe when `dish_mask & user_mask == 0`. Groq is only consulted for
+free-text allergies outside the vocabulary and for dishes that were never
+annotated (both through the cached, batched restaurant_service screening).
+"""
+import json
+import logging
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from services.restaurant_service import allergy_filter, detect_dish_allergens, screen_dishes_for_allergies
+
+logger = logging.getLogger(__name__)
+
+
+# Bit i is ALLERGEN_VOCABULARY[i]; append only, never reorder (masks are persisted)
+ALLERGEN_VOCABULARY = [
+    "peanuts",
+    "tree nuts",
+    "dairy",
+    "gluten",
+    "shellfish",
+    "fish",
+    "egg",
+    "soy",
+    "sesame",
+]
+
+ALLERGEN_BITS = {name: 1 << i for i, name in enumerate(ALLERGEN_VOCABULARY)}
+
+# Common ways users write the vocabulary allergens. Umbrella terms map to every
+# allergen they cover, so "nuts" rejects peanut dishes as well as tree nuts.
+ALLERGEN_SYNONYMS = {
+    "peanut": "peanuts",
+    "groundnut": "peanuts",
+    "groundnuts": "peanuts",
+    "nut": ("peanuts", "tree nuts"),
+    "nuts": ("peanuts", "tree nuts"),
+    "tree nut": "tree nuts",
+    "almond": "tree nuts",
+    "almonds": "tree nuts",
+    "cashew": "tree nuts",
+    "cashews": "tree nuts",
+    "walnut": "tree nuts",
+    "walnuts": "tree nuts",
+    "pistachio": "tree nuts",
+    "pistachios": "tree nuts",
+    "milk": "dairy",
+    "lactose": "dairy",
+    "cheese": "dairy",
+    "wheat": "gluten",
+    "celiac": "gluten",
+    "coeliac": "gluten",
+    "shrimp": "shellfish",
+    "prawn": "shellfish",
+    "prawns": "shellfish",
+    "crab": "shellfish",
+    "lobster": "shellfish",
+    "seafood": ("fish", "shellfish"),
+    "eggs": "egg",
+    "soya": "soy",
+    "soybean": "soy",
+    "soybeans": "soy",
+    "sesame seeds": "sesame",
+}
+
+
+def allergen_bit(allergy: str) -> Optional[int]:
+    """Mask for a user allergy (one or more bits), or None if it is outside the vocabulary."""
+    name = (allergy or "").strip().lower()
+    names = ALLERGEN_SYNONYMS.get(name, name)
+    if isinstance(names, str):
+        names = (names,)
+    bits = [ALLERGEN_BITS[n] for n in names if n in ALLERGEN_BITS]
+    if not bits:
+        return None
+    mask = 0
+    for bit in bits:
+        mask |= bit
+    return mask
+
+
+def split_allergies(allergies: Iterable[str]) -> Tuple[int, List[str]]:
+    """Return (mask of vocabulary allergies, free-text allergies outside it)."""
+    mask = 0
+    free_text = []
+    for allergy in allergies or []:
+        if not allergy or not allergy.strip():
+            continue
+        bit = allergen_bit(allergy)
+        if bit is None:
+            free_text.append(allergy.strip().lower())
+        else:
+            mask |= bit
+    return mask, free_text
+
+
+def mask_to_allergens(mask: int) -> List[str]:
+    return [name for name, bit in ALLERGEN_BITS.items() if mask & bit]
+
+
+def allergy_keywords(allergies: Iterable[str]) -> List[str]:
+    """
+    Words to keyword-match for the vocabulary allergies in a user's list.
+
+    The user's own terms plus every name and synonym spelling of the
+    allergens they cover ("milk" -> milk, dairy, lactose, cheese), used when
+    a dish has no mask to compare against.
+    """
+    terms = [a.strip().lower() for a in allergies or [] if a and a.strip() and allergen_bit(a) is not None]
+    user_mask = 0
+    for term in terms:
+        user_mask |= allergen_bit(term)
+    spellings = [name for name in list(ALLERGEN_BITS) + list(ALLERGEN_SYNONYMS) if not allergen_bit(name) & ~user_mask]
+    return list(dict.fromkeys(terms + spellings)) if user_mask else []
+
+
+def dish_allergen_masks(dish_names: Iterable[str]) -> Dict[str, Optional[int]]:
+    """
+    Annotate dishes over the whole vocabulary (batched, cached Groq calls).
+
+    Returns {dish: mask}, with None for dishes whose batch failed.
+    """
+    masks: Dict[str, Optional[int]] = {}
+    for dish, contained in detect_dish_allergens(dish_names, ALLERGEN_VOCABULARY).items():
+        masks[dish] = None if contained is None else sum(ALLERGEN_BITS[a] for a in contained)
+    return masks
+
+
+def annotate_dishes(dishes: List[Any], force: bool = False) -> List[Dict[str, Any]]:
+    """
+    Add an "allergens" mask to every dish entry (dicts or bare names).
+
+    Entries that already carry a mask are kept unless force is set; entries
+    whose annotation failed are left without one.
+    """
+    entries = [d if isinstance(d, dict) else {"name": d} for d in dishes or []]
+    todo = [e["name"] for e in entries if e.get("name") and (force or not isinstance(e.get("allergens"), int))]
+    masks = dish_allergen_masks(todo) if todo else {}
+    for entry in entries:
+        mask = masks.get(entry.get("name"))
+        if mask is not None:
+            entry["allergens"] = mask
+    return entries
+
+
+def annotate_restaurant_metadata(meta: Dict[str, Any], force: bool = False) -> Dict[str, Any]:
+    """
+    Return the metadata fields to update so `dishes_json` carries allergen masks.
+
+    Restaurants without `dishes_json` get one built from `menu_items`.
+    """
+    dishes: List[Any] = []
+    raw = meta.get("dishes_json")
+    if raw:
+        try:
+            dishes = json.loads(raw) if isinstance(raw, str) else list(raw)
+        except Exception as e:
+            logger.warning("Failed to parse dishes_json for %s: %s", meta.get("name"), e)
+    if not dishes:
+        dishes = meta.get("menu_items") or []
+    return {"dishes_json": json.dumps(annotate_dishes(dishes, force=force), ensure_ascii=False)}
+
+
+def dish_masks_from_metadata(meta: Dict[str, Any]) -> Dict[str, Optional[int]]:
+    """{dish name: mask or None} from a restaurant's `dishes_json`."""
+    raw = meta.get("dishes_json")
+    if not raw:
+        return {}
+    try:
+        dishes = json.loads(raw) if isinstance(raw, str) else raw
+    except Exception:
+        return {}
+    return {
+        d["name"]: d.get("allergens") if isinstance(d.get("allergens"), int) else None
+        for d in dishes
+        if isinstance(d, dict) and d.get("name")
+    }
+
+
+def allergy_safety(dish_masks: Dict[str, Optional[int]], allergies: List[str]) -> Dict[str, bool]:
+    """
+    Decide which dishes are safe for the user's allergies.
+
+    dish_masks maps dish name -> stored mask (None when not annotated).
+    Vocabulary allergies are a bitwise AND against the mask; unannotated
+    dishes are annotated on the fly (cached), and free-text allergies go
+    through the batched LLM screening.
+
+    Returns:
+        {dish: True if safe}
+    """
+    user_mask, free_text = split_allergies(allergies)
+    masks = dict(dish_masks)
+    safe: Dict[str, bool] = {dish: True for dish in masks}
+
+    if user_mask:
+        missing = [dish for dish, mask in masks.items() if mask is None]
+        if missing:
+            masks.update(dish_allergen_masks(missing))
+        # Annotation failed: keyword-match the user's words and their spellings
+        keywords = allergy_keywords(allergies)
+        for dish, mask in masks.items():
+            if mask is None:
+                safe[dish] = allergy_filter([dish], keywords)
+            else:
+                safe[dish] = not (mask & user_mask)
+
+    if free_text:
+        still_safe = [dish for dish, ok in safe.items() if ok]
+        for dish, ok in screen_dishes_for_allergies(still_safe, free_text).items():
+            safe[dish] = ok
+
+    return safe
@@ -1,10 +1,13 @@
 """
 Beer pairing service - integrates beer recommender ML model.
 """
+import logging
 import os
 import sys
 from typing import Dict, List, Optional
 
+logger = logging.getLogger(__name__)
+
 # Add agents/tools to path to import beer_recommender
 agents_path = os.path.join(os.path.dirname(__file__), "..", "..", "agents", "tools")
 if agents_path not in sys.path:
@@ -34,11 +37,11 @@ def get_beer_recommender() -> Optional[BeerRecommender]:
             if os.path.exists(data_path):
                 _beer_recommender.load_and_preprocess_data()
                 _beer_recommender.train_regression_model()
-                print("✅ Beer recommender initialized")
+                logger.info("✅ Beer recommender initialized")
             else:
-                print(f"⚠️ Beer data file not found at {data_path}")
+                logger.warning("⚠️ Beer data file not found at %s", data_path)
         except Exception as e:
-            print(f"❌ Error initializing beer recommender: {e}")
+            logger.error("❌ Error initializing beer recommender: %s", e)
     
     return _beer_recommender
 
@@ -85,7 +88,7 @@ def get_beer_recommendations(
             "user_features": result.get("user_features", {})
         }
     except Exception as e:
-        print(f"❌ Error getting beer recommendations: {e}")
+        logger.error("❌ Error getting beer recommendations: %s", e)
         return {
             "error": str(e),
             "recommendations": []
@@ -0,0 +1,101 @@
+"""
+Bounded in-process caches.
+
+Module-level memo dicts grow for the life of a worker. BoundedCache is the
+shared replacement: an LRU with an entry cap, optional expiry and
+hit/miss/eviction counters, safe to use from the worker threads that
+asyncio.to_thread runs blocking code on.
+
+Every cache registers itself by name so /api/chat/cache/stats can report
+them all (see memo_cache_stats).
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+from config import MEMO_CACHE_MAX_ENTRIES, MEMO_CACHE_TTL_SECONDS
+
+_registry: Dict[str, "BoundedCache"] = {}
+_registry_lock = threading.Lock()
+
+
+class BoundedCache:
+    """Thread-safe LRU with max entries and optional TTL (seconds, None = no expiry)."""
+
+    def __init__(
+        self,
+        name: str,
+        max_entries: int = MEMO_CACHE_MAX_ENTRIES,
+        ttl: Optional[float] = MEMO_CACHE_TTL_SECONDS,
+        register: bool = True,
+    ):
+        self.name = name
+        self.max_entries = max_entries
+        self.ttl = ttl if ttl and ttl > 0 else None
+        self._entries: "OrderedDict[Hashable, Tuple[float, Optional[float], Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        if register:
+            with _registry_lock:
+                _registry[name] = self
+
+    def get_entry(self, key: Hashable) -> Optional[Tuple[Any, float]]:
+        """Return (value, stored_at) or None if missing/expired."""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            stored_at, expires_at, value = entry
+            if expires_at is not None and expires_at <= now:
+                del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value, stored_at
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        entry = self.get_entry(key)
+        return default if entry is None else entry[0]
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        """Store value; ttl overrides the cache default for this entry."""
+        now = time.time()
+        ttl = ttl if ttl is not None else self.ttl
+        with self._lock:
+            self._entries[key] = (now, now + ttl if ttl else None, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_s": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "evictions": self.evictions,
+        }
+
+
+def memo_cache_stats() -> Dict[str, Dict[str, Any]]:
+    """Counters for every registered cache, by name."""
+    with _registry_lock:
+        caches = list(_registry.values())
+    return {cache.name: cache.stats() for cache in caches}
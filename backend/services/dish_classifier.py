@@ -0,0 +1,205 @@
+"""
+Local veg/non-veg and course classifier for dish names.
+
+Trained offline from the recipe database (see train_dish_classifier.py) and
+loaded at startup, so most dish diet/course decisions never reach Groq.
+The recipes carry no explicit labels, so they are derived:
+
+- diet:   'non-veg' if any ingredient names meat, fish, seafood or eggs
+          (the same rule the Groq prompt uses), otherwise 'veg'
+- course: 'desserts' / 'appetizer' / 'mains' from unambiguous name keywords;
+          recipes matching none (or several) are left out of course training
+
+Each head is a TF-IDF (word + character n-gram) logistic regression over the
+dish name, the only thing callers have at inference time. predict_* return
+(label, confidence); callers consult Groq when confidence is below
+DISH_CLASSIFIER_MIN_CONFIDENCE.
+"""
+import logging
+import random
+import re
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from config import DISH_CLASSIFIER_PATH, USE_LOCAL_DISH_CLASSIFIER
+
+logger = logging.getLogger(__name__)
+
+
+_NONVEG_INGREDIENT_RE = re.compile(
+    r"\b(?:chicken|beef|pork|bacon|ham|turkey|lamb|mutton|duck|veal|venison|goat|"
+    r"sausages?|pepperoni|salami|prosciutto|pancetta|chorizo|meat|gelatin|lard|"
+    r"fish|salmon|tuna|cod|tilapia|halibut|trout|sardines?|anchov(?:y|ies)|"
+    r"shrimps?|prawns?|crab|lobster|clams?|mussels?|oysters?|scallops?|squid|calamari|octopus|"
+    r"eggs?|egg whites?|egg yolks?)\b"
+)
+
+_COURSE_NAME_PATTERNS = {
+    "desserts": re.compile(
+        r"\b(?:cake|cakes|cupcakes?|cheesecake|cookies?|brownies?|blondies?|fudge|candy|pudding|"
+        r"ice cream|sorbet|gelato|mousse|custard|cobbler|crumble|frosting|icing|macaroons?|"
+        r"meringues?|parfait|sundae|tiramisu|baklava|truffles?|halwa|kheer|ladoo|gulab jamun)\b"
+    ),
+    "appetizer": re.compile(
+        r"\b(?:appetizers?|dip|salsa|bruschetta|crostini|canapes?|wings|nachos|samosas?|pakoras?|"
+        r"spring rolls?|egg rolls?|soup|salad|hummus|guacamole|sliders|bites|poppers|fritters|"
+        r"tapenade|deviled eggs|stuffed mushrooms)\b"
+    ),
+    "mains": re.compile(
+        r"\b(?:curry|stew|casserole|lasagna|roast|steak|chops|burgers?|pizza|spaghetti|risotto|"
+        r"biryani|tacos|enchiladas|burritos?|stir[- ]fry|chili|meatloaf|fajitas|pot pie|paella|"
+        r"tikka masala|ramen|fried rice|pad thai|lo mein|goulash|jambalaya|pilaf|fillets?|filets?)\b"
+    ),
+}
+
+
+def diet_label_from_ingredients(ingredients: Iterable[str]) -> str:
+    """'non-veg' if any ingredient is meat, fish, seafood or egg; else 'veg'."""
+    text = " ".join(str(i) for i in ingredients).lower()
+    return "non-veg" if _NONVEG_INGREDIENT_RE.search(text) else "veg"
+
+
+def course_label_from_name(name: str) -> Optional[str]:
+    """Course implied by the dish name, or None when absent or ambiguous."""
+    name = name.lower()
+    matches = [course for course, pattern in _COURSE_NAME_PATTERNS.items() if pattern.search(name)]
+    return matches[0] if len(matches) == 1 else None
+
+
+def _build_pipeline():
+    from sklearn.feature_extraction.text import TfidfVectorizer
+    from sklearn.linear_model import LogisticRegression
+    from sklearn.pipeline import FeatureUnion, Pipeline
+
+    return Pipeline([
+        ("features", FeatureUnion([
+            ("words", TfidfVectorizer(ngram_range=(1, 2), min_df=2, max_features=200_000, sublinear_tf=True)),
+            ("chars", TfidfVectorizer(analyzer="char_wb", ngram_range=(3, 5), min_df=3,
+                                      max_features=200_000, sublinear_tf=True)),
+        ])),
+        ("clf", LogisticRegression(max_iter=1000, C=4.0)),
+    ])
+
+
+def _fit_head(names: List[str], labels: List[str], holdout: float, seed: int) -> Tuple[Any, Dict[str, Any]]:
+    """Fit one head and report held-out accuracy."""
+    order = list(range(len(names)))
+    random.Random(seed).shuffle(order)
+    cut = int(len(order) * holdout)
+    test, train = order[:cut], order[cut:]
+
+    model = _build_pipeline()
+    model.fit([names[i] for i in train], [labels[i] for i in train])
+    accuracy = None
+    if test:
+        predicted = model.predict([names[i] for i in test])
+        accuracy = round(sum(p == labels[i] for p, i in zip(predicted, test)) / len(test), 4)
+    counts: Dict[str, int] = {}
+    for label in labels:
+        counts[label] = counts.get(label, 0) + 1
+    return model, {"examples": len(names), "labels": counts, "holdout_accuracy": accuracy}
+
+
+class DishClassifier:
+    """Diet and course heads trained on recipe names."""
+
+    def __init__(self, diet_model: Any, course_model: Any, metadata: Dict[str, Any]):
+        self.diet_model = diet_model
+        self.course_model = course_model
+        self.metadata = metadata
+
+    @staticmethod
+    def _predict(model: Any, dishes: List[str]) -> List[Tuple[str, float]]:
+        if not dishes:
+            return []
+        probabilities = model.predict_proba([d.lower().strip() for d in dishes])
+        classes = model.classes_
+        return [(str(classes[row.argmax()]), float(row.max())) for row in probabilities]
+
+    def predict_diet(self, dishes: List[str]) -> List[Tuple[str, float]]:
+        """[('veg' | 'non-veg', confidence)] in input order."""
+        return self._predict(self.diet_model, dishes)
+
+    def predict_course(self, dishes: List[str]) -> List[Tuple[str, float]]:
+        """[('appetizer' | 'mains' | 'desserts', confidence)] in input order."""
+        return self._predict(self.course_model, dishes)
+
+    def save(self, path: str) -> None:
+        import joblib
+
+        joblib.dump(
+            {"diet": self.diet_model, "course": self.course_model, "metadata": self.metadata},
+            path,
+            compress=3,
+        )
+
+    @classmethod
+    def load(cls, path: str) -> "DishClassifier":
+        import joblib
+
+        artifact = joblib.load(path)
+        return cls(artifact["diet"], artifact["course"], artifact.get("metadata", {}))
+
+
+def train_dish_classifier(recipes: List[Dict[str, Any]], holdout: float = 0.05, seed: int = 0) -> DishClassifier:
+    """Derive labels from recipes and fit both heads."""
+    diet_names, diet_labels = [], []
+    course_names, course_labels = [], []
+    for recipe in recipes:
+        name = (recipe.get("name") or "").lower().strip()
+        if not name:
+            continue
+        diet_names.append(name)
+        diet_labels.append(diet_label_from_ingredients(recipe.get("ingredients") or []))
+        course = course_label_from_name(name)
+        if course:
+            course_names.append(name)
+            course_labels.append(course)
+
+    if not diet_names or len(set(course_labels)) < 2:
+        raise ValueError("Not enough labeled recipes to train the dish classifier")
+
+    logger.info("Training diet head on %s recipes", len(diet_names))
+    diet_model, diet_meta = _fit_head(diet_names, diet_labels, holdout, seed)
+    logger.info("Training course head on %s recipes", len(course_names))
+    course_model, course_meta = _fit_head(course_names, course_labels, holdout, seed)
+
+    metadata = {"trained_at": time.time(), "diet": diet_meta, "course": course_meta}
+    return DishClassifier(diet_model, course_model, metadata)
+
+
+# ==================== SINGLETON ====================
+
+_dish_classifier: Optional[DishClassifier] = None
+_load_attempted = False
+_load_lock = threading.Lock()
+
+
+def load_dish_classifier(path: str = DISH_CLASSIFIER_PATH) -> Optional[DishClassifier]:
+    """Load the serialized classifier once (None if disabled, missing or unreadable)."""
+    global _dish_classifier, _load_attempted
+    with _load_lock:
+        if _load_attempted:
+            return _dish_classifier
+        _load_attempted = True
+        if not USE_LOCAL_DISH_CLASSIFIER:
+            return None
+        if not Path(path).exists():
+            logger.info("No dish classifier at %s; diet/course decisions will use Groq", path)
+            return None
+        try:
+            _dish_classifier = DishClassifier.load(path)
+            logger.info("Loaded dish classifier from %s (diet holdout accuracy: %s)",
+                        path, _dish_classifier.metadata.get("diet", {}).get("holdout_accuracy"))
+        except Exception as e:
+            logger.warning("Failed to load dish classifier from %s: %s", path, e)
+        return _dish_classifier
+
+
+def get_dish_classifier() -> Optional[DishClassifier]:
+    """The loaded classifier, loading it on first use."""
+    if _load_attempted:
+        return _dish_classifier
+    return load_dish_classifier()
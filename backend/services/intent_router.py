@@ -0,0 +1,140 @@
+"""
+Embedding-prototype router for query intent and relevance.
+
+A handful of example queries per intent are embedded once with the shared
+SentenceTransformer model. Routing a query is one matrix product of the
+prototype matrix with the (unit-length) query embedding; each intent scores
+the best of its examples. The router only answers when the winning intent
+beats the runner-up by INTENT_ROUTER_MIN_MARGIN, so callers fall back to the
+LLM for the ambiguous remainder.
+"""
+import logging
+import threading
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from config import USE_INTENT_ROUTER, INTENT_ROUTER_MIN_MARGIN, INTENT_ROUTER_MIN_SCORE
+from integrations.embeddings import get_embedding_model
+
+logger = logging.getLogger(__name__)
+
+
+# "off_topic" is routed like the LLM's "other" but also marks the query irrelevant
+INTENT_PROTOTYPES: Dict[str, List[str]] = {
+    "dish_search": [
+        "I want to eat pizza",
+        "where can I get good sushi",
+        "craving spicy chicken curry",
+        "looking for vegan tacos",
+        "best ramen around here",
+        "something sweet for dessert",
+        "I feel like having pad thai tonight",
+        "any place with paneer tikka",
+        "recommend a spicy noodle dish",
+        "what should I eat for dinner",
+    ],
+    "restaurant_search": [
+        "show me Olive Garden",
+        "is there a McDonald's nearby",
+        "what's on the menu at Chipotle",
+        "find the restaurant called Thai Spice",
+        "tell me about Joe's Pizza",
+        "does Shake Shack have veggie burgers",
+        "menu of the Cheesecake Factory",
+        "good italian restaurants in Boston",
+    ],
+    "greeting": [
+        "hello",
+        "hi there",
+        "hey, how are you",
+        "good morning",
+        "what can you do",
+        "thanks for the help",
+        "who are you",
+    ],
+    "off_topic": [
+        "what are the best tourist attractions in Paris",
+        "find me a hotel near the airport",
+        "where is the nearest shopping mall",
+        "what's the weather tomorrow",
+        "museums to visit this weekend",
+        "how do I get to the train station",
+        "book a flight to New York",
+        "write me a python script",
+    ],
+}
+
+
+@dataclass
+class IntentRoute:
+    """Router verdict for one query."""
+    intent: str        # dish_search, restaurant_search, greeting or off_topic
+    score: float       # cosine similarity to the closest prototype of that intent
+    margin: float      # lead over the best other intent
+    confident: bool
+
+    @property
+    def relevant(self) -> bool:
+        return self.intent != "off_topic"
+
+    @property
+    def chat_intent(self) -> str:
+        """Intent in parse_query/classify_intent vocabulary."""
+        return "other" if self.intent == "off_topic" else self.intent
+
+
+class IntentRouter:
+    """Prototype matrix plus per-intent row groups."""
+
+    def __init__(self, model, prototypes: Dict[str, List[str]] = INTENT_PROTOTYPES):
+        self.model = model
+        self.intents = list(prototypes)
+        examples = [text for intent in self.intents for text in prototypes[intent]]
+        self._matrix = np.asarray(model.encode(examples, normalize_embeddings=True), dtype=np.float32)
+        # Row offsets where each intent's examples start (for np.maximum.reduceat)
+        self._offsets = np.cumsum([0] + [len(prototypes[i]) for i in self.intents[:-1]])
+
+    def embed(self, query: str) -> List[float]:
+        """Query embedding in the same form as embeddings.embed_text (Pinecone-ready)."""
+        return self.model.encode(query).tolist()
+
+    def route(self, query_vector: List[float]) -> IntentRoute:
+        vec = np.asarray(query_vector, dtype=np.float32)
+        norm = float(np.linalg.norm(vec))
+        if norm == 0:
+            return IntentRoute("off_topic", 0.0, 0.0, False)
+        sims = self._matrix @ (vec / norm)
+        scores = np.maximum.reduceat(sims, self._offsets)
+        order = np.argsort(scores)[::-1]
+        best, runner_up = float(scores[order[0]]), float(scores[order[1]])
+        margin = best - runner_up
+        confident = margin >= INTENT_ROUTER_MIN_MARGIN and best >= INTENT_ROUTER_MIN_SCORE
+        return IntentRoute(self.intents[order[0]], best, margin, confident)
+
+
+# ==================== SINGLETON ====================
+
+_intent_router: Optional[IntentRouter] = None
+_router_unavailable = False
+_router_lock = threading.Lock()
+
+
+def get_intent_router() -> Optional[IntentRouter]:
+    """Get or build the router (None if disabled or embeddings are unavailable)."""
+    global _intent_router, _router_unavailable
+    if _intent_router is not None or _router_unavailable:
+        return _intent_router
+    with _router_lock:
+        if _intent_router is None and not _router_unavailable:
+            if not USE_INTENT_ROUTER:
+                _router_unavailable = True
+                return None
+            try:
+                _intent_router = IntentRouter(get_embedding_model())
+                logger.info("Intent router ready (%s prototypes)", _intent_router._matrix.shape[0])
+            except Exception as e:
+                logger.warning("Intent router unavailable: %s", e)
+                _router_unavailable = True
+    return _intent_router
@@ -0,0 +1,126 @@
+"""
+Compiled multi-pattern substring matching.
+
+The keyword filters used to scan `any(keyword in text for keyword in ...)`,
+and taste inference tested every ingredient name against every dish, i.e.
+O(patterns x text) per menu item. A KeywordMatcher compiles its patterns
+once:
+
+- contains_any: one alternation regex, so the scan runs in C.
+- find_all: an Aho-Corasick automaton, one pass over the text that reports
+  every pattern occurring in it (including overlapping/nested ones such as
+  "chili" inside "chili pepper", which a single regex scan would miss),
+  optionally only as whole words (r"\bpattern\b").
+
+Matching is case-insensitive substring matching, the same semantics as the
+`keyword in text.lower()` checks it replaces.
+
+Benchmark: python -m benchmarks.bench_keyword_matcher (from backend/).
+"""
+import re
+from typing import Dict, Iterable, List, Tuple
+
+from services.bounded_cache import BoundedCache
+
+_WORD_CHAR_RE = re.compile(r"\w")
+
+
+def _is_word_char(ch: str) -> bool:
+    return _WORD_CHAR_RE.match(ch) is not None
+
+
+class KeywordMatcher:
+    """Patterns compiled for repeated substring checks against many texts."""
+
+    def __init__(self, patterns: Iterable[str]):
+        self.patterns: List[str] = list(dict.fromkeys(p.lower() for p in patterns if p))
+        # Longest first so the regex prefers whole phrases; alternation needs at least one branch
+        alternatives = sorted(self.patterns, key=len, reverse=True)
+        self._regex = re.compile("|".join(map(re.escape, alternatives))) if alternatives else None
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[Tuple[int, ...]] = [()]
+        self._build_automaton()
+
+    def __len__(self) -> int:
+        return len(self.patterns)
+
+    def _build_automaton(self) -> None:
+        goto, fail, out = self._goto, self._fail, self._out
+        for idx, pattern in enumerate(self.patterns):
+            state = 0
+            for ch in pattern:
+                nxt = goto[state].get(ch)
+                if nxt is None:
+                    nxt = len(goto)
+                    goto[state][ch] = nxt
+                    goto.append({})
+                    fail.append(0)
+                    out.append(())
+                state = nxt
+            out[state] = out[state] + (idx,)
+
+        # Breadth-first failure links; each state also reports its suffix states' patterns
+        queue = list(goto[0].values())
+        for state in queue:
+            for ch, nxt in goto[state].items():
+                queue.append(nxt)
+                f = fail[state]
+                while f and ch not in goto[f]:
+                    f = fail[f]
+                fail[nxt] = goto[f].get(ch, 0)
+                out[nxt] = out[nxt] + out[fail[nxt]]
+
+    def contains_any(self, text: str) -> bool:
+        """True if any pattern occurs in text."""
+        if self._regex is None or not text:
+            return False
+        return self._regex.search(text.lower()) is not None
+
+    def find_all(self, text: str, whole_words: bool = False) -> List[str]:
+        """
+        Every distinct pattern occurring in text, in pattern order.
+
+        With whole_words, an occurrence only counts when it has a word
+        boundary at both ends, like searching for r"\bpattern\b".
+        """
+        if not self.patterns or not text:
+            return []
+        goto, fail, out = self._goto, self._fail, self._out
+        text = text.lower()
+        found = set()
+        state = 0
+        for pos, ch in enumerate(text):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            if not out[state]:
+                continue
+            if not whole_words:
+                found.update(out[state])
+                continue
+            for idx in out[state]:
+                if idx not in found and self._bounded(text, pos + 1 - len(self.patterns[idx]), pos + 1, idx):
+                    found.add(idx)
+        return [self.patterns[idx] for idx in sorted(found)]
+
+    def _bounded(self, text: str, start: int, end: int, idx: int) -> bool:
+        """True if text[start:end] (pattern idx) has a \b word boundary at both ends."""
+        pattern = self.patterns[idx]
+        before = start > 0 and _is_word_char(text[start - 1])
+        after = end < len(text) and _is_word_char(text[end])
+        return before != _is_word_char(pattern[0]) and after != _is_word_char(pattern[-1])
+
+
+# Matchers for per-request pattern lists (e.g. a user's allergies)
+_matcher_cache = BoundedCache("keyword_matchers", max_entries=512, ttl=None)
+
+
+def keyword_matcher(patterns: Iterable[str]) -> KeywordMatcher:
+    """Shared compiled matcher for a pattern list (built once per distinct list)."""
+    key = tuple(sorted({p.lower() for p in patterns if p}))
+    matcher = _matcher_cache.get(key)
+    if matcher is None:
+        matcher = KeywordMatcher(key)
+        _matcher_cache.set(key, matcher)
+    return matcher
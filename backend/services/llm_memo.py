@@ -0,0 +1,249 @@
+"""
+Persistent memo store for Groq classifier results.
+
+Dish diet/validation labels, inferred taste vectors, dish ingredients and
+dish extraction results only depend on the input text, the model and the
+prompt, so they are memoized in a local SQLite file (WAL mode) that every
+uvicorn worker on the host shares and that survives restarts.
+
+Entries are keyed by (task, model, prompt version, normalized input).
+Callers bump their prompt version constant whenever a prompt changes, which
+retires the old entries without a migration. Values are JSON; failure
+fallbacks are never stored, only real LLM answers.
+
+The module-level dicts in the callers stay in front as a per-process L1.
+"""
+import json
+import logging
+import re
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Iterable, Optional
+
+from config import (
+    GROQ_MODEL,
+    LLM_MEMO_ENABLED,
+    LLM_MEMO_PATH,
+    LLM_MEMO_TTL_SECONDS,
+    LLM_MEMO_MAX_ENTRIES,
+)
+
+logger = logging.getLogger(__name__)
+
+# Size cap is enforced every N writes rather than on each one
+_PRUNE_EVERY = 100
+
+# SQLite's default limit on bound parameters is 999
+_MAX_BATCH = 500
+
+_SPACE_RE = re.compile(r"\s+")
+
+
+def normalize_memo_input(text: str) -> str:
+    """Lowercase and collapse whitespace so trivial variants share an entry."""
+    return _SPACE_RE.sub(" ", (text or "").lower()).strip()
+
+
+class LLMMemoStore:
+    """
+    SQLite-backed memo of LLM answers with expiry and a size cap.
+
+    Reads never write, so concurrent workers only contend on stores. When the
+    table grows past max_entries the oldest stores are evicted first. Errors
+    are logged and treated as misses; the memo never fails a caller.
+    """
+
+    def __init__(self, path: str, ttl: float, max_entries: int):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+        self._writes_since_prune = 0
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        conn = self._conn()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS llm_memo ("
+            " task TEXT NOT NULL,"
+            " model TEXT NOT NULL,"
+            " version TEXT NOT NULL,"
+            " input TEXT NOT NULL,"
+            " value TEXT NOT NULL,"
+            " stored_at REAL NOT NULL,"
+            " expires_at REAL NOT NULL,"
+            " PRIMARY KEY (task, model, version, input))"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_llm_memo_stored ON llm_memo(stored_at)")
+        conn.commit()
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _count(self, hits: int, misses: int) -> None:
+        with self._lock:
+            self.hits += hits
+            self.misses += misses
+
+    def get_many(self, task: str, version: str, texts: Iterable[str],
+                 model: Optional[str] = None) -> Dict[str, Any]:
+        """Return {normalized input: value} for every unexpired entry found."""
+        keys = list(dict.fromkeys(normalize_memo_input(t) for t in texts))
+        if not keys:
+            return {}
+        found: Dict[str, Any] = {}
+        now = time.time()
+        try:
+            conn = self._conn()
+            for i in range(0, len(keys), _MAX_BATCH):
+                chunk = keys[i:i + _MAX_BATCH]
+                rows = conn.execute(
+                    "SELECT input, value FROM llm_memo"
+                    " WHERE task = ? AND model = ? AND version = ? AND expires_at > ?"
+                    f" AND input IN ({','.join('?' * len(chunk))})",
+                    (task, model or GROQ_MODEL, version, now, *chunk),
+                ).fetchall()
+                for key, value in rows:
+                    found[key] = json.loads(value)
+        except Exception as e:
+            logger.warning("LLM memo read failed for %s: %s", task, e)
+            found = {}
+        self._count(len(found), len(keys) - len(found))
+        return found
+
+    def get(self, task: str, version: str, text: str, model: Optional[str] = None) -> Optional[Any]:
+        """Return the memoized value for one input, or None."""
+        return self.get_many(task, version, [text], model).get(normalize_memo_input(text))
+
+    def set_many(self, task: str, version: str, values: Dict[str, Any],
+                 model: Optional[str] = None) -> None:
+        """Store {input: value} pairs (inputs are normalized here)."""
+        if not values:
+            return
+        now = time.time()
+        rows = [
+            (task, model or GROQ_MODEL, version, normalize_memo_input(text),
+             json.dumps(value, ensure_ascii=False), now, now + self.ttl)
+            for text, value in values.items()
+        ]
+        try:
+            conn = self._conn()
+            conn.executemany(
+                "INSERT OR REPLACE INTO llm_memo"
+                " (task, model, version, input, value, stored_at, expires_at)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+            conn.commit()
+        except Exception as e:
+            logger.warning("LLM memo write failed for %s: %s", task, e)
+            return
+        with self._lock:
+            self.stores += len(rows)
+            self._writes_since_prune += len(rows)
+            prune = self._writes_since_prune >= _PRUNE_EVERY
+            if prune:
+                self._writes_since_prune = 0
+        if prune:
+            self.prune()
+
+    def set(self, task: str, version: str, text: str, value: Any, model: Optional[str] = None) -> None:
+        self.set_many(task, version, {text: value}, model)
+
+    def prune(self) -> None:
+        """Drop expired entries, then the oldest ones beyond max_entries."""
+        try:
+            conn = self._conn()
+            conn.execute("DELETE FROM llm_memo WHERE expires_at <= ?", (time.time(),))
+            overflow = conn.execute("SELECT COUNT(*) FROM llm_memo").fetchone()[0] - self.max_entries
+            if overflow > 0:
+                conn.execute(
+                    "DELETE FROM llm_memo WHERE rowid IN"
+                    " (SELECT rowid FROM llm_memo ORDER BY stored_at ASC LIMIT ?)",
+                    (overflow,),
+                )
+                with self._lock:
+                    self.evictions += overflow
+            conn.commit()
+        except Exception as e:
+            logger.warning("LLM memo prune failed: %s", e)
+
+    def clear(self) -> None:
+        conn = self._conn()
+        conn.execute("DELETE FROM llm_memo")
+        conn.commit()
+
+    def __len__(self) -> int:
+        return self._conn().execute("SELECT COUNT(*) FROM llm_memo").fetchone()[0]
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        try:
+            size = len(self)
+        except Exception:
+            size = None
+        return {
+            "path": self.path,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "stores": self.stores,
+            "evictions": self.evictions,
+            "size": size,
+            "ttl_s": self.ttl,
+        }
+
+
+# ==================== SINGLETON ====================
+
+_llm_memo: Optional[LLMMemoStore] = None
+_llm_memo_lock = threading.Lock()
+
+
+def get_llm_memo() -> Optional[LLMMemoStore]:
+    """Get or open the shared memo store (None when disabled or unavailable)."""
+    global _llm_memo
+    if _llm_memo is None and LLM_MEMO_ENABLED:
+        with _llm_memo_lock:
+            if _llm_memo is None:
+                try:
+                    _llm_memo = LLMMemoStore(LLM_MEMO_PATH, LLM_MEMO_TTL_SECONDS, LLM_MEMO_MAX_ENTRIES)
+                    logger.info("LLM memo store opened (%s, ttl=%ss, max=%s)",
+                                LLM_MEMO_PATH, LLM_MEMO_TTL_SECONDS, LLM_MEMO_MAX_ENTRIES)
+                except Exception as e:
+                    logger.warning("LLM memo store unavailable: %s", e)
+                    return None
+    return _llm_memo
+
+
+def recall(task: str, version: str, text: str) -> Optional[Any]:
+    """Memoized value for text, or None on a miss or when the memo is off."""
+    memo = get_llm_memo()
+    return memo.get(task, version, text) if memo is not None else None
+
+
+def recall_many(task: str, version: str, texts: Iterable[str]) -> Dict[str, Any]:
+    """{normalized input: value} for the texts that are memoized."""
+    memo = get_llm_memo()
+    return memo.get_many(task, version, texts) if memo is not None else {}
+
+
+def remember(task: str, version: str, text: str, value: Any) -> None:
+    memo = get_llm_memo()
+    if memo is not None:
+        memo.set(task, version, text, value)
+
+
+def remember_many(task: str, version: str, values: Dict[str, Any]) -> None:
+    memo = get_llm_memo()
+    if memo is not None:
+        memo.set_many(task, version, values)
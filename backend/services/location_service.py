@@ -0,0 +1,396 @@
+"""
+Offline location matching.
+
+A small gazetteer (data/gazetteer.json: countries, US states, cities,
+boroughs and neighborhoods with a centre and either a bounding box or a
+radius) replaces the per-candidate Groq call in check_location_match:
+
+- The query location is resolved to a Place once per request (LocationFilter);
+  a city name without a state ("Portland") keeps every place of that name.
+- Candidates with coordinates are kept when the point lies inside the place's
+  bounding box or within its radius (haversine); places that belong to a
+  metro area ("Brooklyn" -> "New York", "Palo Alto" -> "Bay Area") also
+  accept points inside the metro.
+- Candidates without coordinates are resolved from their address text and
+  compared by containment of each other's centre.
+- Locations the gazetteer does not know fall back to string heuristics.
+"""
+import json
+import logging
+import math
+import re
+import threading
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from config import GAZETTEER_PATH
+from services.bounded_cache import BoundedCache
+from services.keyword_matcher import KeywordMatcher
+
+logger = logging.getLogger(__name__)
+
+EARTH_RADIUS_KM = 6371.0088
+
+# Higher is more specific; resolution prefers the most specific place found
+KIND_RANK = {"country": 0, "state": 1, "region": 2, "city": 3, "borough": 4, "neighborhood": 5}
+
+# Words users put around a place name ("near times square", "in brooklyn")
+_LEADING_WORDS_RE = re.compile(r"^(?:near|in|around|at|close to|by)\s+")
+
+# Parts that say "close by" rather than name a place ("near me, Boston")
+_GENERIC_PARTS = {"me", "here", "nearby", "around here", "the area", "local", "downtown", "my area"}
+
+
+@dataclass
+class Place:
+    name: str
+    kind: str
+    lat: float
+    lng: float
+    country: str
+    state: Optional[str] = None
+    bbox: Optional[Tuple[float, float, float, float]] = None  # south, west, north, east
+    radius_km: Optional[float] = None
+    metro: Optional[str] = None
+    aliases: List[str] = field(default_factory=list)
+
+    @property
+    def rank(self) -> int:
+        return KIND_RANK.get(self.kind, 0)
+
+    def bounds(self) -> Tuple[float, float, float, float]:
+        """(south, west, north, east): the bbox, or the box around the radius."""
+        if self.bbox is not None:
+            return self.bbox
+        dlat = (self.radius_km or 0.0) / 111.0
+        dlng = dlat / max(0.01, math.cos(math.radians(self.lat)))
+        return self.lat - dlat, self.lng - dlng, self.lat + dlat, self.lng + dlng
+
+    def contains(self, lat: float, lng: float) -> bool:
+        if self.bbox is not None:
+            south, west, north, east = self.bbox
+            return south <= lat <= north and west <= lng <= east
+        return haversine_km(self.lat, self.lng, lat, lng) <= (self.radius_km or 0.0)
+
+
+def haversine_km(lat1: float, lng1: float, lat2: float, lng2: float) -> float:
+    """Great-circle distance in kilometres."""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi = phi2 - phi1
+    dlmb = math.radians(lng2 - lng1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlmb / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+_GEOHASH_BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+
+
+def geohash_encode(lat: float, lng: float, precision: int = 5) -> str:
+    """Standard base32 geohash of a point."""
+    lat_range, lng_range = [-90.0, 90.0], [-180.0, 180.0]
+    chars, bits, bit_count, even = [], 0, 0, True
+    while len(chars) < precision:
+        rng, value = (lng_range, lng) if even else (lat_range, lat)
+        mid = (rng[0] + rng[1]) / 2
+        bits <<= 1
+        if value >= mid:
+            bits |= 1
+            rng[0] = mid
+        else:
+            rng[1] = mid
+        even = not even
+        bit_count += 1
+        if bit_count == 5:
+            chars.append(_GEOHASH_BASE32[bits])
+            bits, bit_count = 0, 0
+    return "".join(chars)
+
+
+def geohash_cell_size(precision: int) -> Tuple[float, float]:
+    """(lat, lng) span in degrees of a geohash cell."""
+    lng_bits = (5 * precision + 1) // 2
+    lat_bits = 5 * precision // 2
+    return 180.0 / (1 << lat_bits), 360.0 / (1 << lng_bits)
+
+
+def geohash_cover(place: "Place", precision: int) -> List[str]:
+    """Geohash cells (at precision) overlapping the place's box or radius."""
+    return geohash_cells(place.bounds(), precision)
+
+
+def geohash_cells(bounds: Tuple[float, float, float, float], precision: int) -> List[str]:
+    """Geohash cells (at precision) overlapping a (south, west, north, east) box."""
+    south, west, north, east = bounds
+    cell_lat, cell_lng = geohash_cell_size(precision)
+    cells = []
+    lat = south
+    while True:
+        lng = west
+        while True:
+            cells.append(geohash_encode(min(lat, north), min(lng, east), precision))
+            if lng >= east:
+                break
+            lng += cell_lng
+        if lat >= north:
+            break
+        lat += cell_lat
+    return sorted(set(cells))
+
+
+def geohash_cover_within(place: "Place", max_cells: int, precisions=(5, 4, 3, 2)) -> Tuple[int, List[str]]:
+    """Finest (precision, cells) covering the place in at most max_cells cells."""
+    south, west, north, east = place.bounds()
+    for precision in precisions:
+        cell_lat, cell_lng = geohash_cell_size(precision)
+        estimate = (math.ceil((north - south) / cell_lat) + 1) * (math.ceil((east - west) / cell_lng) + 1)
+        if estimate > 4 * max_cells:
+            continue
+        cells = geohash_cover(place, precision)
+        if len(cells) <= max_cells:
+            return precision, cells
+    return 0, []
+
+
+def normalize_place_name(text: str) -> str:
+    """Lowercase, drop stray punctuation and collapse whitespace."""
+    text = re.sub(r"[^\w\s,.'-]", " ", (text or "").lower())
+    return re.sub(r"\s+", " ", text).strip()
+
+
+def location_parts(text: str) -> List[str]:
+    """Comma-separated parts of a location, without "near"/"in" and "me"/"nearby" fillers."""
+    parts = []
+    for idx, raw in enumerate(p.strip() for p in normalize_place_name(text).split(",")):
+        part = _LEADING_WORDS_RE.sub("", raw)
+        # A bare "me" after the city is Maine ("Portland, ME"), not "near me"
+        if part and (part not in _GENERIC_PARTS or (idx > 0 and raw == "me")):
+            parts.append(part)
+    return parts
+
+
+class Gazetteer:
+    """Name/alias index over the places in the gazetteer file."""
+
+    def __init__(self, places: List[Place]):
+        self.places = places
+        self._by_name: Dict[str, List[Place]] = {}
+        for place in places:
+            for name in [place.name.lower()] + [a.lower() for a in place.aliases]:
+                self._by_name.setdefault(name, []).append(place)
+        # Free-text scan ("pizza places in brooklyn"); short aliases like "la" only match whole parts
+        self._names = KeywordMatcher(name for name in self._by_name if len(name) >= 4)
+
+    @classmethod
+    def load(cls, path: Path) -> "Gazetteer":
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        places = []
+        for entry in data.get("places", []):
+            bbox = entry.get("bbox")
+            places.append(Place(
+                name=entry["name"],
+                kind=entry.get("kind", "city"),
+                lat=float(entry["lat"]),
+                lng=float(entry["lng"]),
+                country=entry.get("country", ""),
+                state=entry.get("state"),
+                bbox=tuple(bbox) if bbox else None,
+                radius_km=entry.get("radius_km"),
+                metro=entry.get("metro"),
+                aliases=entry.get("aliases", []),
+            ))
+        return cls(places)
+
+    def lookup(self, name: str) -> List[Place]:
+        return self._by_name.get(normalize_place_name(name), [])
+
+    def resolve(self, text: str) -> Optional[Place]:
+        """
+        Most specific place named in a location string.
+
+        Comma-separated parts are looked up whole ("Portland, ME" picks the
+        Maine Portland; a two-letter part after the first is read as a state
+        code). Without any known part, the text is scanned for place names.
+        """
+        parts = location_parts(text)
+        candidates: List[Tuple[int, List[Place]]] = []
+        for idx, part in enumerate(parts):
+            found = self._by_name.get(part, [])
+            if idx > 0 and len(part) == 2:
+                found = [p for p in found if p.kind == "state"]
+            if found:
+                candidates.append((idx, found))
+
+        if not candidates and parts:
+            names = self._names.find_all(" ".join(parts))
+            names = [n for n in names if re.search(r"\b" + re.escape(n) + r"\b", " ".join(parts))]
+            candidates = [(0, self._by_name[n]) for n in names]
+
+        best: Optional[Tuple[int, int, Place]] = None
+        for idx, found in candidates:
+            # States/countries named in the other parts must agree with the pick
+            others = [p for j, places in candidates if j != idx for p in places if p.kind in ("state", "country")]
+            states = {p.state for p in others if p.kind == "state"}
+            countries = {p.country for p in others}
+            for place in found:
+                if states and place.kind != "state" and place.state and place.state not in states:
+                    continue
+                if countries and place.country not in countries:
+                    continue
+                key = (place.rank, -idx)
+                if best is None or key > best[:2]:
+                    best = (place.rank, -idx, place)
+        return best[2] if best else None
+
+    def metro_of(self, place: Place) -> Optional[Place]:
+        if not place.metro:
+            return None
+        found = sorted(self.lookup(place.metro), key=lambda p: p.rank, reverse=True)
+        return found[0] if found else None
+
+
+# ==================== SINGLETON ====================
+
+_gazetteer: Optional[Gazetteer] = None
+_gazetteer_lock = threading.Lock()
+_resolve_cache = BoundedCache("gazetteer_resolve")
+_UNRESOLVED = object()
+
+
+def resolve_gazetteer_path() -> Optional[Path]:
+    """Locate the gazetteer (configured path, then the repo data/ dir)."""
+    candidates = [
+        Path(GAZETTEER_PATH),
+        Path(__file__).resolve().parents[2] / "data" / Path(GAZETTEER_PATH).name,
+    ]
+    for path in candidates:
+        if path.exists():
+            return path
+    return None
+
+
+def get_gazetteer() -> Gazetteer:
+    """Load the gazetteer once (empty if the data file is missing)."""
+    global _gazetteer
+    if _gazetteer is None:
+        with _gazetteer_lock:
+            if _gazetteer is None:
+                path = resolve_gazetteer_path()
+                if path is None:
+                    logger.warning("%s not found; location matching uses string heuristics only", GAZETTEER_PATH)
+                    _gazetteer = Gazetteer([])
+                else:
+                    _gazetteer = Gazetteer.load(path)
+                    logger.info("Loaded gazetteer with %s places from %s", len(_gazetteer.places), path)
+    return _gazetteer
+
+
+def resolve_location(text: str) -> Optional[Place]:
+    """Cached Gazetteer.resolve."""
+    if not text:
+        return None
+    key = normalize_place_name(text)
+    cached = _resolve_cache.get(key)
+    if cached is not None:
+        return None if cached is _UNRESOLVED else cached
+    place = get_gazetteer().resolve(key)
+    _resolve_cache.set(key, _UNRESOLVED if place is None else place)
+    return place
+
+
+def parse_coordinates(coordinates: Any) -> Optional[Tuple[float, float]]:
+    """(lat, lng) from a {"latitude", "longitude"} / {"lat", "lng"} dict or its JSON string."""
+    if isinstance(coordinates, str):
+        try:
+            coordinates = json.loads(coordinates)
+        except Exception:
+            return None
+    if not isinstance(coordinates, dict):
+        return None
+    lat = coordinates.get("latitude", coordinates.get("lat"))
+    lng = coordinates.get("longitude", coordinates.get("lng"))
+    try:
+        return float(lat), float(lng)
+    except (TypeError, ValueError):
+        return None
+
+
+def location_text(location: Any) -> str:
+    """Flatten a restaurant location (dict or string) to "address, city, state, ..."."""
+    if isinstance(location, dict):
+        parts = [str(location[key]) for key in ["address", "city", "state", "zip_code", "country"] if location.get(key)]
+        if not parts:
+            parts = [str(v) for v in location.values() if isinstance(v, (str, int))]
+        return ", ".join(parts)
+    return str(location) if location else ""
+
+
+class LocationFilter:
+    """A query location resolved once, matched against many restaurants."""
+
+    def __init__(self, query_location: str):
+        self.query_location = str(query_location or "")
+        self.place = resolve_location(self.query_location)
+        self.places: List[Place] = []
+        self.areas: List[Place] = []
+        self.parts = location_parts(self.query_location)
+        # "Springfield, IL" resolves only to Illinois; the unknown city must still match by name
+        self.coarse = False
+        if self.place is not None:
+            gazetteer = get_gazetteer()
+            self.places = [self.place]
+            if len(self.parts) == 1:
+                # "Portland" alone could be Oregon or Maine; accept every place of that name
+                self.places += [
+                    p for p in gazetteer.lookup(self.parts[0])
+                    if p is not self.place and p.kind == self.place.kind
+                ]
+            for place in self.places:
+                metro = gazetteer.metro_of(place)
+                self.areas += [place] + ([metro] if metro else [])
+            self.coarse = len(self.parts) > 1 and not gazetteer.lookup(self.parts[0])
+
+    @property
+    def ambiguous(self) -> bool:
+        """True when the query names several places (a city name without a state)."""
+        return len(self.places) > 1
+
+    def matches(self, restaurant_location: Any, coordinates: Any = None) -> bool:
+        """True if the restaurant is in (or near) the query location."""
+        if not self.query_location:
+            return False
+        loc_str = location_text(restaurant_location)
+        if self.place is not None:
+            in_area = self._in_area(loc_str, coordinates)
+            if in_area is not None and not (in_area and self.coarse):
+                return in_area
+            if in_area is False:
+                return False
+        if not loc_str:
+            return False
+        return _string_location_match(self.query_location, loc_str)
+
+    def _in_area(self, loc_str: str, coordinates: Any) -> Optional[bool]:
+        """Containment check against the resolved place, or None if the restaurant can't be placed."""
+        point = parse_coordinates(coordinates)
+        if point is not None:
+            return any(area.contains(*point) for area in self.areas)
+        rest_place = resolve_location(loc_str)
+        if rest_place is None:
+            return None
+        return (
+            any(area.contains(rest_place.lat, rest_place.lng) for area in self.areas)
+            # Only known at a coarser level (e.g. just "New York, NY") -> can't rule it out
+            or any(rest_place.rank < p.rank and rest_place.contains(p.lat, p.lng) for p in self.places)
+        )
+
+
+def _string_location_match(user_location: str, restaurant_location: str) -> bool:
+    """Fallback for locations outside the gazetteer: the user's city as a whole word."""
+    u_city = user_location.lower().split(",")[0].strip()
+    if u_city and re.search(r"\b" + re.escape(u_city) + r"\b", restaurant_location.lower()):
+        logger.debug("String match: '%s' found in '%s'", u_city, restaurant_location)
+        return True
+    logger.debug("No location match: '%s' vs '%s'", user_location, restaurant_location)
+    return False
@@ -1,12 +1,26 @@
 """
 Restaurant and dish recommendation logic.
 """
-from typing import List, Dict, Optional
-import re
-from integrations.embeddings import embed_text, calculate_cosine_similarity
-from services.taste_service import taste_similarity, infer_taste_from_text_hybrid
-from services.restaurant_service import filter_dishes_by_diet, allergy_filter, filter_dishes_by_allergy
+import heapq
+import logging
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+import numpy as np
+from integrations.embeddings import top_n_indices
+from services.taste_service import (
+    favorites_boosts,
+    infer_taste_from_text_hybrid,
+    taste_similarities,
+    taste_similarity,
+)
+from services.restaurant_service import filter_dishes_by_diet
+from services.allergens import allergy_safety, dish_masks_from_metadata
+from services.location_service import LocationFilter, location_text
+from services.search_tokens import query_overlap, tokenize_query
 from config import USE_SEMANTIC_DISH_TASTE
+from middleware.timing import traced
+
+logger = logging.getLogger(__name__)
 
 
 def dish_recommendations_for_restaurant(
@@ -14,7 +28,8 @@ def dish_recommendations_for_restaurant(
     user_taste_vec: List[float],
     diet_type: Optional[str],
     allergies: List[str] = None,
-    top_n: int = 5
+    top_n: int = 5,
+    allergen_masks: Optional[Dict[str, Optional[int]]] = None,
 ) -> List[Dict]:
     """
     Get recommended dishes from a restaurant's menu based on user taste preferences.
@@ -25,6 +40,7 @@ def dish_recommendations_for_restaurant(
         diet_type: Diet filter (veg, non-veg, mix)
         allergies: List of user allergies
         top_n: Number of top dishes to return
+        allergen_masks: Stored allergen masks by dish name, for dishes that do not carry one
     """
     if not menu_items:
         return []
@@ -43,52 +59,48 @@ def dish_recommendations_for_restaurant(
     dish_names = [d.get("name") if isinstance(d, dict) else d for d in dishes]
     filtered_names = filter_dishes_by_diet(dish_names, diet_type)
     
-    # Filter by allergies
+    # Filter by allergies (stored allergen masks where the dishes carry them)
     if allergies:
-        filtered_names = filter_dishes_by_allergy(filtered_names, allergies)
+        stored = dict(allergen_masks or {})
+        stored.update({d.get("name"): d.get("allergens") for d in dishes if isinstance(d.get("allergens"), int)})
+        safe = allergy_safety(
+            {n: stored.get(n) if isinstance(stored.get(n), int) else None for n in filtered_names},
+            allergies,
+        )
+        filtered_names = [n for n in filtered_names if safe.get(n)]
 
     if not filtered_names:
         return []
 
-    # Calculate similarity for each dish
-    dish_scores = []
+    # Taste vectors of the remaining dishes (pre-calculated or calculated on-the-fly)
+    allowed = set(filtered_names)
+    names: List[str] = []
+    taste_vecs: List[List[float]] = []
     for dish in dishes:
         dish_name = dish.get("name") if isinstance(dish, dict) else dish
-        
-        if dish_name not in filtered_names:
+        if dish_name not in allowed:
             continue
-
-        if dish_name not in filtered_names:
-            continue
-
-        # Get taste vector (pre-calculated or calculate on-the-fly)
         if has_taste_vectors and dish.get("taste"):
-            dish_taste_vec = dish["taste"]
+            taste_vecs.append(dish["taste"])
         else:
-            dish_taste_vec = infer_taste_from_text_hybrid(dish_name, semantic=USE_SEMANTIC_DISH_TASTE)
-
-        # Calculate similarity
-        similarity = taste_similarity(user_taste_vec, dish_taste_vec)
-
-        # Handle zero vectors
-        user_sum = sum(abs(x) for x in user_taste_vec)
-        dish_sum = sum(abs(x) for x in dish_taste_vec)
-        if user_sum == 0 or dish_sum == 0:
-            print(f"[DEBUG] Zero vector detected for '{dish_name}': user_sum={user_sum:.2f}, dish_sum={dish_sum:.2f}, defaulting to 50%")
-            print(f"[DEBUG]   user_taste_vec={[round(x, 2) for x in user_taste_vec]}")
-            print(f"[DEBUG]   dish_taste_vec={[round(x, 2) for x in dish_taste_vec]}")
-            similarity = 0.5
-        else:
-            print(f"[DEBUG] Similarity for '{dish_name}': {similarity:.3f} (user_sum={user_sum:.2f}, dish_sum={dish_sum:.2f})")
+            taste_vecs.append(infer_taste_from_text_hybrid(dish_name, semantic=USE_SEMANTIC_DISH_TASTE))
+        names.append(dish_name)
+    if not names:
+        return []
 
-        dish_scores.append({
-            "name": dish_name,
-            "similarity": round(similarity * 100, 1)  # Convert to percentage
-        })
+    # Score every dish in one matrix op; zero vectors default to 50%
+    matrix = np.asarray(taste_vecs, dtype=float)
+    similarities = taste_similarities(user_taste_vec, matrix)
+    dish_sums = np.abs(matrix).sum(axis=1)
+    user_sum = sum(abs(x) for x in user_taste_vec)
+    similarities = np.where((dish_sums == 0) | (user_sum == 0), 0.5, similarities)
+    if logger.isEnabledFor(logging.DEBUG):
+        for dish_name, similarity, dish_sum in zip(names, similarities.tolist(), dish_sums.tolist()):
+            logger.debug("Similarity for '%s': %.3f (user_sum=%.2f, dish_sum=%.2f)", dish_name, similarity, user_sum, dish_sum)
 
-    # Sort by similarity and return top N
-    dish_scores.sort(key=lambda x: x["similarity"], reverse=True)
-    return dish_scores[:top_n]
+    # Top N by the rounded percentage (ties keep menu order)
+    percentages = [round(similarity * 100, 1) for similarity in similarities.tolist()]
+    return [{"name": names[i], "similarity": percentages[i]} for i in top_n_indices(percentages, top_n)]
 
 
 def rank_restaurants(
@@ -147,233 +159,390 @@ def calculate_restaurant_taste_vector(menu_items: List[str]) -> List[float]:
     return avg_taste
 
 
-def filter_and_rank_recommendations(
-    matches: List[Dict],
+def _match_metadata(match) -> Dict:
+    """Metadata of a Pinecone match (dict or SDK object)."""
+    return (match.get("metadata") if isinstance(match, dict) else getattr(match, "metadata", None)) or {}
+
+
+def _recommended_dishes(
+    dishes_json: Optional[str],
+    menu_items: List[str],
+    allergen_masks: Optional[Dict[str, Optional[int]]],
     user_taste_vec: List[float],
-    favorite_dishes: List[Dict],
     diet_type: Optional[str],
     allergies: List[str],
-    max_results: int = 10,
-    query_text: Optional[str] = None,
-    location_filter: Optional[str] = None,
-    cuisine_filter: Optional[str] = None,
-    query_ingredients: Optional[List[str]] = None
 ) -> List[Dict]:
-    """
-    Filter and rank restaurant recommendations from Pinecone matches.
-    """
-    from services.restaurant_service import check_location_match
-    
-    # Pre-process query for keyword matching
-    query_tokens = set()
-    if query_text:
-        # Simple tokenization: remove punctuation, lowercase
-        q_clean = re.sub(r"[^\w\s]", "", query_text.lower())
-        query_tokens = set(q_clean.split())
-        # Remove common stop words
-        stop_words = {"i", "want", "to", "eat", "some", "a", "the", "in", "at", "near", "me", "place", "restaurant", "find", "show", "give", "food", "good", "best", "delicious", "yummy", "looking", "for"}
-        query_tokens = query_tokens - stop_words
-    
-    ranked = []
-    
-    for match in matches:
-        # Extract metadata
-        meta = match.get("metadata") if isinstance(match, dict) else getattr(match, "metadata", {})
+    """Top dishes of a ranked restaurant, from its stored dish taste vectors when it has them."""
+    dishes_with_taste = None
+    if dishes_json:
+        try:
+            import json
+            dishes_with_taste = json.loads(dishes_json)
+        except Exception as e:
+            logger.warning("Failed to parse dishes_json: %s", e)
+            dishes_with_taste = None
+
+    return dish_recommendations_for_restaurant(
+        # Pre-calculated taste vectors, else calculated on-the-fly from the menu
+        dishes_with_taste or menu_items, user_taste_vec, diet_type, allergies, top_n=5, allergen_masks=allergen_masks
+    )
+
+
+# Candidates allergy-screened per batch beyond the results still needed
+SCREENING_MARGIN = 5
+
+@dataclass
+class _Candidate:
+    """A Pinecone match moving through the ranking pipeline."""
+    seq: int  # position across all pages (tie-break)
+    match: Any
+    meta: Dict
+    score: float
+    menu_items: List[str]
+    location: Any = None
+    coordinates: Any = None
+    taste_vec: List[float] = field(default_factory=lambda: [0.0] * 6)
+    dish_masks: Optional[Dict[str, Optional[int]]] = None
+    taste_score: float = 0.0
+    bound: float = 0.0
+    cuisine_match: bool = True
+    screened: bool = False
+    screened_out: int = 0  # dishes the allergy stage removed
+    exact: Optional[float] = None
+
+
+def _json_field(meta: Dict, key: str, json_key: str) -> Any:
+    value = meta.get(key)
+    if value is None:
+        raw = meta.get(json_key)
+        if isinstance(raw, str) and raw:
+            try:
+                import json
+                value = json.loads(raw)
+            except Exception:
+                value = raw
+    return value
+
+
+def _parsed(matches: Iterable, start: int, diet_type: Optional[str], allergies: List[str]) -> Iterator[_Candidate]:
+    """Stage 1: metadata, diet-filtered menu, location, coordinates and taste vector."""
+    for offset, match in enumerate(matches):
+        meta = _match_metadata(match)
         score = float(match.get("score", 0.0)) if isinstance(match, dict) else float(getattr(match, "score", 0.0))
-        
-        # Get menu items
-        menu_items = meta.get("menu_items") or []
-        
+
         # Filter by diet
+        menu_items = meta.get("menu_items") or []
         menu_items_before_diet = len(menu_items)
         menu_items = filter_dishes_by_diet(menu_items, diet_type)
         if not menu_items:
-            print(f"[DEBUG] Filtered out {meta.get('name')} - no dishes match diet: {diet_type} (had {menu_items_before_diet} items)")
+            logger.debug("Filtered out %s - no dishes match diet: %s (had %s items)", meta.get('name'), diet_type, menu_items_before_diet)
             continue
-        
-        # Filter by allergies
+
+        taste = [meta.get(f"taste_{i}") for i in range(6)]
+        taste_vec = [float(t) for t in taste] if all(isinstance(t, (int, float)) for t in taste) else [0.0] * 6
+
+        dish_masks = None
         if allergies:
-            menu_items_before_allergy = len(menu_items)
-            menu_items = filter_dishes_by_allergy(menu_items, allergies)
-            if not menu_items:
-                print(f"[DEBUG] Filtered out {meta.get('name')} - all {menu_items_before_allergy} dishes contain allergies: {allergies}")
-                continue
-        
-        # Parse location and coordinates
-        location = meta.get("location")
-        if location is None:
-            loc_json = meta.get("location_json")
-            if isinstance(loc_json, str) and loc_json:
-                try:
-                    import json
-                    location = json.loads(loc_json)
-                except Exception:
-                    location = loc_json
-        
-        # Filter by location if provided (FIRST PRIORITY)
-        if location_filter and location:
-            loc_str = location
-            if isinstance(location, dict):
-                # Try to extract standard fields or join all values
-                parts = []
-                for key in ["address", "city", "state", "zip_code", "country"]:
-                    if key in location and location[key]:
-                        parts.append(str(location[key]))
-
-                if parts:
-                    loc_str = ", ".join(parts)
-                else:
-                    # Fallback: join all string values
-                    loc_str = ", ".join([str(v) for v in location.values() if isinstance(v, (str, int))])
-
-            # Ensure it's a string
-            if not isinstance(loc_str, str):
-                loc_str = str(loc_str)
-
-            if not check_location_match(location_filter, loc_str):
-                print(f"[DEBUG] Filtered out {meta.get('name')} - location mismatch: {loc_str} vs {location_filter}")
+            stored = dish_masks_from_metadata(meta)
+            dish_masks = {d: stored.get(d) for d in menu_items}
+
+        yield _Candidate(
+            seq=start + offset,
+            match=match,
+            meta=meta,
+            score=score,
+            menu_items=menu_items,
+            location=_json_field(meta, "location", "location_json"),
+            coordinates=_json_field(meta, "coordinates", "coordinates_json"),
+            taste_vec=taste_vec,
+            dish_masks=dish_masks,
+        )
+
+
+def _cheap_filtered(
+    candidates: Iterable[_Candidate],
+    location_matcher: Optional[LocationFilter],
+    cuisine_filter: Optional[str],
+) -> Iterator[_Candidate]:
+    """Stage 2: offline location check; the cuisine check only tags (cuisine_match) for partitioning."""
+    for c in candidates:
+        meta = c.meta
+        if location_matcher and (c.location or c.coordinates):
+            loc_str = location_text(c.location)
+            if not location_matcher.matches(loc_str, c.coordinates):
+                logger.debug("Filtered out %s - location mismatch: %s vs %s", meta.get('name'), loc_str, location_matcher.query_location)
                 continue
-            else:
-                print(f"[DEBUG] Location match for {meta.get('name')}: {loc_str}")
-        
-        # Filter by cuisine type if provided
+            logger.debug("Location match for %s: %s", meta.get('name'), loc_str)
+
         if cuisine_filter:
             cuisine_types = meta.get("cuisine_types", [])
             if isinstance(cuisine_types, str):
                 try:
                     import json
                     cuisine_types = json.loads(cuisine_types)
-                except:
+                except Exception:
                     cuisine_types = [cuisine_types]
-            
             # Check if any cuisine matches (case-insensitive)
-            cuisine_match = False
-            if cuisine_types:
-                for cuisine in cuisine_types:
-                    if isinstance(cuisine, str) and cuisine_filter.lower() in cuisine.lower():
-                        cuisine_match = True
-                        break
-            
-            if not cuisine_match:
-                print(f"[DEBUG] Filtered out {meta.get('name')} - cuisine mismatch: {cuisine_types} vs {cuisine_filter}")
+            wanted = cuisine_filter.lower()
+            c.cuisine_match = any(isinstance(cuisine, str) and wanted in cuisine.lower() for cuisine in cuisine_types or [])
+            logger.debug("Cuisine %s for %s: %s vs %s", "match" if c.cuisine_match else "mismatch", meta.get('name'), cuisine_types, cuisine_filter)
+        yield c
+
+
+def _screened(candidates: List[_Candidate], allergies: List[str], batch_size: int) -> Iterator[_Candidate]:
+    """
+    Stage 3: allergy filter, on demand in the given order.
+
+    Unannotated dishes are screened one batch of candidates at a time (one
+    cached, batched pass per batch), so stopping early skips the rest.
+    Candidates screened by an earlier pass keep their result.
+    """
+    if not allergies:
+        yield from candidates
+        return
+    for pos in range(0, len(candidates), batch_size):
+        batch = candidates[pos:pos + batch_size]
+        unannotated = {d: None for c in batch if not c.screened for d, mask in c.dish_masks.items() if mask is None}
+        if unannotated:
+            allergy_safety(unannotated, allergies)
+        for c in batch:
+            if c.screened:
+                if c.menu_items:
+                    yield c
                 continue
-            else:
-                print(f"[DEBUG] Cuisine match for {meta.get('name')}: {cuisine_types}")
-        
-        coordinates = meta.get("coordinates")
-        if coordinates is None:
-            coords_json = meta.get("coordinates_json")
-            if isinstance(coords_json, str) and coords_json:
-                try:
-                    import json
-                    coordinates = json.loads(coords_json)
-                except Exception:
-                    coordinates = coords_json
-        
-        # Get taste vector
-        taste_vec = None
+            c.screened = True
+            menu_items_before_allergy = len(c.menu_items)
+            safe = allergy_safety({d: c.dish_masks.get(d) for d in c.menu_items}, allergies)
+            c.menu_items = [d for d in c.menu_items if safe.get(d)]
+            c.screened_out = menu_items_before_allergy - len(c.menu_items)
+            if not c.menu_items:
+                logger.debug("Filtered out %s - all %s dishes contain allergies: %s", c.meta.get('name'), menu_items_before_allergy, allergies)
+                continue
+            yield c
+
+
+def _pages(matches: List, more_matches: Optional[Iterable[List]]) -> Iterator[List]:
+    """The first page, then further pages on demand (best effort: a failed fetch ends the stream)."""
+    yield matches
+    if more_matches is None:
+        return
+    pages = iter(more_matches)
+    while True:
         try:
-            t0 = meta.get("taste_0")
-            t1 = meta.get("taste_1")
-            t2 = meta.get("taste_2")
-            t3 = meta.get("taste_3")
-            t4 = meta.get("taste_4")
-            t5 = meta.get("taste_5")
-            if all(isinstance(x, (int, float)) for x in [t0, t1, t2, t3, t4, t5]):
-                taste_vec = [float(t0), float(t1), float(t2), float(t3), float(t4), float(t5)]
-        except Exception:
-            taste_vec = None
-        
-        if not taste_vec:
-            taste_vec = [0.0] * 6
-        
-        # Calculate scores
-        from services.taste_service import favorites_boost
-        tscore = taste_similarity(user_taste_vec, taste_vec)
-        boost = favorites_boost(menu_items, favorite_dishes)
-        
-        # Calculate query relevance boost
-        query_boost = 0.0
-        ingredient_boost = 0.0
-        
-        if query_tokens:
-            # Check menu items
-            menu_text = " ".join(menu_items).lower()
-            # Check popular dishes
-            pop_dishes = meta.get("popular_dishes") or []
-            if isinstance(pop_dishes, list):
-                pop_text = " ".join([str(p) for p in pop_dishes]).lower()
-            else:
-                pop_text = ""
-            
-            # Check name and cuisine
-            name_text = (meta.get("name") or "").lower()
-            cuisine_text = " ".join(meta.get("cuisine_types") or []).lower()
-            
-            full_text = menu_text + " " + pop_text + " " + name_text + " " + cuisine_text
-            full_text_clean = re.sub(r"[^\w\s]", "", full_text)
-            restaurant_tokens = set(full_text_clean.split())
-            
-            overlap = len(query_tokens.intersection(restaurant_tokens))
-            if overlap > 0:
-                query_boost = 0.5 + (0.2 * overlap)
-        
-        # Calculate ingredient-based boost
-        if query_ingredients:
-            # Check if any menu items contain the requested ingredients
-            menu_text_lower = " ".join(menu_items).lower()
-            matched_ingredients = sum(1 for ing in query_ingredients if ing in menu_text_lower)
-            if matched_ingredients > 0:
-                ingredient_boost = 0.3 * matched_ingredients  # Boost by 0.3 per ingredient match
-                print(f"[DEBUG] Restaurant '{meta.get('name')}' has {matched_ingredients} matching ingredients: boost={ingredient_boost}")
-
-        combined = score + 0.35 * tscore + boost + query_boost + ingredient_boost
-        
-        # Get recommended dishes
-        # Check if metadata has pre-calculated dish taste vectors (stored as JSON)
-        dishes_with_taste = None
-        dishes_json = meta.get("dishes_json")
-        if dishes_json:
-            try:
-                import json
-                dishes_with_taste = json.loads(dishes_json)
-            except Exception as e:
-                print(f"[WARNING] Failed to parse dishes_json: {e}")
-                dishes_with_taste = None
-
-        if dishes_with_taste:
-            # Use pre-calculated taste vectors
-            recommended_dishes = dish_recommendations_for_restaurant(
-                dishes_with_taste, user_taste_vec, diet_type, top_n=5
-            )
-        else:
-            # Fallback to calculating on-the-fly
-            recommended_dishes = dish_recommendations_for_restaurant(
-                menu_items, user_taste_vec, diet_type, top_n=5
-            )
-        
-        # Build restaurant object
+            page = next(pages)
+        except StopIteration:
+            return
+        except Exception as e:
+            logger.warning("Fetching more matches failed: %s", e)
+            return
+        yield page
+
+
+def _query_terms(c: _Candidate, query_tokens: set, query_ingredients: Optional[List[str]]) -> Tuple[int, int]:
+    """(query tokens found in the restaurant's text, requested ingredients on its menu)."""
+    # Menu items, popular dishes, name and cuisine (precomputed tokens when stored)
+    overlap = query_overlap(query_tokens, c.meta, c.menu_items)
+    matched_ingredients = 0
+    if query_ingredients:
+        # Check if any menu items contain the requested ingredients
+        menu_text_lower = " ".join(c.menu_items).lower()
+        matched_ingredients = sum(1 for ing in query_ingredients if ing in menu_text_lower)
+    return overlap, matched_ingredients
+
+
+def _combined_scores(
+    candidates: List[_Candidate],
+    favorite_dishes: List[Dict],
+    query_tokens: set,
+    query_ingredients: Optional[List[str]],
+) -> np.ndarray:
+    """
+    semantic + 0.35 * taste + favorites + query (0.5 + 0.2 per overlapping
+    token) + 0.3 per requested ingredient, for all candidates at once.
+    """
+    terms = np.asarray([_query_terms(c, query_tokens, query_ingredients) for c in candidates], dtype=float).reshape(-1, 2)
+    overlap_arr, ingredient_arr = terms[:, 0], terms[:, 1]
+    query_boosts = np.where(overlap_arr > 0, 0.5 + (0.2 * overlap_arr), 0.0)
+    ingredient_boosts = 0.3 * ingredient_arr
+    return (
+        np.asarray([c.score for c in candidates], dtype=float)
+        + 0.35 * np.asarray([c.taste_score for c in candidates], dtype=float)
+        + favorites_boosts([c.menu_items for c in candidates], favorite_dishes)
+        + query_boosts
+        + ingredient_boosts
+    )
+
+
+def _accepted(
+    candidates: List[_Candidate],
+    max_results: int,
+    allergies: List[str],
+    favorite_dishes: List[Dict],
+    query_tokens: set,
+    query_ingredients: Optional[List[str]],
+) -> List[_Candidate]:
+    """
+    Allergy stage over candidates in bound order, stopping once max_results
+    are accepted and no remaining bound can beat them (each gets c.exact).
+    """
+    ordered = [candidates[i] for i in top_n_indices([c.bound for c in candidates], len(candidates))]
+    accepted: List[_Candidate] = []
+    best: List[float] = []  # min-heap of the max_results best accepted scores
+    for c in _screened(ordered, allergies, max_results + SCREENING_MARGIN):
+        if len(best) >= max_results and best[0] > c.bound:
+            break
+        if c.exact is None:
+            c.exact = float(_combined_scores([c], favorite_dishes, query_tokens, query_ingredients)[0]) if c.screened_out else c.bound
+        accepted.append(c)
+        heapq.heappush(best, c.exact)
+        if len(best) > max_results:
+            heapq.heappop(best)
+    return accepted
+
+
+def _rank_partitions(
+    matches: List[Dict],
+    user_taste_vec: List[float],
+    favorite_dishes: List[Dict],
+    diet_type: Optional[str],
+    allergies: List[str],
+    max_results: int,
+    query_text: Optional[str],
+    location_filter: Optional[str],
+    cuisine_filter: Optional[str],
+    query_ingredients: Optional[List[str]],
+    more_matches: Optional[Iterable[List[Dict]]],
+    cuisine_fallback: bool,
+) -> Tuple[List[Dict], bool]:
+    """Shared pipeline of the two public rankers; returns (ranked, cuisine matched)."""
+    # Resolve the query location once; candidates are then matched offline
+    location_matcher = LocationFilter(location_filter) if location_filter else None
+
+    # Pre-process query for keyword matching: remove punctuation, lowercase, drop stop words
+    query_tokens = tokenize_query(query_text)
+
+    pool: List[_Candidate] = []
+    accepted: List[_Candidate] = []
+    seen = 0
+    for page in _pages(matches, more_matches):
+        candidates = list(_cheap_filtered(_parsed(page, seen, diet_type, allergies), location_matcher, cuisine_filter))
+        seen += len(page)
+        if not candidates:
+            continue
+
+        taste_scores = taste_similarities(user_taste_vec, [c.taste_vec for c in candidates]).tolist()
+        for c, taste_score in zip(candidates, taste_scores):
+            c.taste_score = taste_score
+        bounds = _combined_scores(candidates, favorite_dishes, query_tokens, query_ingredients)
+        for c, bound in zip(candidates, bounds.tolist()):
+            c.bound = bound
+        pool.extend(candidates)
+
+        accepted = _accepted([c for c in pool if c.cuisine_match], max_results, allergies, favorite_dishes, query_tokens, query_ingredients)
+        if len(accepted) >= max_results:
+            break
+        if cuisine_filter and cuisine_fallback and not accepted:
+            # Stop paging for the cuisine once the other cuisines can fill the results
+            others = [c for c in pool if not c.cuisine_match]
+            fallback = _accepted(others, max_results, allergies, favorite_dishes, query_tokens, query_ingredients) if len(others) >= max_results else []
+            if len(fallback) >= max_results:
+                break
+        logger.debug("%s of %s restaurants passed the filters, pulling more matches", len(accepted), max_results)
+
+    cuisine_matched = bool(accepted) or not cuisine_filter
+    if not cuisine_matched and cuisine_fallback:
+        # Everything already parsed, scored and screened is reused
+        logger.debug("No %s restaurants passed the filters, ranking the other cuisines", cuisine_filter)
+        accepted = _accepted([c for c in pool if not c.cuisine_match], max_results, allergies, favorite_dishes, query_tokens, query_ingredients)
+    if not accepted:
+        return [], cuisine_matched
+
+    # Top N (ties keep match order); per-dish work only for the restaurants returned
+    accepted.sort(key=lambda c: c.seq)
+    ranked = []
+    for idx in top_n_indices([c.exact for c in accepted], max_results):
+        c = accepted[idx]
+        meta = c.meta
         ranked.append({
-            "id": match.get("id") if isinstance(match, dict) else getattr(match, "id", None),
+            "id": c.match.get("id") if isinstance(c.match, dict) else getattr(c.match, "id", None),
             "name": meta.get("name"),
             "url": meta.get("url"),
             "avg_rating": meta.get("avg_rating"),
             "price_range": meta.get("price_range"),
             "cuisine_types": meta.get("cuisine_types"),
-            "location": location,
-            "coordinates": coordinates,
-            "menu_items": menu_items,
+            "location": c.location,
+            "coordinates": c.coordinates,
+            "menu_items": c.menu_items,
             "popular_dishes": meta.get("popular_dishes"),
-            "taste_vector": taste_vec,
-            "recommended_dishes": recommended_dishes,
+            "taste_vector": c.taste_vec,
             "photos": meta.get("photos"),
             "menu_url": meta.get("menu_url"),
-            "score": combined
+            "recommended_dishes": _recommended_dishes(
+                meta.get("dishes_json"), c.menu_items, c.dish_masks, user_taste_vec, diet_type, allergies
+            ),
+            "score": c.exact,
         })
-    
-    # Sort by score
-    ranked.sort(key=lambda x: x.get("score", 0.0), reverse=True)
-    
-    # Limit results
-    return ranked[:max_results]
+    return ranked, cuisine_matched
+
+
+@traced("rank")
+def filter_and_rank_recommendations(
+    matches: List[Dict],
+    user_taste_vec: List[float],
+    favorite_dishes: List[Dict],
+    diet_type: Optional[str],
+    allergies: List[str],
+    max_results: int = 10,
+    query_text: Optional[str] = None,
+    location_filter: Optional[str] = None,
+    cuisine_filter: Optional[str] = None,
+    query_ingredients: Optional[List[str]] = None,
+    more_matches: Optional[Iterable[List[Dict]]] = None,
+) -> List[Dict]:
+    """
+    Filter and rank restaurant recommendations from Pinecone matches.
+
+    Each page of matches streams through parse/diet, then the cheap offline
+    filters (location, cuisine). Survivors are scored in one batch; that score
+    is an upper bound, since the allergy filter can only remove dishes (and with
+    them favorites/query/ingredient hits). The allergy stage then runs on demand
+    in bound order and stops once max_results restaurants are accepted and no
+    remaining bound can beat them, so the result is the same as ranking every
+    candidate. If a page runs out first, the next one is pulled from
+    more_matches (e.g. pinecone_client.query_pinecone_pages).
+    """
+    ranked, _ = _rank_partitions(
+        matches, user_taste_vec, favorite_dishes, diet_type, allergies, max_results, query_text,
+        location_filter, cuisine_filter, query_ingredients, more_matches, cuisine_fallback=False,
+    )
+    return ranked
+
 
+@traced("rank")
+def filter_and_rank_with_cuisine_fallback(
+    matches: List[Dict],
+    user_taste_vec: List[float],
+    favorite_dishes: List[Dict],
+    diet_type: Optional[str],
+    allergies: List[str],
+    max_results: int = 10,
+    query_text: Optional[str] = None,
+    location_filter: Optional[str] = None,
+    cuisine_filter: Optional[str] = None,
+    query_ingredients: Optional[List[str]] = None,
+    more_matches: Optional[Iterable[List[Dict]]] = None,
+) -> Tuple[List[Dict], bool]:
+    """
+    filter_and_rank_recommendations that falls back to the other cuisines
+    when no restaurant of cuisine_filter passes the filters.
+
+    Cuisine splits the candidates into two partitions instead of filtering
+    them, so the fallback reuses all per-candidate work. While no cuisine
+    match is accepted, no more pages are pulled once the other cuisines can
+    fill max_results. Returns (ranked,
+    cuisine_matched); cuisine_matched is False when the fallback was used.
+    """
+    return _rank_partitions(
+        matches, user_taste_vec, favorite_dishes, diet_type, allergies, max_results, query_text,
+        location_filter, cuisine_filter, query_ingredients, more_matches, cuisine_fallback=True,
+    )
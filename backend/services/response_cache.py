@@ -0,0 +1,268 @@
+"""
+Response cache for whole chat responses.
+
+Near-identical queries from users with the same profile produce the same
+recommendations, so the final /api/chat payload is cached under a key built
+from the normalized query, location, diet, allergies, favorites and a
+bucketed taste vector (see chat_cache_key).
+
+Backends store JSON strings with a TTL (the same get/setex shape as Redis):
+- "memory": in-process LRU (per worker)
+- "sqlite": local SQLite file shared by all workers on a host
+- "none":   caching disabled
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import re
+import sqlite3
+import threading
+import time
+from typing import Optional, Dict, Any, List, Tuple
+
+from config import (
+    RESPONSE_CACHE_BACKEND,
+    RESPONSE_CACHE_TTL_SECONDS,
+    RESPONSE_CACHE_MAX_ENTRIES,
+    RESPONSE_CACHE_PATH,
+    RESPONSE_CACHE_TASTE_STEP,
+)
+from services.bounded_cache import BoundedCache
+
+logger = logging.getLogger(__name__)
+
+
+class InProcessCacheBackend:
+    """LRU with per-entry expiry (a BoundedCache). Thread-safe."""
+
+    blocking = False
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._cache = BoundedCache("response_cache", max_entries=max_entries, ttl=None, register=False)
+
+    @property
+    def evictions(self) -> int:
+        return self._cache.evictions
+
+    def get(self, key: str) -> Optional[Tuple[str, float]]:
+        """Return (value, stored_at) or None if missing/expired."""
+        return self._cache.get_entry(key)
+
+    def set(self, key: str, value: str, ttl: float) -> None:
+        self._cache.set(key, value, ttl=ttl)
+
+    def clear(self) -> None:
+        self._cache.clear()
+
+    def __len__(self) -> int:
+        return len(self._cache)
+
+
+class SQLiteCacheBackend:
+    """
+    SQLite-backed LRU with expiry, shared across worker processes on one host.
+
+    Calls block on disk I/O, so ResponseCache runs them in a worker thread.
+    """
+
+    blocking = True
+
+    def __init__(self, path: str, max_entries: int):
+        self.path = path
+        self.max_entries = max_entries
+        self.evictions = 0
+        self._local = threading.local()
+        conn = self._conn()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS response_cache ("
+            " key TEXT PRIMARY KEY,"
+            " value TEXT NOT NULL,"
+            " stored_at REAL NOT NULL,"
+            " expires_at REAL NOT NULL,"
+            " last_access REAL NOT NULL)"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_response_cache_access ON response_cache(last_access)")
+        conn.commit()
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: str) -> Optional[Tuple[str, float]]:
+        now = time.time()
+        conn = self._conn()
+        row = conn.execute(
+            "SELECT value, stored_at, expires_at FROM response_cache WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        value, stored_at, expires_at = row
+        if expires_at <= now:
+            conn.execute("DELETE FROM response_cache WHERE key = ?", (key,))
+            conn.commit()
+            return None
+        conn.execute("UPDATE response_cache SET last_access = ? WHERE key = ?", (now, key))
+        conn.commit()
+        return value, stored_at
+
+    def set(self, key: str, value: str, ttl: float) -> None:
+        now = time.time()
+        conn = self._conn()
+        conn.execute(
+            "INSERT OR REPLACE INTO response_cache (key, value, stored_at, expires_at, last_access)"
+            " VALUES (?, ?, ?, ?, ?)",
+            (key, value, now, now + ttl, now),
+        )
+        conn.execute("DELETE FROM response_cache WHERE expires_at <= ?", (now,))
+        overflow = conn.execute("SELECT COUNT(*) FROM response_cache").fetchone()[0] - self.max_entries
+        if overflow > 0:
+            conn.execute(
+                "DELETE FROM response_cache WHERE key IN"
+                " (SELECT key FROM response_cache ORDER BY last_access ASC LIMIT ?)",
+                (overflow,),
+            )
+            self.evictions += overflow
+        conn.commit()
+
+    def clear(self) -> None:
+        conn = self._conn()
+        conn.execute("DELETE FROM response_cache")
+        conn.commit()
+
+    def __len__(self) -> int:
+        return self._conn().execute("SELECT COUNT(*) FROM response_cache").fetchone()[0]
+
+
+class ResponseCache:
+    """Async front for a cache backend, with hit/miss counters."""
+
+    def __init__(self, backend, ttl: float):
+        self.backend = backend
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+
+    async def _call(self, fn, *args):
+        if self.backend.blocking:
+            return await asyncio.to_thread(fn, *args)
+        return fn(*args)
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        Return the cached response annotated with cache metadata, or None.
+
+        Backend errors count as misses; the cache never fails a request.
+        """
+        try:
+            entry = await self._call(self.backend.get, key)
+        except Exception as e:
+            logger.warning("Response cache read failed: %s", e)
+            entry = None
+        if entry is None:
+            self.misses += 1
+            return None
+        value, stored_at = entry
+        self.hits += 1
+        response = json.loads(value)
+        response["cache"] = {"hit": True, "age_s": round(time.time() - stored_at, 1)}
+        return response
+
+    async def set(self, key: str, response: Dict[str, Any]) -> None:
+        """Store a response (without per-request annotations)."""
+        payload = {k: v for k, v in response.items() if k not in {"cache", "timing"}}
+        try:
+            await self._call(self.backend.set, key, json.dumps(payload, ensure_ascii=False), self.ttl)
+            self.stores += 1
+        except Exception as e:
+            logger.warning("Response cache write failed: %s", e)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        try:
+            size = len(self.backend)
+        except Exception:
+            size = None
+        return {
+            "backend": type(self.backend).__name__,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "stores": self.stores,
+            "evictions": self.backend.evictions,
+            "size": size,
+            "ttl_s": self.ttl,
+        }
+
+
+# ==================== CACHE KEYS ====================
+
+_PUNCT_RE = re.compile(r"[^\w\s]")
+_SPACE_RE = re.compile(r"\s+")
+
+
+def normalize_query_text(text: Optional[str]) -> str:
+    """Lowercase, drop punctuation and collapse whitespace."""
+    text = _PUNCT_RE.sub(" ", (text or "").lower())
+    return _SPACE_RE.sub(" ", text).strip()
+
+
+def taste_bucket(taste_vec: List[float], step: float = RESPONSE_CACHE_TASTE_STEP) -> List[float]:
+    """Quantize a taste vector so near-identical profiles share cache entries."""
+    return [round(round(float(x) / step) * step, 4) for x in (taste_vec or [])]
+
+
+def chat_cache_key(
+    query: str,
+    location: Optional[str],
+    diet_type: Optional[str],
+    allergies: List[str],
+    taste_vec: List[float],
+    favorite_dishes: Optional[List[Dict[str, Any]]] = None,
+    max_results: Optional[int] = None,
+) -> str:
+    """Hash of everything that determines a chat response for a given profile."""
+    favorites = sorted(
+        normalize_query_text(d.get("name") if isinstance(d, dict) else str(d))
+        for d in (favorite_dishes or [])
+    )
+    material = {
+        "q": normalize_query_text(query),
+        "loc": normalize_query_text(location),
+        "diet": (diet_type or "mix").lower(),
+        "allergies": sorted({a.strip().lower() for a in (allergies or []) if a}),
+        "taste": taste_bucket(taste_vec),
+        "fav": favorites,
+        "n": max_results,
+    }
+    blob = json.dumps(material, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+
+# ==================== SINGLETON ====================
+
+_response_cache: Optional[ResponseCache] = None
+
+
+def get_response_cache() -> Optional[ResponseCache]:
+    """Get or initialize the configured response cache (None when disabled)."""
+    global _response_cache
+    if _response_cache is None:
+        backend_name = (RESPONSE_CACHE_BACKEND or "none").lower()
+        if backend_name == "memory":
+            backend = InProcessCacheBackend(RESPONSE_CACHE_MAX_ENTRIES)
+        elif backend_name == "sqlite":
+            backend = SQLiteCacheBackend(RESPONSE_CACHE_PATH, RESPONSE_CACHE_MAX_ENTRIES)
+        else:
+            return None
+        _response_cache = ResponseCache(backend, RESPONSE_CACHE_TTL_SECONDS)
+        logger.info("Response cache enabled (%s, ttl=%ss, max=%s)",
+                    backend_name, RESPONSE_CACHE_TTL_SECONDS, RESPONSE_CACHE_MAX_ENTRIES)
+    return _response_cache
@@ -1,31 +1,46 @@
 """
 Dish extraction, classification, and filtering utilities.
 """
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Optional, Dict, Tuple
 import re
 import json
-from groq import Groq
-from config import GROQ_API_KEY
+from integrations.groq_client import chat_completion, achat_completion
+from models import ParsedQuery
+from middleware.timing import traced
+from config import DISH_CLASSIFIER_MIN_CONFIDENCE
+from services.bounded_cache import BoundedCache
+from services.dish_classifier import get_dish_classifier
+from services.intent_router import IntentRoute, get_intent_router
+from services.keyword_matcher import KeywordMatcher, keyword_matcher
+from services.location_service import LocationFilter
+from services.llm_memo import normalize_memo_input, recall, recall_many, remember, remember_many
 
+logger = logging.getLogger(__name__)
 
-# Global Groq client
-_groq_client = None
 
 # Cache for dish diet classification
-_dish_diet_cache: Dict[str, str] = {}
+_dish_diet_cache = BoundedCache("dish_diet")
 
 # Cache for dish validation
-_dish_validation_cache: Dict[str, bool] = {}
+_dish_validation_cache = BoundedCache("dish_validation", max_entries=50000)
 
+# Prompt versions for the persistent LLM memo; bump when a prompt changes
+DISH_DIET_PROMPT_VERSION = "v2"
+DISH_VALIDATION_PROMPT_VERSION = "v1"
+DISH_EXTRACTION_PROMPT_VERSION = "v1"
+ALLERGY_PROMPT_VERSION = "v1"
 
-def get_groq_client():
-    """Get or initialize Groq client."""
-    global _groq_client
-    if _groq_client is None:
-        if not GROQ_API_KEY:
-            raise ValueError("GROQ_API_KEY not set")
-        _groq_client = Groq(api_key=GROQ_API_KEY)
-    return _groq_client
+# (normalized dish, allergen) -> safe
+_allergy_cache = BoundedCache("allergy_safety", max_entries=50000)
+
+_ALLERGY_LINE_RE = re.compile(r"(\d+)\s*[:.)\-]\s*(.*)")
+
+# Dishes per screening call, and how many calls run at once
+ALLERGY_BATCH_SIZE = 40
+ALLERGY_PARALLEL_BATCHES = 4
 
 
 # Non-vegetarian keywords for filtering
@@ -34,12 +49,12 @@ NON_VEG_KEYWORDS = [
     "crab", "lobster", "meat", "bacon", "sausage", "ham", "turkey", "duck",
     "egg", "eggs", "omelette", "omelet", "seafood", "salmon", "tuna"
 ]
+_NON_VEG_MATCHER = KeywordMatcher(NON_VEG_KEYWORDS)
 
 
 def is_nonveg_text(text: str) -> bool:
     """Check if text contains non-vegetarian keywords."""
-    text_lower = text.lower()
-    return any(keyword in text_lower for keyword in NON_VEG_KEYWORDS)
+    return _NON_VEG_MATCHER.contains_any(text)
 
 
 def filter_dishes_by_diet(dishes: List[str], diet_type: Optional[str]) -> List[str]:
@@ -73,7 +88,6 @@ def detect_diet_from_query(query: str) -> Optional[str]:
 
     # Use Groq for complex queries
     try:
-        client = get_groq_client()
         prompt = f"""Analyze the dietary preference in this query.
 Query: "{query}"
 
@@ -84,20 +98,13 @@ Rules:
 
 Response (only "veg", "non-veg", or "none"):"""
 
-        completion = client.chat.completions.create(
-            messages=[{"role": "user", "content": prompt}],
-            model="llama-3.3-70b-versatile",
-            temperature=0,
-            max_tokens=10
-        )
-
-        result = completion.choices[0].message.content.strip().lower()
+        result = chat_completion(prompt, temperature=0, max_tokens=10).lower()
         if result in ["veg", "non-veg"]:
             return result
 
         return None
     except Exception as e:
-        print(f"[ERROR] Diet detection failed: {e}")
+        logger.error("Diet detection failed: %s", e)
         return None
 
 
@@ -109,148 +116,292 @@ def allergy_filter(menu_items: List[str], allergies: List[str]) -> bool:
     if not allergies:
         return True
 
-    menu_text = " ".join(menu_items).lower()
-    for allergen in allergies:
-        if allergen.lower() in menu_text:
-            return False
-
-    return True
-
-
-def filter_dishes_by_allergy(dishes: List[str], allergies: List[str]) -> List[str]:
-    """
-    Filter dishes that are safe for the given allergies using Groq.
-    """
-    if not dishes or not allergies:
-        return dishes
-
-    try:
-        client = get_groq_client()
-        safe_dishes = []
-        batch_size = 50
+    return not keyword_matcher(allergies).contains_any(" ".join(menu_items))
 
-        for i in range(0, len(dishes), batch_size):
-            batch = dishes[i:i+batch_size]
 
-            dishes_text = "\n".join([f"{idx+1}. {d}" for idx, d in enumerate(batch)])
-            allergies_text = ", ".join(allergies)
-
-            prompt = f"""Identify which of these dishes are SAFE for someone with these allergies: {allergies_text}.
+def _allergy_prompt(dishes: List[str], allergens: List[str]) -> str:
+    """Build the batched allergen screening prompt for a numbered list of dishes."""
+    dishes_text = "\n".join(f"{idx + 1}. {d}" for idx, d in enumerate(dishes))
+    return f"""For each dish, list which of these allergens it likely contains: {", ".join(allergens)}.
 
 Rules:
 1. Analyze the likely ingredients of each dish.
-2. If a dish likely contains an allergen (e.g. "Pesto" contains nuts/dairy, "Carbonara" contains egg/dairy/pork), exclude it.
+2. If a dish likely contains an allergen (e.g. "Pesto" contains nuts/dairy, "Carbonara" contains egg/dairy/pork), list it.
 3. Be strict. Safety first.
-4. Return ONLY the numbers of the SAFE dishes.
-5. Return comma-separated numbers (e.g. "1,3,5").
-6. If none are safe, return "none".
+4. Answer one line per dish: "<number>: none" if it contains none of them, otherwise "<number>: <allergen>, <allergen>" using the allergen names given above.
 
 List:
 {dishes_text}
 
 Response:"""
 
-            completion = client.chat.completions.create(
-                messages=[{"role": "user", "content": prompt}],
-                model="llama-3.3-70b-versatile",
-                temperature=0,
-                max_tokens=100
-            )
 
-            result = completion.choices[0].message.content.strip().lower()
+def _contained_allergens(answer: str, allergens: List[str]) -> set:
+    """Map the model's comma-separated allergen answer onto the allergens asked about."""
+    items = [i.strip().strip('".') for i in answer.split(",")]
+    items = [i for i in items if i and i not in {"none", "safe"}]
+    contained = set()
+    for allergen in allergens:
+        for item in items:
+            # Exact names first, so "shellfish" does not also flag "fish"
+            if item == allergen or (item not in allergens and (allergen in item or item in allergen)):
+                contained.add(allergen)
+                break
+    return contained
 
-            if result == "none":
-                continue
 
-            try:
-                indices = [int(x.strip()) - 1 for x in result.split(',') if x.strip().isdigit()]
-                for idx in indices:
-                    if 0 <= idx < len(batch):
-                        safe_dishes.append(batch[idx])
-            except Exception:
-                # Fallback
-                for d in batch:
-                    if allergy_filter(d, allergies):
-                        safe_dishes.append(d)
+def _screen_allergy_batch(dishes: List[str], allergens: List[str]) -> Dict[str, Dict[str, bool]]:
+    """
+    Ask Groq which allergens each dish contains (one call).
 
-        return safe_dishes
+    Returns {dish: {allergen: safe}} for the dishes the model answered.
+    """
+    result = chat_completion(
+        _allergy_prompt(dishes, allergens), temperature=0, max_tokens=12 * len(dishes) + 20
+    ).lower()
+    verdicts: Dict[str, Dict[str, bool]] = {}
+    for line in result.splitlines():
+        match = _ALLERGY_LINE_RE.match(line.strip())
+        if not match:
+            continue
+        idx = int(match.group(1)) - 1
+        if not 0 <= idx < len(dishes):
+            continue
+        contained = _contained_allergens(match.group(2), allergens)
+        verdicts[dishes[idx]] = {a: a not in contained for a in allergens}
+    return verdicts
+
+
+def detect_dish_allergens(dishes, allergens: List[str]) -> Dict[str, Optional[set]]:
+    """
+    Work out which of the given allergens each dish contains.
 
-    except Exception as e:
-        print(f"[ERROR] Groq allergy filter failed: {e}")
-        # Fallback
-        return [d for d in dishes if allergy_filter(d, allergies)]
+    Unique dish names are looked up per (dish, allergen) in the in-process
+    cache and the persistent LLM memo; only dishes with an unknown pair go to
+    Groq, in batches of ALLERGY_BATCH_SIZE sent in parallel. Dishes the model
+    skips are treated as containing every allergen (not cached).
 
+    Returns:
+        {dish: set of contained allergens}, or None for a dish whose batch
+        failed so callers can apply their own fallback
+    """
+    allergens = sorted({a.strip().lower() for a in (allergens or []) if a and a.strip()})
+    unique_dishes = list(dict.fromkeys(d for d in dishes if d))
+    keys = {dish: normalize_memo_input(dish) for dish in unique_dishes}
+    if not allergens:
+        return {d: set() for d in unique_dishes}
+
+    def cached_pairs(key: str) -> Dict[str, Optional[bool]]:
+        return {a: _allergy_cache.get((key, a)) for a in allergens}
+
+    unknown = {key for key in keys.values() if None in cached_pairs(key).values()}
+    if unknown:
+        memo_inputs = {f"{a}|{key}": (key, a) for key in unknown for a in allergens}
+        for memo_input, safe in recall_many("allergy_safety", ALLERGY_PROMPT_VERSION, memo_inputs).items():
+            _allergy_cache.set(memo_inputs[memo_input], safe)
+        unknown = {key for key in unknown if None in cached_pairs(key).values()}
+
+    failed, unanswered = set(), set()
+    if unknown:
+        pending = sorted(unknown)
+        batches = [pending[i:i + ALLERGY_BATCH_SIZE] for i in range(0, len(pending), ALLERGY_BATCH_SIZE)]
+        logger.debug("Screening %s dishes for %s in %s batches", len(pending), allergens, len(batches))
+        with ThreadPoolExecutor(max_workers=min(ALLERGY_PARALLEL_BATCHES, len(batches))) as pool:
+            futures = {pool.submit(_screen_allergy_batch, batch, allergens): batch for batch in batches}
+            for future, batch in futures.items():
+                try:
+                    batch_verdicts = future.result()
+                except Exception as e:
+                    logger.error("Groq allergy screening failed: %s", e)
+                    failed.update(batch)
+                    continue
+                to_remember = {}
+                for key in batch:
+                    per_allergen = batch_verdicts.get(key)
+                    if per_allergen is None:
+                        unanswered.add(key)
+                        continue
+                    for allergen, safe in per_allergen.items():
+                        _allergy_cache.set((key, allergen), safe)
+                        to_remember[f"{allergen}|{key}"] = safe
+                remember_many("allergy_safety", ALLERGY_PROMPT_VERSION, to_remember)
+
+    results: Dict[str, Optional[set]] = {}
+    for dish, key in keys.items():
+        if key in failed:
+            results[dish] = None
+        elif key in unanswered:
+            results[dish] = set(allergens)  # unanswered: safety first
+        else:
+            results[dish] = {a for a, safe in cached_pairs(key).items() if not safe}
+    return results
 
-def classify_dish_diet_with_groq(dish_name: str) -> str:
+
+def screen_dishes_for_allergies(dishes, allergies: List[str]) -> Dict[str, bool]:
     """
-    Classify a dish as 'veg' or 'non-veg' using Groq LLM.
-    Returns: 'veg' or 'non-veg'
-    Uses caching to avoid repeated API calls.
+    Decide which dishes are safe for all of the given allergies.
+
+    Uses detect_dish_allergens (cached, batched); dishes whose Groq batch
+    failed fall back to the keyword check.
+
+    Returns:
+        {dish: True if safe} for every dish passed in
     """
-    if not dish_name or not isinstance(dish_name, str):
-        return "veg"  # Default to veg if invalid
+    verdicts = {}
+    for dish, contained in detect_dish_allergens(dishes, allergies).items():
+        verdicts[dish] = allergy_filter([dish], allergies) if contained is None else not contained
+    return verdicts
 
-    cache_key = dish_name.lower().strip()
-    if cache_key in _dish_diet_cache:
-        return _dish_diet_cache[cache_key]
 
-    try:
-        groq_client = get_groq_client()
-        prompt = f"""Classify this dish as either 'veg' or 'non-veg'.
+def filter_dishes_by_allergy(dishes: List[str], allergies: List[str]) -> List[str]:
+    """
+    Filter dishes that are safe for the given allergies (see screen_dishes_for_allergies).
+    """
+    if not dishes or not allergies:
+        return dishes
+    safe = screen_dishes_for_allergies(dishes, allergies)
+    return [d for d in dishes if safe.get(d)]
 
-Dish: {dish_name}
+
+def _dish_diet_prompt(dishes: List[str]) -> str:
+    """Build the veg/non-veg classification prompt for a numbered list of dishes."""
+    items_text = "\n".join(f"{idx + 1}. {dish}" for idx, dish in enumerate(dishes))
+    return f"""Classify each dish as either 'veg' or 'non-veg'.
+
+Dishes:
+{items_text}
 
 Rules:
 - 'non-veg' includes: meat, poultry, fish, seafood, eggs, and any animal products (except dairy)
 - 'veg' includes: vegetables, fruits, dairy, grains, legumes, plant-based items
 - If unclear or dish name doesn't specify, default to 'veg'
 
-Respond with ONLY the word 'veg' or 'non-veg', nothing else."""
+Respond with one line per dish in the form "<number>: veg" or "<number>: non-veg", nothing else."""
 
-        completion = groq_client.chat.completions.create(
-            messages=[{"role": "user", "content": prompt}],
-            model="llama-3.3-70b-versatile",
-            temperature=0,
-            max_tokens=10
-        )
 
-        result = completion.choices[0].message.content.strip().lower()
-        classification = "non-veg" if "non" in result else "veg"
+_DIET_FALLBACK_MATCHER = KeywordMatcher([
+    "chicken", "beef", "pork", "bacon", "ham", "turkey", "lamb",
+    "mutton", "duck", "fish", "salmon", "tuna", "shrimp", "prawn",
+    "crab", "lobster", "egg", "meat", "seafood",
+])
 
-        _dish_diet_cache[cache_key] = classification
-        print(f"[DEBUG] Classified '{dish_name}' as '{classification}'")
-        return classification
 
-    except Exception as e:
-        print(f"[WARNING] Groq diet classification failed for '{dish_name}': {e}")
-        # Fallback to basic keyword check
-        t = dish_name.lower()
-        nonveg_keywords = {"chicken", "beef", "pork", "bacon", "ham", "turkey", "lamb",
-                          "mutton", "duck", "fish", "salmon", "tuna", "shrimp", "prawn",
-                          "crab", "lobster", "egg", "meat", "seafood"}
-        classification = "non-veg" if any(k in t for k in nonveg_keywords) else "veg"
-        _dish_diet_cache[cache_key] = classification
-        return classification
+def _dish_diet_keyword_fallback(dish_name: str) -> str:
+    """Classify a dish with a basic keyword check when Groq is unavailable."""
+    return "non-veg" if _DIET_FALLBACK_MATCHER.contains_any(dish_name) else "veg"
+
+
+_DIET_LINE_RE = re.compile(r"(\d+)\s*[:.)\-]\s*(non[-\s]?veg|veg)")
+
+# Dishes per classification call; keeps prompts and answers short
+DISH_DIET_BATCH_SIZE = 25
+
+
+def _classify_diet_batch(dishes: List[str]) -> Dict[str, str]:
+    """
+    Classify up to DISH_DIET_BATCH_SIZE dishes in one Groq call.
+
+    Returns {dish: classification} for the dishes the model answered; callers
+    fall back to keywords for anything missing.
+    """
+    result = chat_completion(
+        _dish_diet_prompt(dishes), temperature=0, max_tokens=8 * len(dishes) + 10
+    ).lower()
+    labels: Dict[str, str] = {}
+    for number, label in _DIET_LINE_RE.findall(result):
+        idx = int(number) - 1
+        if 0 <= idx < len(dishes):
+            labels[dishes[idx]] = "non-veg" if label.startswith("non") else "veg"
+    return labels
+
+
+def classify_dish_diets(dishes: List[str]) -> Dict[str, str]:
+    """
+    Classify many dishes as 'veg' or 'non-veg' with as few Groq calls as possible.
+
+    Cached and memoized dishes are answered without a call, then the local
+    classifier takes every dish it is confident about. The rest are sent in
+    numbered batches of DISH_DIET_BATCH_SIZE. Dishes the model skips, or
+    whole batches that fail, fall back to the keyword check (not persisted).
+
+    Returns:
+        {dish: 'veg' | 'non-veg'} for every dish passed in
+    """
+    results: Dict[str, str] = {}
+    pending: Dict[str, List[str]] = {}  # cache key -> original spellings
+    for dish in dishes:
+        if not dish or not isinstance(dish, str):
+            results[dish] = "veg"  # Default to veg if invalid
+            continue
+        cache_key = normalize_memo_input(dish)
+        cached = _dish_diet_cache.get(cache_key)
+        if cached is not None:
+            results[dish] = cached
+        else:
+            pending.setdefault(cache_key, []).append(dish)
+
+    if pending:
+        memoized = recall_many("dish_diet", DISH_DIET_PROMPT_VERSION, list(pending))
+        for cache_key, classification in memoized.items():
+            _dish_diet_cache.set(cache_key, classification)
+            for dish in pending.pop(cache_key, []):
+                results[dish] = classification
+
+    classifier = get_dish_classifier()
+    if pending and classifier is not None:
+        keys = list(pending)
+        for cache_key, (classification, confidence) in zip(keys, classifier.predict_diet(keys)):
+            if confidence >= DISH_CLASSIFIER_MIN_CONFIDENCE:
+                _dish_diet_cache.set(cache_key, classification)
+                for dish in pending.pop(cache_key):
+                    results[dish] = classification
+        logger.debug("Local classifier labeled %s/%s dishes", len(keys) - len(pending), len(keys))
+
+    keys = list(pending)
+    for i in range(0, len(keys), DISH_DIET_BATCH_SIZE):
+        batch = keys[i:i + DISH_DIET_BATCH_SIZE]
+        try:
+            labels = _classify_diet_batch(batch)
+            logger.debug("Classified %s/%s dishes in one call", len(labels), len(batch))
+            remember_many("dish_diet", DISH_DIET_PROMPT_VERSION, labels)
+        except Exception as e:
+            logger.warning("Groq diet classification failed for %s dishes: %s", len(batch), e)
+            labels = {}
+        for cache_key in batch:
+            classification = labels.get(cache_key) or _dish_diet_keyword_fallback(cache_key)
+            _dish_diet_cache.set(cache_key, classification)
+            for dish in pending[cache_key]:
+                results[dish] = classification
+
+    return results
+
+
+def classify_dish_diet_with_groq(dish_name: str) -> str:
+    """
+    Classify a dish as 'veg' or 'non-veg' using Groq LLM.
+    Returns: 'veg' or 'non-veg'
+    Single-dish wrapper over classify_dish_diets (cached the same way).
+    """
+    if not dish_name or not isinstance(dish_name, str):
+        return "veg"  # Default to veg if invalid
+    return classify_dish_diets([dish_name])[dish_name]
 
 
 def classify_dish_with_groq(dish_name: str) -> str:
-    """Classify dish into category using Groq AI."""
-    try:
-        client = get_groq_client()
+    """Classify dish into category, using Groq AI when the local classifier is unsure."""
+    classifier = get_dish_classifier()
+    if classifier is not None and dish_name:
+        category, confidence = classifier.predict_course([dish_name])[0]
+        if confidence >= DISH_CLASSIFIER_MIN_CONFIDENCE:
+            return category
 
+    try:
         prompt = f"""Classify this dish into ONE category: appetizer, mains, or desserts.
 Dish: {dish_name}
 
 Respond with ONLY the category name (appetizer, mains, or desserts), nothing else."""
 
-        completion = client.chat.completions.create(
-            messages=[{"role": "user", "content": prompt}],
-            model="llama-3.3-70b-versatile",
-            temperature=0.3,
-            max_tokens=10
-        )
-
-        category = completion.choices[0].message.content.strip().lower()
+        category = chat_completion(prompt, temperature=0.3, max_tokens=10).lower()
 
         if category in {"appetizer", "appetizers"}:
             return "appetizer"
@@ -262,7 +413,7 @@ Respond with ONLY the category name (appetizer, mains, or desserts), nothing els
             return "mains"  # Default
 
     except Exception as e:
-        print(f"[ERROR] Groq classification failed: {e}")
+        logger.error("Groq classification failed: %s", e)
         return "mains"
 
 
@@ -353,8 +504,6 @@ def extract_dish_from_query(query: str) -> Optional[str]:
 
     # 2. Fallback to LLM for complex queries
     try:
-        client = get_groq_client()
-
         prompt = f"""Extract the specific food dish the user is asking for from this query.
 Query: "{query}"
 
@@ -372,14 +521,10 @@ Example 4: "Best italian restaurants" -> "cuisine:italian"
 
 Response:"""
 
-        completion = client.chat.completions.create(
-            messages=[{"role": "user", "content": prompt}],
-            model="llama-3.3-70b-versatile",
-            temperature=0.1,
-            max_tokens=20
-        )
-
-        result = completion.choices[0].message.content.strip().lower()
+        result = recall("dish_extraction", DISH_EXTRACTION_PROMPT_VERSION, query)
+        if result is None:
+            result = chat_completion(prompt, temperature=0.1, max_tokens=20).lower()
+            remember("dish_extraction", DISH_EXTRACTION_PROMPT_VERSION, query, result)
 
         if result == "none" or result.startswith("cuisine:"):
             return None
@@ -397,7 +542,7 @@ Response:"""
         return result
 
     except Exception as e:
-        print(f"[ERROR] Dish extraction failed: {e}")
+        logger.error("Dish extraction failed: %s", e)
         return None
 
 
@@ -429,14 +574,36 @@ def extract_location_from_query(query: str) -> Optional[str]:
     return None
 
 
+def _route_query(query: str) -> Tuple[Optional[List[float]], Optional[IntentRoute]]:
+    """
+    Embed the query and route it with the prototype router (blocking).
+
+    Returns (query embedding, route), or (None, None) if the router is
+    unavailable. Callers only trust the route when route.confident.
+    """
+    router = get_intent_router()
+    if router is None:
+        return None, None
+    try:
+        vector = router.embed(query)
+        route = router.route(vector)
+    except Exception as e:
+        logger.warning("Intent routing failed: %s", e)
+        return None, None
+    logger.debug("Routed %r -> %s (score=%.2f, margin=%.2f)", query, route.intent, route.score, route.margin)
+    return vector, route
+
+
 def classify_intent(query: str) -> str:
     """
-    Classify user intent using Groq.
+    Classify user intent, asking Groq only when the embedding router is unsure.
     Returns: 'dish_search', 'restaurant_search', 'greeting', 'other'
     """
-    try:
-        client = get_groq_client()
+    _, route = _route_query(query)
+    if route is not None and route.confident:
+        return route.chat_intent
 
+    try:
         prompt = f"""Classify the user's intent from this query into ONE category.
 
 Query: "{query}"
@@ -451,14 +618,7 @@ Return ONLY the category name, nothing else.
 
 Response:"""
 
-        completion = client.chat.completions.create(
-            messages=[{"role": "user", "content": prompt}],
-            model="llama-3.3-70b-versatile",
-            temperature=0,
-            max_tokens=10
-        )
-
-        result = completion.choices[0].message.content.strip().lower()
+        result = chat_completion(prompt, temperature=0, max_tokens=10).lower()
 
         valid_intents = ["dish_search", "restaurant_search", "greeting", "other"]
         for intent in valid_intents:
@@ -468,34 +628,33 @@ Response:"""
         return "other"
 
     except Exception as e:
-        print(f"[ERROR] Intent classification failed: {e}")
+        logger.error("Intent classification failed: %s", e)
         return "other"
 
 
-def is_relevant_query(query: str) -> bool:
-    """
-    Check if query is relevant to food/restaurant search using Groq AI.
-    Returns True if query is about food/restaurants, False otherwise.
-    """
-    query_lower = query.lower()
+# Fast path: obvious food/restaurant keywords
+_RELEVANT_MATCHER = KeywordMatcher([
+    "food", "eat", "restaurant", "dish", "meal", "hungry", "craving",
+    "lunch", "dinner", "breakfast", "cuisine", "menu", "order",
+    "pizza", "burger", "sushi", "pasta", "chicken", "veg", "non-veg",
+    "taste", "flavor", "spicy", "sweet", "savory"
+])
 
-    # Fast path: obvious food/restaurant keywords
-    relevant_keywords = [
-        "food", "eat", "restaurant", "dish", "meal", "hungry", "craving",
-        "lunch", "dinner", "breakfast", "cuisine", "menu", "order",
-        "pizza", "burger", "sushi", "pasta", "chicken", "veg", "non-veg",
-        "taste", "flavor", "spicy", "sweet", "savory"
-    ]
+# Fast path: obvious non-food keywords
+_IRRELEVANT_MATCHER = KeywordMatcher([
+    "tourist", "sightseeing", "museum", "park", "beach", "hotel",
+    "shopping", "mall", "attraction", "landmark", "monument"
+])
 
-    # Fast path: obvious non-food keywords
-    irrelevant_keywords = [
-        "tourist", "sightseeing", "museum", "park", "beach", "hotel",
-        "shopping", "mall", "attraction", "landmark", "monument"
-    ]
 
+def _relevance_fast_path(query: str) -> Optional[bool]:
+    """
+    Keyword fast path for relevance checks.
+    Returns True/False when the keywords are conclusive, None otherwise.
+    """
     # If contains irrelevant keywords and no relevant keywords, reject immediately
-    has_irrelevant = any(keyword in query_lower for keyword in irrelevant_keywords)
-    has_relevant = any(keyword in query_lower for keyword in relevant_keywords)
+    has_irrelevant = _IRRELEVANT_MATCHER.contains_any(query)
+    has_relevant = _RELEVANT_MATCHER.contains_any(query)
 
     if has_irrelevant and not has_relevant:
         return False
@@ -503,10 +662,12 @@ def is_relevant_query(query: str) -> bool:
     if has_relevant:
         return True
 
-    # Use Groq for ambiguous queries
-    try:
-        client = get_groq_client()
-        prompt = f"""Is this query about food, restaurants, or dining?
+    return None
+
+
+def _relevance_prompt(query: str) -> str:
+    """Build the food/restaurant relevance prompt."""
+    return f"""Is this query about food, restaurants, or dining?
 Query: "{query}"
 
 Rules:
@@ -516,159 +677,42 @@ Rules:
 
 Response (only "yes" or "no"):"""
 
-        completion = client.chat.completions.create(
-            messages=[{"role": "user", "content": prompt}],
-            model="llama-3.3-70b-versatile",
-            temperature=0,
-            max_tokens=5
-        )
 
-        result = completion.choices[0].message.content.strip().lower()
+def is_relevant_query(query: str) -> bool:
+    """
+    Check if query is relevant to food/restaurant search using Groq AI.
+    Returns True if query is about food/restaurants, False otherwise.
+    """
+    fast_result = _relevance_fast_path(query)
+    if fast_result is not None:
+        return fast_result
+
+    _, route = _route_query(query)
+    if route is not None and route.confident:
+        return route.relevant
+
+    # Use Groq for ambiguous queries
+    try:
+        result = chat_completion(_relevance_prompt(query), temperature=0, max_tokens=5).lower()
         return result == "yes"
 
     except Exception as e:
-        print(f"[ERROR] Relevance check failed: {e}")
+        logger.error("Relevance check failed: %s", e)
         # Default to True to avoid blocking valid queries
         return True
 
 
-def check_location_match(user_location: str, restaurant_location: str) -> bool:
+def check_location_match(user_location: str, restaurant_location: str, coordinates=None) -> bool:
     """
-    Check if user location matches restaurant location using Groq.
+    Check if a restaurant location matches the user's location.
+
+    Offline: resolves both through the gazetteer (see services/location_service.py)
+    and, when coordinates are given, checks the point against the user's area.
+    For many restaurants, build one LocationFilter and reuse it.
     """
     if not user_location or not restaurant_location:
         return False
-
-    # Ensure inputs are strings
-    if not isinstance(user_location, str): user_location = str(user_location)
-    if not isinstance(restaurant_location, str): restaurant_location = str(restaurant_location)
-
-    # Normalize for comparison
-    u_loc = user_location.lower().strip()
-    r_loc = restaurant_location.lower().strip()
-    
-    # Fast path 1: Direct substring match (improved)
-    # Extract key location terms (city names, not just first word)
-    # Common patterns: "New York", "San Francisco", "Los Angeles"
-    
-    # Check for exact city match (case-insensitive)
-    # Split by comma to get city part
-    u_city = u_loc.split(',')[0].strip()
-    r_city = r_loc.split(',')[0].strip()
-    
-    # Check if user's city appears in restaurant's location
-    # Use word boundaries to avoid "San" matching "San Antonio" when user wants "San Francisco"
-    if u_city and u_city in r_loc:
-        # Verify it's a full city name match, not just a prefix
-        # Check if followed by comma, space at end, or other word boundary
-        import re
-        pattern = r'\b' + re.escape(u_city) + r'\b'
-        if re.search(pattern, r_loc):
-            print(f"[DEBUG] Fast path match: '{u_city}' found in '{r_loc}'")
-            return True
-    
-    # Fast path 2: Check for country/region mismatches
-    # Check for US vs non-US locations
-    us_indicators = [', us', 'united states', ', ny', ', ca', ', tx', ', fl']
-    non_us_countries = ['mexico', 'canada', 'uk', 'france', 'italy', 'spain', 'india', 'china', 'japan']
-    
-    u_has_us = any(ind in r_loc for ind in us_indicators)
-    u_has_non_us = any(country in u_loc for country in non_us_countries)
-    
-    r_has_us = any(ind in r_loc for ind in us_indicators)
-    r_has_non_us = any(country in r_loc for country in non_us_countries)
-    
-    # If one is clearly US and the other is clearly non-US, reject
-    if (u_has_non_us and r_has_us) or (u_has_us and r_has_non_us):
-        print(f"[DEBUG] Fast path rejection: country mismatch (US vs non-US)")
-        return False
-    
-    # Fast path 3: Regional grouping for nearby cities
-    # Some cities are close enough to be considered the same region
-    city_regions = {
-        # Bay Area
-        'san francisco': 'bay_area',
-        'san jose': 'bay_area',
-        'oakland': 'bay_area',
-        'berkeley': 'bay_area',
-        'palo alto': 'bay_area',
-        'mountain view': 'bay_area',
-        'sunnyvale': 'bay_area',
-        # NYC Metro
-        'new york': 'nyc_metro',
-        'brooklyn': 'nyc_metro',
-        'manhattan': 'nyc_metro',
-        'queens': 'nyc_metro',
-        'bronx': 'nyc_metro',
-        'staten island': 'nyc_metro',
-        # Other major cities (no regional grouping)
-        'los angeles': 'la',
-        'chicago': 'chicago',
-        'boston': 'boston',
-        'seattle': 'seattle',
-        'portland': 'portland',
-        'austin': 'austin',
-        'miami': 'miami',
-        'atlanta': 'atlanta'
-    }
-    
-    user_region = None
-    restaurant_region = None
-    
-    for city, region in city_regions.items():
-        if city in u_loc:
-            user_region = region
-        if city in r_loc:
-            restaurant_region = region
-    
-    # If both regions are identified
-    if user_region and restaurant_region:
-        # Same region = match
-        if user_region == restaurant_region:
-            print(f"[DEBUG] Fast path match: same region ({user_region})")
-            return True
-        # Different regions = no match
-        else:
-            print(f"[DEBUG] Fast path rejection: {user_region} != {restaurant_region}")
-            return False
-
-    # Fast path 4: State code mismatch (e.g., CA vs NY)
-    # Extract state codes (2 letters after comma)
-    import re
-    user_state = re.search(r',\s*([A-Z]{2})\b', user_location)
-    rest_state = re.search(r',\s*([A-Z]{2})\b', restaurant_location)
-    
-    if user_state and rest_state:
-        if user_state.group(1) != rest_state.group(1):
-            print(f"[DEBUG] Fast path rejection: state mismatch {user_state.group(1)} != {rest_state.group(1)}")
-            return False
-    
-    print(f"[DEBUG] Fast path inconclusive, calling Groq for location match")
-    try:
-        client = get_groq_client()
-        prompt = f"""Determine if these two locations refer to the same area or if one is inside the other.
-Location A: "{user_location}"
-Location B: "{restaurant_location}"
-
-Rules:
-1. Return "yes" if they match (e.g. "NYC" and "New York", "Manhattan" and "New York City").
-2. Return "yes" if one is inside the other (e.g. "Brooklyn" and "New York").
-3. Return "no" if they are different cities or far apart.
-
-Response (only "yes" or "no"):"""
-
-        completion = client.chat.completions.create(
-            messages=[{"role": "user", "content": prompt}],
-            model="llama-3.3-70b-versatile",
-            temperature=0,
-            max_tokens=5
-        )
-
-        result = completion.choices[0].message.content.strip().lower()
-        return "yes" in result
-    except Exception as e:
-        print(f"[ERROR] Location match failed: {e}")
-        # Fallback to simple check
+    return LocationFilter(str(user_location)).matches(restaurant_location, coordinates)
 
 
 def validate_dishes_with_groq(items: List[str]) -> List[str]:
@@ -681,12 +725,24 @@ def validate_dishes_with_groq(items: List[str]) -> List[str]:
     cached_results = []
 
     for item in items:
-        cache_key = item.lower().strip()
-        if cache_key in _dish_validation_cache:
-            if _dish_validation_cache[cache_key]:
-                cached_results.append(item)
-        else:
+        is_valid = _dish_validation_cache.get(item.lower().strip())
+        if is_valid is None:
             uncached_items.append(item)
+        elif is_valid:
+            cached_results.append(item)
+
+    if uncached_items:
+        memoized = recall_many("dish_validation", DISH_VALIDATION_PROMPT_VERSION, uncached_items)
+        still_uncached = []
+        for item in uncached_items:
+            is_valid = memoized.get(normalize_memo_input(item))
+            if is_valid is None:
+                still_uncached.append(item)
+                continue
+            _dish_validation_cache.set(item.lower().strip(), is_valid)
+            if is_valid:
+                cached_results.append(item)
+        uncached_items = still_uncached
 
     if not uncached_items:
         return cached_results
@@ -699,7 +755,6 @@ def validate_dishes_with_groq(items: List[str]) -> List[str]:
         batch = uncached_items[i:i+batch_size]
 
         try:
-            groq_client = get_groq_client()
             items_text = "\n".join([f"{idx+1}. {item}" for idx, item in enumerate(batch)])
 
             prompt = f"""Filter out non-food items from this list. Return ONLY the numbers of items that are actual food/dish names.
@@ -713,36 +768,33 @@ List:
 
 Respond with ONLY comma-separated numbers of valid food items (e.g., "1,3,5,7"). If none are valid, respond with "none"."""
 
-            completion = groq_client.chat.completions.create(
-                messages=[{"role": "user", "content": prompt}],
-                model="llama-3.3-70b-versatile",
-                temperature=0,
-                max_tokens=200
-            )
-
-            response = completion.choices[0].message.content.strip().lower()
+            response = chat_completion(prompt, temperature=0, max_tokens=200).lower()
 
             if response == "none":
                 # Mark all as invalid
                 for item in batch:
-                    _dish_validation_cache[item.lower().strip()] = False
+                    _dish_validation_cache.set(item.lower().strip(), False)
+                remember_many("dish_validation", DISH_VALIDATION_PROMPT_VERSION, {item: False for item in batch})
             else:
                 # Parse valid indices
                 try:
                     valid_indices = set(int(x.strip()) - 1 for x in response.split(',') if x.strip().isdigit())
+                    labels = {}
                     for idx, item in enumerate(batch):
                         is_valid = idx in valid_indices
-                        _dish_validation_cache[item.lower().strip()] = is_valid
+                        _dish_validation_cache.set(item.lower().strip(), is_valid)
+                        labels[item] = is_valid
                         if is_valid:
                             valid_dishes.append(item)
+                    remember_many("dish_validation", DISH_VALIDATION_PROMPT_VERSION, labels)
                 except Exception:
                     # If parsing fails, be conservative and include all
                     for item in batch:
-                        _dish_validation_cache[item.lower().strip()] = True
+                        _dish_validation_cache.set(item.lower().strip(), True)
                         valid_dishes.append(item)
 
         except Exception as e:
-            print(f"[WARNING] Groq dish validation failed: {e}")
+            logger.warning("Groq dish validation failed: %s", e)
             # Fallback: use basic filtering
             for item in batch:
                 item_lower = item.lower()
@@ -750,10 +802,10 @@ Respond with ONLY comma-separated numbers of valid food items (e.g., "1,3,5,7").
                 if (len(item) >= 3 and len(item) <= 80 and
                     not any(x in item_lower for x in ['function(', '=>', 'window.', 'document.', '.push(', 'gtag', '__']) and
                     re.search(r'[a-zA-Z]', item)):
-                    _dish_validation_cache[item.lower().strip()] = True
+                    _dish_validation_cache.set(item.lower().strip(), True)
                     valid_dishes.append(item)
                 else:
-                    _dish_validation_cache[item.lower().strip()] = False
+                    _dish_validation_cache.set(item.lower().strip(), False)
 
     return cached_results + valid_dishes
 
@@ -769,7 +821,6 @@ def extract_dish_and_restaurant(query: str) -> Optional[Tuple[str, str]]:
         return None
 
     try:
-        client = get_groq_client()
         prompt = f"""Extract the dish name and restaurant name from this query.
 Query: "{query}"
 
@@ -782,14 +833,7 @@ Rules:
 
 Response:"""
 
-        completion = client.chat.completions.create(
-            messages=[{"role": "user", "content": prompt}],
-            model="llama-3.3-70b-versatile",
-            temperature=0,
-            response_format={"type": "json_object"}
-        )
-
-        result = json.loads(completion.choices[0].message.content)
+        result = json.loads(chat_completion(prompt, temperature=0, response_format={"type": "json_object"}))
         dish = result.get("dish", "none")
         restaurant = result.get("restaurant", "none")
 
@@ -799,6 +843,403 @@ Response:"""
         return None
 
     except Exception as e:
-        print(f"[ERROR] Dish/Restaurant extraction failed: {e}")
+        logger.error("Dish/Restaurant extraction failed: %s", e)
         return None
 
+
+# ---------------------------------------------------------------------------
+# Query understanding
+# ---------------------------------------------------------------------------
+
+def is_greeting(query: str) -> bool:
+    """
+    Check if the query is a greeting.
+
+    Returns:
+        True if query is a greeting, False otherwise
+    """
+    query_lower = query.lower().strip()
+    greetings = [
+        "hi", "hello", "hey", "hola", "greetings", "good morning",
+        "good afternoon", "good evening", "howdy", "what's up",
+        "whats up", "sup", "yo", "hiya", "heya"
+    ]
+
+    # Check if query is exactly a greeting or starts with greeting
+    for greeting in greetings:
+        if query_lower == greeting or query_lower.startswith(greeting + " "):
+            return True
+
+    return False
+
+
+def extract_cuisine_from_query(query: str) -> Optional[str]:
+    """
+    Extract cuisine type from the query text.
+
+    Returns:
+        Cuisine string if found (e.g., 'Thai', 'Italian', 'Chinese'), None otherwise
+    """
+    query_lower = query.lower()
+
+    # Common cuisine types with their variations
+    cuisines = {
+        'thai': ['thai'],
+        'italian': ['italian', 'pizza', 'pasta'],
+        'chinese': ['chinese'],
+        'japanese': ['japanese', 'sushi', 'ramen'],
+        'indian': ['indian', 'curry'],
+        'mexican': ['mexican', 'taco', 'burrito'],
+        'korean': ['korean', 'kimchi', 'bibimbap'],
+        'vietnamese': ['vietnamese', 'pho'],
+        'american': ['american', 'burger'],
+        'french': ['french'],
+        'greek': ['greek'],
+        'mediterranean': ['mediterranean'],
+        'middle eastern': ['middle eastern', 'falafel', 'shawarma'],
+        'spanish': ['spanish', 'tapas', 'paella'],
+    }
+
+    # Pattern: look for cuisine keywords in query
+    # Examples: "Thai food", "Italian restaurant", "I want Chinese"
+    for cuisine_name, keywords in cuisines.items():
+        for keyword in keywords:
+            # Check if keyword appears as a whole word
+            pattern = r'\b' + re.escape(keyword) + r'\b'
+            if re.search(pattern, query_lower):
+                logger.debug("Cuisine type detected in query: %s", cuisine_name)
+                return cuisine_name
+
+    return None
+
+
+def detect_explicit_diet(query: str) -> Optional[str]:
+    """
+    Detect an explicit diet preference in the query (e.g., "I want veg food").
+
+    Returns:
+        'veg', 'non-veg', or None if not stated explicitly
+    """
+    query_lower = query.lower()
+
+    # Vegetarian indicators
+    veg_patterns = [
+        r'\b(?:i am|i\'m|looking for|want|need|prefer)\s+(?:a\s+)?veg(?:etarian)?\s+(?:food|dish|meal|option)',
+        r'\bveg(?:etarian)?\s+(?:\w+\s+)?(?:food|dish|meal|option|restaurant|cuisine)',  # Allows "vegetarian Thai food"
+        r'\bonly\s+veg(?:etarian)?',
+        r'\bpure\s+veg(?:etarian)?',
+        r'\bvegetarian\s+only',
+        r'\bno\s+(?:meat|non-veg|nonveg)',
+        r'\bplant[-\s]?based',
+    ]
+
+    # Non-vegetarian indicators
+    nonveg_patterns = [
+        r'\b(?:i am|i\'m|looking for|want|need|prefer)\s+(?:a\s+)?non[-\s]?veg(?:etarian)?\s+(?:food|dish|meal|option)',
+        r'\bnon[-\s]?veg(?:etarian)?\s+(?:\w+\s+)?(?:food|dish|meal|option|restaurant|cuisine)',  # Allows "non-veg Thai food"
+        r'\b(?:meat|chicken|fish|seafood)\s+(?:lover|eater)',
+        r'\bonly\s+non[-\s]?veg',
+    ]
+
+    # Check for explicit vegetarian
+    for pattern in veg_patterns:
+        if re.search(pattern, query_lower):
+            logger.debug("Explicit veg preference detected in query")
+            return "veg"
+
+    # Check for explicit non-vegetarian
+    for pattern in nonveg_patterns:
+        if re.search(pattern, query_lower):
+            logger.debug("Explicit non-veg preference detected in query")
+            return "non-veg"
+
+    return None
+
+
+def extract_dish_candidates(query: str) -> List[str]:
+    """
+    Extract potential dish names from the query for dish-based diet detection
+    (e.g., "I want chicken curry" -> ["chicken curry"]).
+    """
+    query_lower = query.lower()
+
+    dish_patterns = [
+        # Specific pattern for "to eat/have/try X" - must come first
+        r'(?:i want|i need)\s+to\s+(?:eat|have|try)\s+(?:some\s+)?(.+?)(?:\s+(?:near|in|at|and)|$)',
+        # "I want to X" (where X is dish, not "to eat") - captures the dish after "to"
+        r'(?:i want|i need)\s+to\s+(?!(?:eat|have|try)\s)(?:some\s+)?(.+?)(?:\s+(?:near|in|at|and)|$)',
+        # General patterns (exclude "to" prefix)
+        r'(?:i want|i need|looking for|get me|find|show me|give me)\s+(?!to\s)(?:some\s+)?(.+?)(?:\s+(?:near|in|at|and)|$)',
+        r'(?:where.*get|where.*find)\s+(.+?)(?:\s+(?:near|in|at|and)|$)',
+        r'(?:is there|do you have|any)\s+(.+?)(?:\s+(?:available|near|in|at)|$)',
+    ]
+
+    detected_dishes = []
+    for pattern in dish_patterns:
+        matches = re.findall(pattern, query_lower)
+        for match in matches:
+            # Clean up the match
+            dish = match.strip()
+            # Remove common words
+            dish = re.sub(r'\b(a|an|the|some|any|place|restaurant|where|that|has)\b', '', dish).strip()
+            
+            # Filter out generic/preference-only terms (same as is_dish_query)
+            if dish and len(dish) > 2:
+                # Check if it's just preferences/generic terms
+                generic_terms = ["food", "something", "anything", "restaurant", "place", "restaurants", "places"]
+                preference_words = ["spicy", "savory", "sweet", "sour", "salty", "bitter", "hot", "mild", 
+                                   "delicious", "tasty", "good", "fresh", "healthy", "light", "heavy"]
+                
+                words = dish.split()
+                meaningful_words = [w for w in words if w not in (generic_terms + preference_words + ["and", "or"])]
+                
+                # Only add if there are meaningful dish words
+                if len(meaningful_words) > 0 and dish not in generic_terms:
+                    detected_dishes.append(dish)
+
+    return detected_dishes
+
+
+def is_dish_query(query: str) -> Optional[str]:
+    """
+    Check if the query is asking for a specific dish (not at a specific restaurant).
+
+    Handles both single and multiple dishes (e.g., "paratha and paneer curry").
+
+    Returns:
+        Dish name(s) if detected (comma-separated if multiple), None otherwise
+    """
+    query_lower = query.lower().strip()
+
+    # Patterns for dish queries - more specific patterns
+    patterns = [
+        # "is there a place where X is available"
+        r"is\s+there\s+(?:a\s+)?(?:place|restaurant)\s+(?:where|that\s+has)\s+(.+?)\s+(?:is\s+)?available",
+        # "where can I find X" or "where can I get X" or "where i can get X"
+        r"where\s+(?:can\s+)?i\s+(?:can\s+)?(?:find|get)\s+(.+?)(?:\s+near|\s+in|\s+at|\s*$)",
+        # "do you have X" or "is there X"
+        r"^(?:do\s+you\s+have|is\s+there)\s+(?:any\s+)?(.+?)(?:\s+available|\s+near|\s+in|\s+at|\s*$)",
+        # "I want to eat/have/try X" - specific pattern to skip "to eat/have/try"
+        r"^(?:i\s+want|i'd\s+like|i\s+need)\s+to\s+(?:eat|have|try)\s+(?:some\s+)?(.+?)(?:\s+near|\s+in|\s+at|\s*$)",
+        # "I want to X" (where X is dish, not "to eat") - captures the dish after "to"
+        r"^(?:i\s+want|i'd\s+like|i\s+need)\s+to\s+(?!(?:eat|have|try)\s)(?:some\s+)?(.+?)(?:\s+near|\s+in|\s+at|\s*$)",
+        # "I want X" or "show me X" (no "to" involved)
+        r"^(?:i\s+want|i'd\s+like|i\s+need|give\s+me|show\s+me|find|get\s+me|looking\s+for)\s+(?!to\s)(?:some\s+)?(.+?)(?:\s+near|\s+in|\s+at|\s*$)",
+        # "can I get X"
+        r"^can\s+i\s+get\s+(.+?)(?:\s+near|\s+in|\s+at|\s*$)",
+    ]
+
+    # Don't treat greetings or very short queries as dish queries
+    if len(query_lower.split()) <= 1:
+        return None
+
+    for pattern in patterns:
+        match = re.search(pattern, query_lower)
+        if match:
+            dish_name = match.group(1).strip()
+            # Clean up the dish name
+            dish_name = re.sub(r'\s+(?:near|in|at|from)\s+.*$', '', dish_name).strip()
+            # Remove articles and common words
+            dish_name = re.sub(r'^(?:a|an|the|some)\s+', '', dish_name).strip()
+            
+            # Filter out generic/vague terms that aren't dish names
+            generic_terms = ["food", "something", "anything", "restaurant", "place", "restaurants", "places"]
+            
+            # Filter out preference descriptors (not actual dish names)
+            preference_words = ["spicy", "savory", "sweet", "sour", "salty", "bitter", "hot", "mild", 
+                               "delicious", "tasty", "good", "fresh", "healthy", "light", "heavy"]
+            
+            # Check if dish_name contains only generic terms and preferences
+            words = dish_name.split()
+            meaningful_words = [w for w in words if w not in (generic_terms + preference_words + ["and", "or"])]
+            
+            # If no meaningful dish name words remain, it's not a dish query
+            if len(meaningful_words) == 0:
+                return None  # It's just preferences/generic terms, not a dish name
+            
+            # Also reject if the whole phrase is a generic term
+            if dish_name in generic_terms:
+                return None
+            
+            if len(dish_name) > 2:
+                return dish_name
+
+    return None
+
+
+def is_restaurant_menu_query(query: str) -> Optional[str]:
+    """
+    Check if the query is asking for a specific restaurant's menu.
+
+    Returns:
+        Restaurant name if detected, None otherwise
+    """
+    query_lower = query.lower().strip()
+
+    # Patterns for restaurant menu queries
+    patterns = [
+        r"(?:what'?s|show|tell me|get)\s+(?:the\s+)?menu\s+(?:for|of|at)\s+(.+?)(?:\s+restaurant)?$",
+        r"menu\s+(?:for|of|at)\s+(.+?)(?:\s+restaurant)?$",
+        r"(?:show|tell)\s+me\s+(.+?)(?:'s|\s+)menu",
+        r"what\s+does\s+(.+?)\s+(?:have|serve|offer)",
+        r"what\s+can\s+i\s+(?:get|order)\s+(?:at|from)\s+(.+?)$",
+    ]
+
+    for pattern in patterns:
+        match = re.search(pattern, query_lower)
+        if match:
+            restaurant_name = match.group(1).strip()
+            # Clean up common words
+            restaurant_name = re.sub(r'\s+restaurant$', '', restaurant_name).strip()
+            if len(restaurant_name) > 2:
+                return restaurant_name
+
+    return None
+
+
+def parse_specific_query(query: str) -> Optional[Tuple[str, str]]:
+    """
+    Parse query to detect if user is asking about a specific dish at a specific restaurant.
+
+    Returns:
+        Tuple of (dish_name, restaurant_name) if specific query detected, None otherwise
+    """
+    query_lower = query.lower()
+
+    # Pattern: "dish ... where restaurant is X" or "dish ... at/from X"
+    pattern1 = r"(.+?)\s+where\s+restaurant\s+is\s+(.+?)$"
+    match = re.search(pattern1, query_lower)
+    if match:
+        dish = match.group(1).strip()
+        restaurant = match.group(2).strip()
+        # Clean up common prefixes
+        dish = re.sub(r"^(?:i want|i'd like|give me|show me|find)\s+", "", dish).strip()
+        dish = re.sub(r"\s+like\s+", " ", dish).strip()  # Remove "like"
+        return (dish, restaurant)
+
+    return None
+
+
+def _query_understanding_prompt(query: str, dish_hint: Optional[str]) -> str:
+    """Build the single structured query-understanding prompt."""
+    hint = f'\nThe dish phrase detected in the query is "{dish_hint}".\n' if dish_hint else ""
+    return f"""Analyze this food and restaurant chat query.
+Query: "{query}"
+{hint}
+Return ONLY a JSON object with these keys:
+- "relevant": true if the query is about food, restaurants, dishes, meals, or dining; false if it is about tourist attractions, hotels, shopping, or general travel
+- "intent": one of "dish_search", "restaurant_search", "greeting", "other"
+- "normalized_dish": the detected dish phrase with spelling corrected and completed (e.g. "pizz" -> "pizza", "panr tikka" -> "paneer tikka"), or null if no dish phrase was detected
+- "diet": "veg" if the user asks for vegetarian/vegan food or every dish asked for is vegetarian; "non-veg" if the user asks for meat or every dish asked for contains meat, fish, seafood or eggs; otherwise null
+- "cuisine": the cuisine type, lowercase (e.g. "thai"), or null
+- "location": the city or neighborhood mentioned, or null
+
+Response:"""
+
+
+def _clean_llm_field(value) -> Optional[str]:
+    """Normalize a string field from the LLM JSON, mapping empty/none to None."""
+    if not isinstance(value, str):
+        return None
+    value = value.replace('"', '').strip().lower()
+    if not value or value in {"none", "null", "n/a"}:
+        return None
+    return value
+
+
+@traced("parse")
+async def parse_query(query: str) -> ParsedQuery:
+    """
+    Understand a chat query in at most one LLM call.
+
+    The regex fast paths run first, then the embedding router settles
+    relevance (and a missing intent) when it is confident. Groq is consulted
+    (once, for all fields) only when relevance is still ambiguous, a dish
+    needs normalizing, or the diet depends on the dishes asked for. Regex
+    results take precedence; the LLM fills in whatever is left empty, except
+    the routing fields (dish, restaurant), which only the regex detectors set.
+
+    When the router ran, parsed.query_embedding holds the query embedding so
+    the Pinecone search does not embed the query again.
+    """
+    parsed = ParsedQuery(
+        location=extract_location_from_query(query),
+        cuisine=extract_cuisine_from_query(query),
+        diet=detect_explicit_diet(query),
+    )
+
+    if is_greeting(query):
+        parsed.intent = "greeting"
+        return parsed
+
+    # Restaurant menu query > dish query > dish at a specific restaurant
+    menu_restaurant = is_restaurant_menu_query(query)
+    dish_query = is_dish_query(query)
+    specific = parse_specific_query(query)
+    if menu_restaurant:
+        parsed.intent = "restaurant_search"
+        parsed.restaurant = menu_restaurant
+    elif dish_query and "where restaurant is" not in query.lower():
+        parsed.intent = "dish_search"
+        parsed.dish = dish_query
+    elif specific:
+        parsed.intent = "dish_search"
+        parsed.dish, parsed.restaurant = specific
+
+    relevance = _relevance_fast_path(query)
+    if relevance is None or parsed.intent == "other":
+        parsed.query_embedding, route = await asyncio.to_thread(_route_query, query)
+        if route is not None and route.confident:
+            if relevance is None:
+                relevance = route.relevant
+            if parsed.intent == "other":
+                parsed.intent = route.chat_intent
+    needs_normalization = bool(parsed.dish and not parsed.restaurant)
+    needs_dish_diet = parsed.diet is None and bool(extract_dish_candidates(query))
+
+    if relevance is not None and not needs_normalization and not needs_dish_diet:
+        parsed.relevant = relevance
+        parsed.normalized_dish = parsed.dish
+        return parsed
+
+    try:
+        raw = await achat_completion(
+            _query_understanding_prompt(query, parsed.dish),
+            temperature=0,
+            max_tokens=200,
+            response_format={"type": "json_object"}
+        )
+        result = json.loads(raw)
+        parsed.llm_used = True
+    except Exception as e:
+        logger.error("Query understanding failed: %s", e)
+        # Default to relevant to avoid blocking valid queries
+        parsed.relevant = relevance if relevance is not None else True
+        parsed.normalized_dish = parsed.dish
+        return parsed
+
+    llm_relevant = result.get("relevant")
+    parsed.relevant = relevance if relevance is not None else (llm_relevant is not False)
+
+    if parsed.intent == "other":
+        llm_intent = _clean_llm_field(result.get("intent"))
+        if llm_intent in {"dish_search", "restaurant_search", "greeting", "other"}:
+            parsed.intent = llm_intent
+    parsed.cuisine = parsed.cuisine or _clean_llm_field(result.get("cuisine"))
+    parsed.location = parsed.location or _clean_llm_field(result.get("location"))
+
+    llm_diet = _clean_llm_field(result.get("diet"))
+    if parsed.diet is None and llm_diet in {"veg", "non-veg"}:
+        parsed.diet = llm_diet
+
+    # Only normalize a dish the regex detectors found; the LLM never picks the route
+    normalized = _clean_llm_field(result.get("normalized_dish")) if parsed.dish else None
+    # Sanity check: reject long repetitive strings (hallucinations)
+    if normalized and (len(normalized) > 50 or len(set(normalized.split())) < len(normalized.split()) / 2):
+        normalized = None
+    parsed.normalized_dish = normalized or parsed.dish
+
+    if parsed.normalized_dish and parsed.dish and parsed.normalized_dish != parsed.dish.lower():
+        logger.debug("Groq corrected '%s' -> '%s'", parsed.dish, parsed.normalized_dish)
+
+    return parsed
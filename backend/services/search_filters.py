@@ -0,0 +1,145 @@
+"""
+Filterable restaurant metadata and the Pinecone filters that use it.
+
+At ingest (or via annotate_search_fields.py) each restaurant gets flat,
+normalized fields Pinecone can filter on:
+
+    city      "new york"
+    state     "NY"
+    geohash   ["dr", "dr5", "dr5r", "dr5re"]   (prefixes of the point's geohash)
+    cuisines  ["italian", "pizza", ...]        (lowercased tags and their words)
+
+The query side turns the request's location and cuisine into a list of
+filters from strictest to widest; the search tries them in order until one
+returns enough matches, and only then falls back to an unfiltered query.
+"""
+import json
+import re
+from typing import Any, Dict, List, Optional
+
+from services.location_service import (
+    LocationFilter,
+    geohash_cover_within,
+    geohash_encode,
+    get_gazetteer,
+    normalize_place_name,
+    parse_coordinates,
+)
+
+GEOHASH_PREFIX_LENGTHS = (2, 3, 4, 5)
+
+# Most geohash cells a single $in clause may list
+MAX_FILTER_CELLS = 32
+
+
+def _state_code(state: str) -> Optional[str]:
+    state = (state or "").strip()
+    if len(state) == 2:
+        return state.upper()
+    for place in get_gazetteer().lookup(state):
+        if place.kind == "state":
+            return place.state
+    return None
+
+
+def cuisine_tags(cuisine_types: Any) -> List[str]:
+    """Lowercased cuisine tags plus their words ("North Indian" -> "north indian", "indian")."""
+    if isinstance(cuisine_types, str):
+        try:
+            cuisine_types = json.loads(cuisine_types)
+        except Exception:
+            cuisine_types = [cuisine_types]
+    tags = set()
+    for cuisine in cuisine_types or []:
+        if not isinstance(cuisine, str) or not cuisine.strip():
+            continue
+        tag = cuisine.strip().lower()
+        tags.add(tag)
+        tags.update(w for w in re.split(r"[\s/&,-]+", tag) if len(w) >= 3 and w != "and")
+    return sorted(tags)
+
+
+def restaurant_filter_fields(meta: Dict[str, Any]) -> Dict[str, Any]:
+    """Filterable fields for a restaurant's metadata (only the ones that could be derived)."""
+    fields: Dict[str, Any] = {}
+
+    location = meta.get("location")
+    if location is None and meta.get("location_json"):
+        try:
+            location = json.loads(meta["location_json"]) if isinstance(meta["location_json"], str) else meta["location_json"]
+        except Exception:
+            location = None
+    if isinstance(location, dict):
+        if location.get("city"):
+            fields["city"] = normalize_place_name(str(location["city"]))
+        state = _state_code(str(location.get("state") or ""))
+        if state:
+            fields["state"] = state
+
+    point = parse_coordinates(meta.get("coordinates") or meta.get("coordinates_json"))
+    if point is not None:
+        geohash = geohash_encode(point[0], point[1], max(GEOHASH_PREFIX_LENGTHS))
+        fields["geohash"] = [geohash[:n] for n in GEOHASH_PREFIX_LENGTHS]
+
+    tags = cuisine_tags(meta.get("cuisine_types"))
+    if tags:
+        fields["cuisines"] = tags
+    return fields
+
+
+def _geohash_clause(place) -> Optional[Dict[str, Any]]:
+    _, cells = geohash_cover_within(place, MAX_FILTER_CELLS, tuple(reversed(GEOHASH_PREFIX_LENGTHS)))
+    return {"geohash": {"$in": cells}} if cells else None
+
+
+def location_filter_stages(location: Optional[str]) -> List[Dict[str, Any]]:
+    """Pinecone filters for a location, strictest first (empty if it can't be expressed)."""
+    if not location:
+        return []
+    location_filter = LocationFilter(location)
+    place = location_filter.place
+    first_part = location_filter.parts[0] if location_filter.parts else ""
+
+    if place is None:
+        return [{"city": {"$eq": first_part}}] if first_part else []
+    if location_filter.coarse:
+        return [{"city": {"$eq": first_part}, "state": {"$eq": place.state}}, {"state": {"$eq": place.state}}]
+    if place.kind == "country":
+        return []
+    if place.kind == "state":
+        return [{"state": {"$eq": place.state}}]
+
+    if location_filter.ambiguous:
+        # One clause over every place of that name, then the city name itself
+        max_cells = MAX_FILTER_CELLS // len(location_filter.places)
+        cells = set()
+        for area in location_filter.places:
+            cells.update(geohash_cover_within(area, max_cells, tuple(reversed(GEOHASH_PREFIX_LENGTHS)))[1])
+        stages = [{"geohash": {"$in": sorted(cells)}}] if cells else []
+        return stages + [{"city": {"$eq": first_part}}]
+
+    stages = []
+    for area in location_filter.areas:
+        clause = _geohash_clause(area)
+        if clause:
+            stages.append(clause)
+    if place.state:
+        stages.append({"state": {"$eq": place.state}})
+    return stages
+
+
+def restaurant_query_filters(location: Optional[str], cuisine: Optional[str]) -> List[Dict[str, Any]]:
+    """
+    Filters to try for a restaurant search, strictest first.
+
+    The tightest location stage is tried with the cuisine first, then each
+    location stage alone (the ranker's retry-without-cuisine still applies).
+    """
+    stages = location_filter_stages(location)
+    cuisine_clause = {"cuisines": {"$in": [cuisine.strip().lower()]}} if cuisine and cuisine.strip() else None
+
+    filters: List[Dict[str, Any]] = []
+    if cuisine_clause:
+        filters.append({**stages[0], **cuisine_clause} if stages else cuisine_clause)
+    filters.extend(stages)
+    return filters
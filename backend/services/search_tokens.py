@@ -0,0 +1,68 @@
+"""
+Precomputed keyword tokens for the ranker's query boost.
+
+The ranker boosts restaurants whose text shares words with the query
+(0.5 + 0.2 per shared token). Instead of rebuilding and tokenizing that text
+for every candidate on every request, annotate_search_fields.py stores the
+normalized tokens in metadata:
+
+    search_tokens  ["pad", "thai", "siam", ...]   (name, cuisines, popular dishes)
+    menu_tokens    ["basil", "curry", ...]        (all menu items)
+
+Menu tokens are kept apart because the diet and allergy filters narrow the
+menu per request: a query token found only on the menu still has to be on
+one of the remaining dishes.
+"""
+import re
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+# Query words that never count towards the boost
+QUERY_STOP_WORDS = {"i", "want", "to", "eat", "some", "a", "the", "in", "at", "near", "me", "place", "restaurant", "find", "show", "give", "food", "good", "best", "delicious", "yummy", "looking", "for"}
+
+_NON_WORD_RE = re.compile(r"[^\w\s]")
+
+
+def text_tokens(text: str) -> Set[str]:
+    """Lowercased words with punctuation removed ("Chick-Pea Curry!" -> {"chickpea", "curry"})."""
+    return set(_NON_WORD_RE.sub("", (text or "").lower()).split())
+
+
+def tokenize_query(query_text: Optional[str]) -> Set[str]:
+    """Tokens of a query that count towards the boost."""
+    return text_tokens(query_text) - QUERY_STOP_WORDS if query_text else set()
+
+
+def _static_text(meta: Dict[str, Any]) -> str:
+    pop_dishes = meta.get("popular_dishes") or []
+    pop_text = " ".join([str(p) for p in pop_dishes]) if isinstance(pop_dishes, list) else ""
+    return pop_text + " " + (meta.get("name") or "") + " " + " ".join(meta.get("cuisine_types") or [])
+
+
+def restaurant_token_fields(meta: Dict[str, Any]) -> Dict[str, List[str]]:
+    """search_tokens and menu_tokens for a restaurant's metadata (stop words dropped)."""
+    return {
+        "search_tokens": sorted(text_tokens(_static_text(meta)) - QUERY_STOP_WORDS),
+        "menu_tokens": sorted(text_tokens(" ".join(meta.get("menu_items") or [])) - QUERY_STOP_WORDS),
+    }
+
+
+def query_overlap(tokens: Set[str], meta: Dict[str, Any], menu_items: Iterable[str]) -> int:
+    """
+    Number of query tokens in the restaurant's name, cuisines, popular dishes
+    or the given (filtered) menu items.
+
+    Uses the stored token fields when present; otherwise tokenizes the text.
+    """
+    if not tokens:
+        return 0
+    menu_items = list(menu_items)
+    stored, stored_menu = meta.get("search_tokens"), meta.get("menu_tokens")
+    if not (isinstance(stored, list) and isinstance(stored_menu, list)):
+        return len(tokens & text_tokens(" ".join(menu_items) + " " + _static_text(meta)))
+
+    hits = tokens.intersection(stored)
+    menu_hits = tokens.intersection(stored_menu) - hits
+    if menu_hits and len(menu_items) < len(meta.get("menu_items") or []):
+        # Some dishes were filtered out; only the remaining ones count
+        menu_hits &= text_tokens(" ".join(menu_items))
+    return len(hits) + len(menu_hits)
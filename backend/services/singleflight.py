@@ -0,0 +1,65 @@
+"""
+Single-flight request coalescing.
+
+Concurrent callers that ask for the same key share one in-flight
+computation instead of each repeating the embed/Pinecone/Groq work. The
+computation runs as its own task, so a caller that disconnects (and is
+cancelled) does not cancel it for the others.
+"""
+import asyncio
+import copy
+import logging
+from typing import Any, Awaitable, Callable, Dict, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class SingleFlight:
+    """Deduplicate concurrent async calls by key (per event loop / worker)."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self.leaders = 0
+        self.followers = 0
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+        """
+        Run fn() for key, or wait for the call already in flight.
+
+        Returns (result, shared) where shared is True if this caller joined
+        someone else's call. Every caller gets its own deep copy of the
+        result, so per-request edits (chat_id, timing) never leak between
+        callers. Exceptions propagate to all callers.
+        """
+        task = self._inflight.get(key)
+        shared = task is not None
+        if task is None:
+            self.leaders += 1
+            task = asyncio.ensure_future(fn())
+            self._inflight[key] = task
+            task.add_done_callback(lambda t, k=key: self._finish(k, t))
+        else:
+            self.followers += 1
+            logger.debug("Coalesced %s request onto in-flight call", self.name)
+
+        result = await asyncio.shield(task)
+        return copy.deepcopy(result), shared
+
+    def _finish(self, key: str, task: asyncio.Task) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        # Mark the exception retrieved even if every caller went away
+        if not task.cancelled():
+            task.exception()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "in_flight": len(self._inflight),
+            "leaders": self.leaders,
+            "coalesced": self.followers,
+        }
+
+
+chat_flights = SingleFlight("chat")
+discover_flights = SingleFlight("discover")
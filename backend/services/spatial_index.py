@@ -0,0 +1,206 @@
+"""
+In-memory spatial index over restaurant coordinates.
+
+Restaurants are bucketed by geohash prefix (lengths 3-5, roughly 156 km,
+39 km and 5 km cells). A radius or box query reads only the buckets that
+overlap it and checks the exact distance/containment on those points, so
+"what is near X" does not depend on how well the query text matched the
+restaurant embeddings.
+
+The index is built from the Pinecone restaurants namespace at startup
+(build_spatial_index) and can be kept current at ingest (index_restaurant).
+intersect_with_spatial narrows semantic matches to the ones inside the
+requested area and tops them up with the nearest restaurants semantic
+search missed.
+"""
+import logging
+import math
+import threading
+from collections import defaultdict
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from integrations.pinecone_client import fetch_metadata, iter_namespace_metadata
+from services.location_service import (
+    LocationFilter,
+    Place,
+    geohash_cell_size,
+    geohash_cells,
+    geohash_encode,
+    haversine_km,
+    parse_coordinates,
+)
+
+logger = logging.getLogger(__name__)
+
+BUCKET_PRECISIONS = (3, 4, 5)
+
+# Most buckets a single query may read before dropping to a coarser level
+MAX_QUERY_CELLS = 64
+
+
+class SpatialIndex:
+    """Geohash-bucketed points, keyed by record id (thread-safe)."""
+
+    def __init__(self):
+        self._points: Dict[str, Tuple[float, float]] = {}
+        self._buckets: Dict[int, Dict[str, Set[str]]] = {p: defaultdict(set) for p in BUCKET_PRECISIONS}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._points)
+
+    def __contains__(self, record_id: str) -> bool:
+        return record_id in self._points
+
+    def point(self, record_id: str) -> Optional[Tuple[float, float]]:
+        return self._points.get(record_id)
+
+    def add(self, record_id: str, lat: float, lng: float) -> None:
+        geohash = geohash_encode(lat, lng, max(BUCKET_PRECISIONS))
+        with self._lock:
+            self._discard(record_id)
+            self._points[record_id] = (lat, lng)
+            for precision in BUCKET_PRECISIONS:
+                self._buckets[precision][geohash[:precision]].add(record_id)
+
+    def remove(self, record_id: str) -> None:
+        with self._lock:
+            self._discard(record_id)
+
+    def _discard(self, record_id: str) -> None:
+        point = self._points.pop(record_id, None)
+        if point is None:
+            return
+        geohash = geohash_encode(point[0], point[1], max(BUCKET_PRECISIONS))
+        for precision in BUCKET_PRECISIONS:
+            bucket = self._buckets[precision].get(geohash[:precision])
+            if bucket is not None:
+                bucket.discard(record_id)
+                if not bucket:
+                    del self._buckets[precision][geohash[:precision]]
+
+    def _candidates(self, bounds: Tuple[float, float, float, float]) -> List[Tuple[str, float, float]]:
+        """Points in the buckets overlapping bounds (a superset of the answer)."""
+        south, west, north, east = bounds
+        precision = BUCKET_PRECISIONS[0]
+        for p in reversed(BUCKET_PRECISIONS):
+            cell_lat, cell_lng = geohash_cell_size(p)
+            if (math.ceil((north - south) / cell_lat) + 1) * (math.ceil((east - west) / cell_lng) + 1) <= MAX_QUERY_CELLS:
+                precision = p
+                break
+        with self._lock:
+            buckets = self._buckets[precision]
+            ids = set()
+            for cell in geohash_cells(bounds, precision):
+                ids.update(buckets.get(cell, ()))
+            return [(record_id, *self._points[record_id]) for record_id in ids]
+
+    def nearby(self, lat: float, lng: float, radius_km: float, limit: Optional[int] = None) -> List[Tuple[str, float]]:
+        """(id, distance_km) within radius_km of a point, nearest first."""
+        dlat = radius_km / 111.0
+        dlng = dlat / max(0.01, math.cos(math.radians(lat)))
+        found = []
+        for record_id, plat, plng in self._candidates((lat - dlat, lng - dlng, lat + dlat, lng + dlng)):
+            distance = haversine_km(lat, lng, plat, plng)
+            if distance <= radius_km:
+                found.append((record_id, distance))
+        found.sort(key=lambda item: item[1])
+        return found[:limit] if limit is not None else found
+
+    def within(self, bbox: Tuple[float, float, float, float]) -> List[str]:
+        """Ids inside a (south, west, north, east) box."""
+        south, west, north, east = bbox
+        return [
+            record_id for record_id, lat, lng in self._candidates(bbox)
+            if south <= lat <= north and west <= lng <= east
+        ]
+
+    def in_place(self, place: Place) -> List[str]:
+        """Ids inside a gazetteer place (its box, or its radius)."""
+        return [record_id for record_id, lat, lng in self._candidates(place.bounds()) if place.contains(lat, lng)]
+
+
+# ==================== SINGLETON ====================
+
+_spatial_index: Optional[SpatialIndex] = None
+
+
+def get_spatial_index() -> Optional[SpatialIndex]:
+    """The catalog index, or None until build_spatial_index has run."""
+    return _spatial_index
+
+
+def build_spatial_index(records: Optional[Iterable[Tuple[str, Dict[str, Any]]]] = None, namespace: str = "restaurants") -> int:
+    """
+    (Re)build the index from (id, metadata) records, by default the whole
+    Pinecone namespace (blocking). Returns the number of indexed restaurants.
+    """
+    global _spatial_index
+    index = SpatialIndex()
+    try:
+        for record_id, meta in (records if records is not None else iter_namespace_metadata(namespace)):
+            point = parse_coordinates(meta.get("coordinates") or meta.get("coordinates_json"))
+            if point is not None:
+                index.add(record_id, *point)
+    except Exception as e:
+        logger.warning("Spatial index build failed: %s", e)
+        return len(_spatial_index) if _spatial_index is not None else 0
+    _spatial_index = index
+    logger.info("Spatial index ready (%s restaurants)", len(index))
+    return len(index)
+
+
+def index_restaurant(record_id: str, meta: Dict[str, Any]) -> None:
+    """Add or move one restaurant (call after upserting it)."""
+    global _spatial_index
+    if _spatial_index is None:
+        _spatial_index = SpatialIndex()
+    point = parse_coordinates(meta.get("coordinates") or meta.get("coordinates_json"))
+    if point is None:
+        _spatial_index.remove(record_id)
+    else:
+        _spatial_index.add(record_id, *point)
+
+
+def _match_id(match) -> Optional[str]:
+    return match.get("id") if isinstance(match, dict) else getattr(match, "id", None)
+
+
+def intersect_with_spatial(matches: list, location: Optional[str], min_results: int, namespace: str = "restaurants") -> list:
+    """
+    Keep semantic matches inside the location's area and top up with the nearest
+    restaurants semantic search missed (blocking: may fetch their metadata).
+
+    Matches whose coordinates are unknown to the index are kept for the
+    ranker's own location check. Returns matches unchanged when the index is
+    not built or the location does not resolve to an area.
+    """
+    index = get_spatial_index()
+    if index is None or not len(index) or not location:
+        return matches
+    location_filter = LocationFilter(location)
+    place = location_filter.place
+    if place is None or location_filter.coarse or place.kind == "country":
+        return matches
+
+    area_ids: Set[str] = set()
+    for area in location_filter.areas:
+        area_ids.update(index.in_place(area))
+    kept = [m for m in matches if _match_id(m) in area_ids or _match_id(m) not in index]
+
+    missing = min_results - len(kept)
+    if missing > 0:
+        seen = {_match_id(m) for m in kept}
+        extra = sorted(
+            (record_id for record_id in area_ids if record_id not in seen),
+            key=lambda record_id: min(haversine_km(p.lat, p.lng, *index.point(record_id)) for p in location_filter.places),
+        )[:missing]
+        if extra:
+            try:
+                fetched = fetch_metadata(extra, namespace)
+                kept.extend({"id": record_id, "score": 0.0, "metadata": fetched[record_id]} for record_id in extra if record_id in fetched)
+            except Exception as e:
+                logger.warning("Spatial top-up fetch failed: %s", e)
+
+    logger.debug("Spatial filter for %s: %s of %s matches kept, %s in area", location, len(kept), len(matches), len(area_ids))
+    return kept
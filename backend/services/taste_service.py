@@ -1,20 +1,31 @@
 """
 Taste vector analysis and similarity calculations.
 """
+import logging
 from typing import List, Dict, Optional
 import csv
 import json
 from pathlib import Path
-from integrations.embeddings import embed_text, calculate_cosine_similarity, combine_vectors
+import numpy as np
+from integrations.embeddings import embed_text, calculate_cosine_similarity, combine_vectors, cosine_similarities
 from integrations.pinecone_client import query_pinecone
 from config import TASTE_VECTOR_SIZE, USE_SEMANTIC_INGREDIENT_TASTE
 from models import UserProfile
-from services.restaurant_service import get_groq_client
+from integrations.groq_client import chat_completion
+from services.llm_memo import recall, remember
+from services.bounded_cache import BoundedCache
+from services.keyword_matcher import KeywordMatcher
+
+logger = logging.getLogger(__name__)
 
 
 # Cache for taste inference
-_taste_infer_cache: Dict[str, List[float]] = {}
+_taste_infer_cache = BoundedCache("taste_infer")
+
+# Part of the LLM memo key for infer_taste_from_groq
+TASTE_INFER_PROMPT_VERSION = "v1"
 _ingredient_flavor_map: Optional[Dict[str, Dict]] = None
+_ingredient_matcher: Optional[KeywordMatcher] = None
 
 
 def load_ingredient_flavor_map() -> Dict[str, Dict]:
@@ -26,7 +37,7 @@ def load_ingredient_flavor_map() -> Dict[str, Dict]:
     
     csv_path = Path("ingredient-flavor.csv")
     if not csv_path.exists():
-        print(f"[WARNING] {csv_path} not found")
+        logger.warning("%s not found", csv_path)
         _ingredient_flavor_map = {}
         return _ingredient_flavor_map
     
@@ -49,40 +60,48 @@ def load_ingredient_flavor_map() -> Dict[str, Dict]:
     return flavor_map
 
 
+def get_ingredient_matcher() -> KeywordMatcher:
+    """Compiled matcher over all ingredient names (built once with the flavor map)."""
+    global _ingredient_matcher
+    if _ingredient_matcher is None:
+        _ingredient_matcher = KeywordMatcher(load_ingredient_flavor_map())
+    return _ingredient_matcher
+
+
 def infer_taste_from_text(text: str) -> List[float]:
     """Infer taste vector from text using keyword matching."""
     if not text:
         return [0.0] * TASTE_VECTOR_SIZE
     
-    if text in _taste_infer_cache:
-        return _taste_infer_cache[text]
+    cached = _taste_infer_cache.get(text)
+    if cached is not None:
+        return cached
     
     flavor_map = load_ingredient_flavor_map()
-    text_lower = text.lower()
     
     matched_flavors = []
-    matched_ingredients = []
-    for ingredient, flavors in flavor_map.items():
-        if ingredient in text_lower:
-            matched_ingredients.append(ingredient)
-            matched_flavors.append([
-                flavors["sweet"],
-                flavors["salty"],
-                flavors["sour"],
-                flavors["bitter"],
-                flavors["umami"],
-                flavors["spicy"],
-            ])
+    matched_ingredients = get_ingredient_matcher().find_all(text)
+    for ingredient in matched_ingredients:
+        flavors = flavor_map[ingredient]
+        matched_flavors.append([
+            flavors["sweet"],
+            flavors["salty"],
+            flavors["sour"],
+            flavors["bitter"],
+            flavors["umami"],
+            flavors["spicy"],
+        ])
     
     if not matched_flavors:
-        print(f"[DEBUG] No ingredients matched in '{text}'")
+        logger.debug("No ingredients matched in '%s'", text)
         result = [0.0] * TASTE_VECTOR_SIZE
     else:
         result = [sum(f[i] for f in matched_flavors) / len(matched_flavors) for i in range(TASTE_VECTOR_SIZE)]
-        print(f"[DEBUG] Matched ingredients in '{text}': {matched_ingredients}")
-        print(f"[DEBUG] Taste vector: {[round(x, 2) for x in result]}")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Matched ingredients in '%s': %s", text, matched_ingredients)
+            logger.debug("Taste vector: %s", [round(x, 2) for x in result])
     
-    _taste_infer_cache[text] = result
+    _taste_infer_cache.set(text, result)
     return result
 
 
@@ -93,12 +112,16 @@ def infer_taste_from_groq(dish_name: str) -> List[float]:
     
     # Check cache first
     cache_key = f"groq_{dish_name}"
-    if cache_key in _taste_infer_cache:
-        return _taste_infer_cache[cache_key]
+    cached = _taste_infer_cache.get(cache_key)
+    if cached is not None:
+        return cached
+
+    memoized = recall("taste_infer", TASTE_INFER_PROMPT_VERSION, dish_name)
+    if memoized is not None:
+        _taste_infer_cache.set(cache_key, memoized)
+        return memoized
     
     try:
-        client = get_groq_client()
-        
         prompt = f"""Analyze the dish "{dish_name}" and provide taste profile values on a scale of 0.0 to 1.0 for each attribute.
 
 Return ONLY a JSON object with these exact keys (no other text):
@@ -118,15 +141,8 @@ Guidelines:
 
 Example for "Margherita Pizza": {{"sweet": 0.2, "salty": 0.6, "sour": 0.1, "bitter": 0.0, "umami": 0.7, "spicy": 0.1}}"""
 
-        response = client.chat.completions.create(
-            model="llama-3.3-70b-versatile",
-            messages=[{"role": "user", "content": prompt}],
-            temperature=0.3,
-            max_tokens=200
-        )
-        
-        content = response.choices[0].message.content.strip()
-        print(f"[DEBUG] Groq taste inference for '{dish_name}': {content}")
+        content = chat_completion(prompt, temperature=0.3, max_tokens=200)
+        logger.debug("Groq taste inference for '%s': %s", dish_name, content)
         
         # Parse JSON response
         taste_data = json.loads(content)
@@ -139,12 +155,14 @@ Example for "Margherita Pizza": {{"sweet": 0.2, "salty": 0.6, "sour": 0.1, "bitt
             float(taste_data.get("spicy", 0)),
         ]
         
-        print(f"[DEBUG] Groq inferred taste vector: {[round(x, 2) for x in result]}")
-        _taste_infer_cache[cache_key] = result
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Groq inferred taste vector: %s", [round(x, 2) for x in result])
+        _taste_infer_cache.set(cache_key, result)
+        remember("taste_infer", TASTE_INFER_PROMPT_VERSION, dish_name, result)
         return result
         
     except Exception as e:
-        print(f"[ERROR] Groq taste inference failed for '{dish_name}': {e}")
+        logger.error("Groq taste inference failed for '%s': %s", dish_name, e)
         return [0.0] * TASTE_VECTOR_SIZE
 
 
@@ -153,8 +171,9 @@ def infer_taste_from_text_semantic(text: str) -> List[float]:
     if not text:
         return [0.0] * TASTE_VECTOR_SIZE
     
-    if text in _taste_infer_cache:
-        return _taste_infer_cache[text]
+    cached = _taste_infer_cache.get(text)
+    if cached is not None:
+        return cached
     
     try:
         query_vec = embed_text(text)
@@ -166,11 +185,11 @@ def infer_taste_from_text_semantic(text: str) -> List[float]:
         )
         
         if not matches:
-            print(f"[DEBUG] Semantic search found no matches for '{text}', falling back to keyword matching")
+            logger.debug("Semantic search found no matches for '%s', falling back to keyword matching", text)
             keyword_result = infer_taste_from_text(text)
             # If keyword matching also fails (returns all zeros), use Groq
             if sum(abs(x) for x in keyword_result) == 0:
-                print(f"[DEBUG] Keyword matching also failed, using Groq API for '{text}'")
+                logger.debug("Keyword matching also failed, using Groq API for '%s'", text)
                 return infer_taste_from_groq(text)
             return keyword_result
         else:
@@ -188,11 +207,11 @@ def infer_taste_from_text_semantic(text: str) -> List[float]:
             
             result = [sum(tv[i] for tv in taste_vectors) / len(taste_vectors) for i in range(TASTE_VECTOR_SIZE)]
         
-        _taste_infer_cache[text] = result
+        _taste_infer_cache.set(text, result)
         return result
         
     except Exception as e:
-        print(f"[ERROR] Semantic taste inference failed: {e}")
+        logger.error("Semantic taste inference failed: %s", e)
         return infer_taste_from_text(text)
 
 
@@ -208,6 +227,11 @@ def taste_similarity(user_vec: List[float], item_vec: List[float]) -> float:
     return calculate_cosine_similarity(user_vec, item_vec)
 
 
+def taste_similarities(user_vec: List[float], item_vecs: List[List[float]]) -> np.ndarray:
+    """taste_similarity of the user against many items in one matrix op."""
+    return cosine_similarities(user_vec, item_vecs)
+
+
 def user_profile_to_taste_vector(user_profile: UserProfile) -> List[float]:
     """Convert user profile to taste vector."""
     if not user_profile or not user_profile.favorite_dishes:
@@ -226,12 +250,13 @@ def user_profile_to_taste_vector(user_profile: UserProfile) -> List[float]:
             taste_vectors.append(taste_vec)
     
     if not taste_vectors:
-        print(f"[DEBUG] No taste vectors found for favorite dishes: {dish_texts}")
+        logger.debug("No taste vectors found for favorite dishes: %s", dish_texts)
         return [0.0] * TASTE_VECTOR_SIZE
     
     # Average all taste vectors
     result = [sum(tv[i] for tv in taste_vectors) / len(taste_vectors) for i in range(TASTE_VECTOR_SIZE)]
-    print(f"[DEBUG] Computed user taste vector from {len(taste_vectors)} dishes: {[round(x, 2) for x in result]}")
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("Computed user taste vector from %s dishes: %s", len(taste_vectors), [round(x, 2) for x in result])
     return result
 
 
@@ -246,3 +271,14 @@ def favorites_boost(menu_items: List[str], favorite_dishes: List[Dict]) -> float
     matches = sum(1 for fav in fav_names if any(fav in menu for menu in menu_lower))
     return matches * 0.1
 
+
+def favorites_boosts(menus: List[List[str]], favorite_dishes: List[Dict]) -> np.ndarray:
+    """favorites_boost for many menus: a (menus x favorites) hit matrix summed per menu."""
+    fav_names = [d.get("name", "").lower() for d in favorite_dishes or [] if d.get("name")]
+    if not menus or not fav_names:
+        return np.zeros(len(menus or []), dtype=float)
+    # One string per menu; the separator can't occur in a name, so a hit is still within one item
+    menu_texts = ["\x00".join(menu).lower() for menu in menus]
+    hits = np.array([[fav in text for fav in fav_names] for text in menu_texts], dtype=bool)
+    return hits.sum(axis=1) * 0.1
+
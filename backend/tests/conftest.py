@@ -0,0 +1,22 @@
+import time
+
+import pytest
+
+
+class FakeClock:
+    def __init__(self, start: float = 1_000_000.0):
+        self.now = start
+
+    def __call__(self) -> float:
+        return self.now
+
+    def advance(self, seconds: float) -> None:
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Replace time.time with a clock the test advances by hand."""
+    fake = FakeClock()
+    monkeypatch.setattr(time, "time", fake)
+    return fake
@@ -0,0 +1,62 @@
+import services.allergens as allergens
+from services.allergens import (
+    ALLERGEN_BITS,
+    allergen_bit,
+    allergy_safety,
+    mask_to_allergens,
+    split_allergies,
+)
+
+
+def test_vocabulary_allergy_maps_to_single_bit():
+    assert allergen_bit("Peanut") == ALLERGEN_BITS["peanuts"]
+    assert allergen_bit("shrimp") == ALLERGEN_BITS["shellfish"]
+
+
+def test_unknown_allergy_is_free_text():
+    assert allergen_bit("kiwi") is None
+    assert split_allergies(["kiwi", " "]) == (0, ["kiwi"])
+
+
+def test_nuts_covers_peanuts_and_tree_nuts():
+    for term in ("nuts", "nut", " Nuts "):
+        mask, free_text = split_allergies([term])
+        assert free_text == []
+        assert mask_to_allergens(mask) == ["peanuts", "tree nuts"]
+
+
+def test_seafood_covers_fish_and_shellfish():
+    mask, free_text = split_allergies(["seafood"])
+    assert free_text == []
+    assert mask_to_allergens(mask) == ["shellfish", "fish"]
+
+
+def test_umbrella_terms_reject_every_covered_dish():
+    dish_masks = {
+        "Peanut Noodles": ALLERGEN_BITS["peanuts"],
+        "Cashew Chicken": ALLERGEN_BITS["tree nuts"],
+        "Grilled Salmon": ALLERGEN_BITS["fish"],
+        "Garlic Shrimp": ALLERGEN_BITS["shellfish"],
+        "Green Salad": 0,
+    }
+    assert allergy_safety(dish_masks, ["nuts"]) == {
+        "Peanut Noodles": False,
+        "Cashew Chicken": False,
+        "Grilled Salmon": True,
+        "Garlic Shrimp": True,
+        "Green Salad": True,
+    }
+    assert allergy_safety(dish_masks, ["seafood"]) == {
+        "Peanut Noodles": True,
+        "Cashew Chicken": True,
+        "Grilled Salmon": False,
+        "Garlic Shrimp": False,
+        "Green Salad": True,
+    }
+
+
+def test_failed_annotation_falls_back_to_the_users_words(monkeypatch):
+    monkeypatch.setattr(allergens, "dish_allergen_masks", lambda dishes: {d: None for d in dishes})
+    dish_masks = {"Milkshake": None, "Walnut Cake": None, "Green Salad": None}
+    assert allergy_safety(dish_masks, ["milk"]) == {"Milkshake": False, "Walnut Cake": True, "Green Salad": True}
+    assert allergy_safety(dish_masks, ["nuts"]) == {"Milkshake": True, "Walnut Cake": False, "Green Salad": True}
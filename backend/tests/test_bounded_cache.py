@@ -0,0 +1,82 @@
+from services.bounded_cache import BoundedCache, memo_cache_stats
+
+
+def _cache(**kwargs):
+    kwargs.setdefault("max_entries", 2)
+    kwargs.setdefault("ttl", None)
+    return BoundedCache("test", register=False, **kwargs)
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = _cache()
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1  # "b" is now the oldest
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1 and cache.get("c") == 3
+    assert cache.evictions == 1
+
+
+def test_overwriting_refreshes_recency_without_evicting():
+    cache = _cache()
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.set("a", 10)
+    cache.set("c", 3)
+    assert cache.get("a") == 10
+    assert cache.get("b") is None
+    assert cache.evictions == 1
+
+
+def test_entries_expire_after_the_default_ttl(clock):
+    cache = _cache(ttl=10)
+    cache.set("a", 1)
+    clock.advance(9.9)
+    assert cache.get("a") == 1
+    clock.advance(0.2)
+    assert cache.get("a", "missing") == "missing"
+    assert len(cache) == 0
+
+
+def test_per_entry_ttl_overrides_the_default(clock):
+    cache = _cache(ttl=100)
+    cache.set("short", 1, ttl=5)
+    cache.set("long", 2)
+    clock.advance(6)
+    assert cache.get("short") is None
+    assert cache.get("long") == 2
+
+
+def test_non_positive_ttl_means_no_expiry(clock):
+    cache = _cache(ttl=0)
+    cache.set("a", 1)
+    clock.advance(10 ** 9)
+    assert cache.get("a") == 1
+
+
+def test_get_entry_returns_value_and_stored_at(clock):
+    cache = _cache()
+    stored_at = clock.now
+    cache.set("a", None)
+    clock.advance(3)
+    assert cache.get_entry("a") == (None, stored_at)
+    assert cache.get_entry("b") is None
+
+
+def test_counters_in_stats():
+    cache = _cache()
+    cache.set("a", 1)
+    cache.get("a")
+    cache.get("missing")
+    for key in "bcd":
+        cache.set(key, key)
+    assert cache.stats() == {
+        "size": 2, "max_entries": 2, "ttl_s": None,
+        "hits": 1, "misses": 1, "hit_rate": 0.5, "evictions": 2,
+    }
+
+
+def test_registered_caches_report_by_name():
+    BoundedCache("test_registered", max_entries=3, ttl=None).set("a", 1)
+    assert memo_cache_stats()["test_registered"]["size"] == 1
@@ -0,0 +1,41 @@
+import numpy as np
+
+from integrations.embeddings import calculate_cosine_similarity, cosine_similarities, top_n_indices
+
+
+def test_top_n_is_best_first():
+    assert top_n_indices([0.2, 0.9, 0.5, 0.7], 2).tolist() == [1, 3]
+
+
+def test_top_n_ties_keep_original_order():
+    scores = [0.5, 0.9, 0.5, 0.5, 0.1, 0.9]
+    assert top_n_indices(scores, 3).tolist() == [1, 5, 0]
+    assert top_n_indices(scores, 4).tolist() == [1, 5, 0, 2]
+
+
+def test_top_n_matches_a_stable_descending_sort():
+    rng = np.random.default_rng(0)
+    for _ in range(100):
+        scores = rng.integers(0, 5, size=rng.integers(1, 20)).astype(float)
+        n = int(rng.integers(1, 25))
+        expected = sorted(range(len(scores)), key=lambda i: -scores[i])[:n]
+        assert top_n_indices(scores, n).tolist() == expected
+
+
+def test_top_n_with_n_at_or_past_the_length_returns_everything():
+    assert top_n_indices([0.1, 0.3, 0.2], 3).tolist() == [1, 2, 0]
+    assert top_n_indices([0.1, 0.3, 0.2], 10).tolist() == [1, 2, 0]
+
+
+def test_top_n_empty_cases():
+    assert top_n_indices([], 3).tolist() == []
+    assert top_n_indices([0.4, 0.2], 0).tolist() == []
+
+
+def test_batched_cosine_matches_the_pairwise_one():
+    user = [0.8, 0.1, 0.0, 0.0, 0.3, 0.6]
+    items = [[0.1, 0.9, 0.0, 0.2, 0.0, 0.0], [0.0] * 6, [0.8, 0.1, 0.0, 0.0, 0.3, 0.6]]
+    batched = cosine_similarities(user, items)
+    assert np.allclose(batched, [calculate_cosine_similarity(user, item) for item in items])
+    assert batched[1] == 0.0
+    assert np.isclose(batched[2], 1.0)
@@ -0,0 +1,126 @@
+import asyncio
+import time
+
+import groq
+import httpx
+import pytest
+
+import integrations.groq_client as groq_client
+from integrations.groq_client import LLMDeadlineExceeded, LLMGateway, LLMGatewayError, TokenBucket
+
+PARAMS = {"messages": [{"role": "user", "content": "hi"}], "model": "test-model", "max_tokens": 10}
+REQUEST = httpx.Request("POST", "https://api.groq.com/openai/v1/chat/completions")
+
+
+def _connection_error():
+    return groq.APIConnectionError(request=REQUEST)
+
+
+def _rate_limit_error(retry_after):
+    response = httpx.Response(429, headers={"retry-after": str(retry_after)}, request=REQUEST)
+    return groq.RateLimitError("rate limited", response=response, body=None)
+
+
+@pytest.fixture
+def fast_backoff(monkeypatch):
+    monkeypatch.setattr(groq_client, "GROQ_MAX_RETRIES", 3)
+    monkeypatch.setattr(groq_client, "GROQ_BACKOFF_BASE_SECONDS", 0.001)
+    monkeypatch.setattr(groq_client, "GROQ_BACKOFF_MAX_SECONDS", 0.005)
+
+
+def _run_with_retries(call, deadline_seconds=5.0):
+    """Run LLMGateway._with_retries on a gateway built without the client or its loop thread."""
+    async def scenario():
+        gateway = LLMGateway.__new__(LLMGateway)
+        gateway.stats = {"calls": 0, "retries": 0, "rate_limited": 0, "deadline_exceeded": 0, "failures": 0}
+        gateway._semaphore = asyncio.Semaphore(2)
+        gateway._request_bucket = TokenBucket(6000)
+        gateway._token_bucket = TokenBucket(10 ** 6)
+        try:
+            return await gateway._with_retries(PARAMS, time.monotonic() + deadline_seconds, call), gateway.stats
+        except LLMGatewayError as e:
+            return e, gateway.stats
+
+    return asyncio.run(scenario())
+
+
+class FlakyCall:
+    """Fails with the given error the first `failures` times, then answers."""
+
+    def __init__(self, failures, error=_connection_error):
+        self.failures = failures
+        self.error = error
+        self.attempts = 0
+
+    async def __call__(self, remaining):
+        self.attempts += 1
+        if self.attempts <= self.failures:
+            raise self.error()
+        return "ok"
+
+
+def test_transient_errors_are_retried(fast_backoff):
+    call = FlakyCall(failures=2)
+    result, stats = _run_with_retries(call)
+    assert result == "ok"
+    assert call.attempts == 3
+    assert stats["retries"] == 2 and stats["calls"] == 3 and stats["failures"] == 0
+
+
+def test_gives_up_after_max_retries(fast_backoff):
+    call = FlakyCall(failures=10)
+    error, stats = _run_with_retries(call)
+    assert isinstance(error, LLMGatewayError) and not isinstance(error, LLMDeadlineExceeded)
+    assert call.attempts == groq_client.GROQ_MAX_RETRIES + 1
+    assert stats["failures"] == 1
+
+
+def test_non_retryable_errors_are_not_retried(fast_backoff):
+    call = FlakyCall(failures=1, error=lambda: ValueError("bad request"))
+    with pytest.raises(ValueError):
+        _run_with_retries(call)
+    assert call.attempts == 1
+
+
+def test_slow_call_is_cut_off_at_the_deadline(fast_backoff):
+    async def slow(remaining):
+        await asyncio.sleep(5)
+
+    started = time.monotonic()
+    error, stats = _run_with_retries(slow, deadline_seconds=0.05)
+    assert isinstance(error, LLMDeadlineExceeded)
+    assert time.monotonic() - started < 1
+    assert stats["deadline_exceeded"] == 1
+
+
+def test_retry_after_past_the_deadline_stops_retrying(fast_backoff):
+    call = FlakyCall(failures=1, error=lambda: _rate_limit_error(30))
+    started = time.monotonic()
+    error, stats = _run_with_retries(call, deadline_seconds=1.0)
+    assert isinstance(error, LLMDeadlineExceeded)
+    assert call.attempts == 1
+    assert time.monotonic() - started < 0.5
+    assert stats["rate_limited"] == 1
+
+
+def test_bucket_waits_for_refill_when_empty():
+    async def scenario():
+        bucket = TokenBucket(600)  # 10 tokens/s
+        bucket.tokens = 0.0
+        started = time.monotonic()
+        await bucket.acquire(0.5, deadline=started + 5)
+        return time.monotonic() - started
+
+    assert asyncio.run(scenario()) >= 0.04
+
+
+def test_bucket_fails_fast_when_refill_would_pass_the_deadline():
+    async def scenario():
+        bucket = TokenBucket(60)  # 1 token/s
+        bucket.tokens = 0.0
+        await bucket.acquire(1, deadline=time.monotonic() + 0.1)
+
+    started = time.monotonic()
+    with pytest.raises(LLMDeadlineExceeded):
+        asyncio.run(scenario())
+    assert time.monotonic() - started < 0.1
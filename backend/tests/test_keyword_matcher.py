@@ -0,0 +1,100 @@
+import random
+import re
+
+from services.keyword_matcher import KeywordMatcher, keyword_matcher
+
+
+def _reference_any(patterns, text):
+    """The checks KeywordMatcher replaced: any(k in text.lower() for k in patterns)."""
+    return any(k.lower() in text.lower() for k in patterns if k)
+
+
+def _reference_all(patterns, text):
+    found = [k.lower() for k in patterns if k and k.lower() in text.lower()]
+    return list(dict.fromkeys(found))
+
+
+def _assert_same(patterns, text):
+    matcher = KeywordMatcher(patterns)
+    assert matcher.contains_any(text) == _reference_any(patterns, text), (patterns, text)
+    assert matcher.find_all(text) == _reference_all(patterns, text), (patterns, text)
+
+
+def test_nested_patterns_are_all_found():
+    matcher = KeywordMatcher(["chili", "chili pepper", "pepper"])
+    assert matcher.find_all("Grilled Chili Pepper Tofu") == ["chili", "chili pepper", "pepper"]
+    assert matcher.find_all("sweet chili sauce") == ["chili"]
+    assert matcher.contains_any("Chili Pepper")
+
+
+def test_overlapping_patterns_are_all_found():
+    matcher = KeywordMatcher(["she", "he", "hers", "his"])
+    assert matcher.find_all("ushers") == ["she", "he", "hers"]
+    _assert_same(["aba", "bab", "ab"], "ababab")
+
+
+def test_empty_pattern_list_matches_nothing():
+    for matcher in (KeywordMatcher([]), KeywordMatcher(["", None])):
+        assert len(matcher) == 0
+        assert not matcher.contains_any("anything at all")
+        assert matcher.find_all("anything at all") == []
+
+
+def test_empty_text_matches_nothing():
+    matcher = KeywordMatcher(["egg"])
+    assert not matcher.contains_any("")
+    assert matcher.find_all("") == []
+
+
+def test_matching_is_case_insensitive():
+    matcher = KeywordMatcher(["Peanut", "SESAME oil"])
+    assert matcher.contains_any("PEANUT butter")
+    assert matcher.find_all("Toasted Sesame Oil and peanuts") == ["peanut", "sesame oil"]
+    assert not matcher.contains_any("sesame")
+
+
+def test_substring_semantics_match_the_old_checks():
+    cases = [
+        (["egg"], "Eggplant Parmesan"),
+        (["nut", "peanut"], "Peanut Noodles"),
+        (["ham"], "Shawarma Plate"),
+        (["fish", "shellfish"], "Shellfish Platter"),
+        (["pad thai"], "pad  thai"),
+        (["curry"], "Green Curry, mild"),
+    ]
+    for patterns, text in cases:
+        _assert_same(patterns, text)
+
+
+def test_random_texts_match_the_old_checks():
+    rng = random.Random(0)
+    alphabet = "abc "
+    for _ in range(500):
+        patterns = ["".join(rng.choice(alphabet) for _ in range(rng.randint(1, 4))) for _ in range(rng.randint(0, 6))]
+        text = "".join(rng.choice(alphabet + "ABC") for _ in range(rng.randint(0, 20)))
+        _assert_same(patterns, text)
+
+
+def test_shared_matcher_ignores_pattern_order_and_case():
+    assert keyword_matcher(["Dairy", "egg"]) is keyword_matcher(["egg", "dairy"])
+
+
+def _reference_words(patterns, text):
+    """The per-pattern scan find_all(whole_words=True) replaces."""
+    return [k for k in dict.fromkeys(p.lower() for p in patterns if p) if re.search(r"\b" + re.escape(k) + r"\b", text.lower())]
+
+
+def test_whole_words_skips_matches_inside_words():
+    matcher = KeywordMatcher(["soy sauce", "soy", "ham", "egg"])
+    assert matcher.find_all("Graham crackers with soy sauce", whole_words=True) == ["soy sauce", "soy"]
+    assert matcher.find_all("eggplant, then ham & egg!", whole_words=True) == ["ham", "egg"]
+    assert matcher.find_all("grahamham", whole_words=True) == []
+
+
+def test_whole_words_match_regex_word_boundaries():
+    rng = random.Random(1)
+    alphabet = "ab -."
+    for _ in range(500):
+        patterns = ["".join(rng.choice(alphabet) for _ in range(rng.randint(1, 3))) for _ in range(rng.randint(0, 6))]
+        text = "".join(rng.choice(alphabet + "AB") for _ in range(rng.randint(0, 20)))
+        assert KeywordMatcher(patterns).find_all(text, whole_words=True) == _reference_words(patterns, text), (patterns, text)
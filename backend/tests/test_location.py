@@ -0,0 +1,37 @@
+from services.location_service import LocationFilter, location_parts
+from services.search_filters import location_filter_stages
+
+PORTLAND_ME = {"latitude": 43.66, "longitude": -70.26}
+PORTLAND_OR = {"latitude": 45.52, "longitude": -122.68}
+SEATTLE = {"latitude": 47.61, "longitude": -122.33}
+
+
+def test_city_without_state_matches_every_place_of_that_name():
+    location_filter = LocationFilter("portland")
+    assert location_filter.ambiguous
+    assert location_filter.matches("Portland, ME", PORTLAND_ME)
+    assert location_filter.matches("Portland, OR", PORTLAND_OR)
+    assert location_filter.matches("Portland, ME")
+    assert not location_filter.matches("Seattle, WA", SEATTLE)
+
+
+def test_state_picks_one_place():
+    assert not LocationFilter("portland, or").ambiguous
+    assert LocationFilter("portland, or").matches("Portland, OR", PORTLAND_OR)
+    assert not LocationFilter("portland, or").matches("Portland, ME", PORTLAND_ME)
+    assert LocationFilter("portland, me").matches("Portland, ME", PORTLAND_ME)
+    assert not LocationFilter("portland, me").matches("Portland, OR", PORTLAND_OR)
+
+
+def test_bare_me_after_city_is_maine():
+    assert location_parts("Portland, ME") == ["portland", "me"]
+    assert location_parts("near me, Boston") == ["boston"]
+    assert location_parts("pizza, near me") == ["pizza"]
+
+
+def test_ambiguous_city_filters_cover_every_place():
+    stages = location_filter_stages("portland")
+    cells = stages[0]["geohash"]["$in"]
+    assert any(cell.startswith("c2") for cell in cells)  # Oregon
+    assert any(cell.startswith("dr") for cell in cells)  # Maine
+    assert stages[-1] == {"city": {"$eq": "portland"}}
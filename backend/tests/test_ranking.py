@@ -0,0 +1,181 @@
+import json
+import random
+import re
+
+from services.allergens import ALLERGEN_BITS
+from services.recommendation_service import filter_and_rank_recommendations, filter_and_rank_with_cuisine_fallback
+
+USER_TASTE = [1.0, 0.0, 0.0, 0.0, 0.0, 0.0]
+FAVORITES = [{"name": "pad thai"}]
+QUERY = "spicy noodles"
+DISHES = ["Pad Thai", "Spicy Noodles", "Peanut Satay", "Green Curry", "Spring Rolls", "Mango Rice"]
+PEANUT = ALLERGEN_BITS["peanuts"]
+
+
+def _match(idx, rng):
+    menu = rng.sample(DISHES, rng.randint(1, 3))
+    peanut_dishes = set(rng.sample(menu, rng.randint(0, len(menu))))
+    meta = {
+        "name": f"Restaurant {idx}",
+        "cuisine_types": ["Thai"],
+        "menu_items": menu,
+        "popular_dishes": [],
+        "dishes_json": json.dumps([{"name": d, "allergens": PEANUT if d in peanut_dishes else 0} for d in menu]),
+    }
+    # Axis-aligned taste vectors and dyadic scores keep tied candidates exactly equal
+    taste = rng.choice([[1.0, 0, 0, 0, 0, 0], [0, 1.0, 0, 0, 0, 0], [0.5, 0, 0, 0, 0, 0]])
+    meta.update({f"taste_{k}": v for k, v in enumerate(taste)})
+    return {"id": f"r{idx}", "score": rng.randint(0, 8) / 8, "metadata": meta}
+
+
+def _brute_force(matches, allergies, max_results):
+    """Score every candidate, filter, sort: the ranking the staged pipeline must reproduce."""
+    query_tokens = set(QUERY.split())
+    rows = []
+    for seq, match in enumerate(matches):
+        meta = match["metadata"]
+        masks = {d["name"]: d["allergens"] for d in json.loads(meta["dishes_json"])}
+        menu = [d for d in meta["menu_items"] if not (allergies and masks[d] & PEANUT)]
+        if not menu:
+            continue
+        taste = [meta[f"taste_{k}"] for k in range(6)]
+        taste_score = 1.0 if taste[0] else 0.0
+        text = re.sub(r"[^\w\s]", "", (" ".join(menu) + " " + meta["name"] + " " + " ".join(meta["cuisine_types"])).lower())
+        overlap = len(query_tokens & set(text.split()))
+        fav = 0.1 * sum(1 for f in FAVORITES if any(f["name"] in m.lower() for m in menu))
+        score = match["score"] + 0.35 * taste_score + fav + (0.5 + 0.2 * overlap if overlap else 0.0)
+        rows.append((-round(score, 9), seq, match["id"]))
+    return [record_id for _, _, record_id in sorted(rows)[:max_results]]
+
+
+def _pages(rng, sizes):
+    counter = iter(range(10000))
+    return [[_match(next(counter), rng) for _ in range(size)] for size in sizes]
+
+
+def test_staged_ranking_matches_brute_force():
+    rng = random.Random(7)
+    for _ in range(200):
+        pages = _pages(rng, [rng.randint(0, 12) for _ in range(3)])
+        allergies = rng.choice([[], ["peanut"]])
+        max_results = rng.randint(1, 6)
+        pulled = [pages[0]]
+
+        def more():
+            for page in pages[1:]:
+                pulled.append(page)
+                yield page
+
+        ranked = filter_and_rank_recommendations(
+            pages[0], USER_TASTE, FAVORITES, None, allergies, max_results, QUERY, more_matches=more(),
+        )
+        expected = _brute_force([m for page in pulled for m in page], allergies, max_results)
+        assert [r["id"] for r in ranked] == expected
+
+
+def test_allergies_reject_the_top_candidates():
+    rng = random.Random(1)
+    matches = _pages(rng, [10])[0]
+    for match in matches[:4]:
+        match["score"] = 1.0
+        meta = match["metadata"]
+        meta["dishes_json"] = json.dumps([{"name": d, "allergens": PEANUT} for d in meta["menu_items"]])
+
+    ranked = filter_and_rank_recommendations(matches, USER_TASTE, FAVORITES, None, ["peanut"], 3, QUERY)
+    assert [r["id"] for r in ranked] == _brute_force(matches, ["peanut"], 3)
+    assert not {r["id"] for r in ranked} & {m["id"] for m in matches[:4]}
+
+
+def test_ties_keep_match_order():
+    rng = random.Random(2)
+    matches = _pages(rng, [6])[0]
+    for match in matches:
+        match["score"] = 0.5
+        match["metadata"] = {**matches[0]["metadata"], "name": match["metadata"]["name"]}
+
+    ranked = filter_and_rank_recommendations(matches, USER_TASTE, FAVORITES, None, ["peanut"], 4, QUERY)
+    assert [r["id"] for r in ranked] == [m["id"] for m in matches[:4]]
+
+
+def test_second_page_is_pulled_only_when_needed():
+    rng = random.Random(3)
+    first, second, third = _pages(rng, [3, 8, 8])
+    for page, mask in ((first, PEANUT), (second, 0)):
+        for match in page:
+            meta = match["metadata"]
+            meta["dishes_json"] = json.dumps([{"name": d, "allergens": mask} for d in meta["menu_items"]])
+    pulled = []
+
+    def more():
+        for page in (second, third):
+            pulled.append(page)
+            yield page
+
+    ranked = filter_and_rank_recommendations(first, USER_TASTE, FAVORITES, None, ["peanut"], 2, QUERY, more_matches=more())
+    assert pulled == [second]
+    assert [r["id"] for r in ranked] == _brute_force(first + second, ["peanut"], 2)
+
+
+def _with_cuisine(matches, cuisine):
+    for match in matches:
+        match["metadata"]["cuisine_types"] = [cuisine]
+    return matches
+
+
+def test_cuisine_with_fewer_matches_than_max_results():
+    rng = random.Random(4)
+    thai = _with_cuisine(_pages(rng, [8])[0], "Thai")
+    italian = _with_cuisine([_match(100 + i, rng) for i in range(2)], "Italian")
+    matches = thai[:4] + italian + thai[4:]
+    later = _with_cuisine([_match(200 + i, rng) for i in range(3)], "Thai")
+    pulled = []
+
+    def more():
+        pulled.append(later)
+        yield later
+
+    ranked, cuisine_matched = filter_and_rank_with_cuisine_fallback(
+        matches, USER_TASTE, FAVORITES, None, [], 5, QUERY, cuisine_filter="italian", more_matches=more(),
+    )
+    assert cuisine_matched
+    assert sorted(r["id"] for r in ranked) == sorted(m["id"] for m in italian)
+    assert pulled == [later]  # still looking for more Italian restaurants
+
+
+def test_cuisine_fallback_ranks_the_other_cuisines_without_paging():
+    rng = random.Random(5)
+    matches = _with_cuisine(_pages(rng, [8])[0], "Thai")
+    pulled = []
+
+    def more():
+        for n in range(5):
+            page = _with_cuisine([_match(300 + n * 10 + i, rng) for i in range(8)], "Thai")
+            pulled.append(page)
+            yield page
+
+    ranked, cuisine_matched = filter_and_rank_with_cuisine_fallback(
+        matches, USER_TASTE, FAVORITES, None, [], 5, QUERY, cuisine_filter="italian", more_matches=more(),
+    )
+    assert not cuisine_matched
+    assert pulled == []
+    assert [r["id"] for r in ranked] == _brute_force(matches, [], 5)
+
+
+def test_cuisine_fallback_pages_until_the_other_cuisines_can_fill():
+    rng = random.Random(6)
+    first = _with_cuisine(_pages(rng, [2])[0], "Thai")
+    second = _with_cuisine([_match(400 + i, rng) for i in range(6)], "Thai")
+    third = _with_cuisine([_match(500 + i, rng) for i in range(6)], "Thai")
+    pulled = []
+
+    def more():
+        for page in (second, third):
+            pulled.append(page)
+            yield page
+
+    ranked, cuisine_matched = filter_and_rank_with_cuisine_fallback(
+        first, USER_TASTE, FAVORITES, None, [], 5, QUERY, cuisine_filter="italian", more_matches=more(),
+    )
+    assert not cuisine_matched
+    assert pulled == [second]
+    assert [r["id"] for r in ranked] == _brute_force(first + second, [], 5)
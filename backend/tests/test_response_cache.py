@@ -0,0 +1,90 @@
+import asyncio
+
+import pytest
+
+from services.response_cache import (
+    InProcessCacheBackend,
+    ResponseCache,
+    SQLiteCacheBackend,
+    chat_cache_key,
+)
+
+TASTE = [0.8, 0.1, 0.0, 0.0, 0.3, 0.6]
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def backend(request, tmp_path):
+    if request.param == "memory":
+        return InProcessCacheBackend(max_entries=2)
+    return SQLiteCacheBackend(str(tmp_path / "response_cache.sqlite3"), max_entries=2)
+
+
+def test_entries_expire_after_ttl(backend, clock):
+    backend.set("k", "v", ttl=10)
+    clock.advance(9)
+    assert backend.get("k") == ("v", clock.now - 9)
+    clock.advance(2)
+    assert backend.get("k") is None
+    assert len(backend) == 0
+
+
+def test_least_recently_used_entry_is_evicted(backend, clock):
+    backend.set("a", "1", ttl=60)
+    clock.advance(1)
+    backend.set("b", "2", ttl=60)
+    clock.advance(1)
+    assert backend.get("a") is not None  # "b" is now the oldest
+    clock.advance(1)
+    backend.set("c", "3", ttl=60)
+    assert backend.evictions == 1
+    assert backend.get("b") is None
+    assert backend.get("a") is not None and backend.get("c") is not None
+    clock.advance(1)
+    backend.set("d", "4", ttl=60)
+    assert backend.evictions == 2
+    assert len(backend) == 2
+
+
+def test_set_strips_per_request_fields():
+    cache = ResponseCache(InProcessCacheBackend(max_entries=10), ttl=60)
+    response = {"response": {"text": "hi"}, "cache": {"hit": False}, "timing": {"total": 12.0}}
+    asyncio.run(cache.set("k", response))
+    cached = asyncio.run(cache.get("k"))
+    assert cached["response"] == {"text": "hi"}
+    assert "timing" not in cached
+    assert cached["cache"]["hit"] is True
+    assert cache.stats()["hits"] == 1 and cache.stats()["stores"] == 1
+
+
+def _key(**overrides):
+    args = dict(
+        query="Spicy ramen near me?",
+        location="Boston, MA",
+        diet_type="veg",
+        allergies=["peanuts", "Dairy"],
+        taste_vec=TASTE,
+        favorite_dishes=[{"name": "Pad Thai"}, {"name": "Ramen"}],
+        max_results=10,
+    )
+    args.update(overrides)
+    return chat_cache_key(**args)
+
+
+def test_key_ignores_punctuation_case_and_favorite_order():
+    assert _key() == _key(
+        query="  spicy RAMEN, near me ",
+        location="boston ma",
+        allergies=["dairy", "Peanuts", "dairy"],
+        favorite_dishes=[{"name": "ramen"}, {"name": "pad thai!"}],
+    )
+
+
+def test_key_buckets_near_identical_taste():
+    assert _key() == _key(taste_vec=[0.81, 0.1, 0.01, 0.0, 0.3, 0.6])
+
+
+def test_key_differs_on_allergy_or_diet():
+    assert _key() != _key(allergies=["peanuts"])
+    assert _key() != _key(allergies=["peanuts", "dairy", "shellfish"])
+    assert _key() != _key(diet_type="non-veg")
+    assert _key(diet_type=None) == _key(diet_type="mix")
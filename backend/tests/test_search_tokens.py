@@ -0,0 +1,39 @@
+import random
+
+from services.search_tokens import query_overlap, restaurant_token_fields, tokenize_query
+
+WORDS = ["pad", "thai", "spicy", "Noodles", "green", "curry!", "chick-pea", "the", "basil", "Siam", "food", "rice"]
+
+
+def _meta(rng):
+    menu = [" ".join(rng.sample(WORDS, rng.randint(1, 3))).title() for _ in range(rng.randint(0, 5))]
+    return {
+        "name": " ".join(rng.sample(WORDS, 2)),
+        "cuisine_types": rng.sample(["Thai", "Asian Fusion", "Indian"], rng.randint(0, 2)),
+        "popular_dishes": rng.sample(menu, min(len(menu), 2)),
+        "menu_items": menu,
+    }
+
+
+def test_stored_tokens_score_the_same_as_tokenizing_on_the_fly():
+    rng = random.Random(0)
+    for _ in range(500):
+        meta = _meta(rng)
+        tokens = tokenize_query(" ".join(rng.sample(WORDS, rng.randint(1, 4))) + "?")
+        menu = [m for m in meta["menu_items"] if rng.random() < 0.6]  # diet/allergy filtering
+        stored = {**meta, **restaurant_token_fields(meta)}
+        assert query_overlap(tokens, stored, menu) == query_overlap(tokens, meta, menu), (tokens, meta, menu)
+
+
+def test_query_tokens_drop_stop_words_and_punctuation():
+    assert tokenize_query("Find me the best Pad-Thai!") == {"padthai"}
+    assert tokenize_query(None) == set()
+
+
+def test_menu_token_counts_only_for_remaining_dishes():
+    meta = {"name": "Siam", "cuisine_types": ["Thai"], "popular_dishes": [], "menu_items": ["Basil Chicken", "Green Curry"]}
+    stored = {**meta, **restaurant_token_fields(meta)}
+    tokens = tokenize_query("basil curry")
+    assert query_overlap(tokens, stored, meta["menu_items"]) == 2
+    assert query_overlap(tokens, stored, ["Green Curry"]) == 1
+    assert query_overlap(tokens, meta, ["Green Curry"]) == 1
@@ -0,0 +1,84 @@
+import asyncio
+
+import pytest
+
+from services.singleflight import SingleFlight
+
+
+def test_concurrent_identical_calls_share_one_execution():
+    async def scenario():
+        flights = SingleFlight("test")
+        calls = 0
+        release = asyncio.Event()
+
+        async def compute():
+            nonlocal calls
+            calls += 1
+            await release.wait()
+            return {"recommendations": [{"name": "Pad Thai"}]}
+
+        waiters = [asyncio.ensure_future(flights.do("q", compute)) for _ in range(3)]
+        await asyncio.sleep(0)
+        release.set()
+        results = await asyncio.gather(*waiters)
+        return flights, calls, results
+
+    flights, calls, results = asyncio.run(scenario())
+    assert calls == 1
+    assert [shared for _, shared in results] == [False, True, True]
+    # Each caller gets its own copy
+    first, second, _ = [result for result, _ in results]
+    assert first == second and first is not second
+    first["recommendations"][0]["name"] = "changed"
+    assert second["recommendations"][0]["name"] == "Pad Thai"
+    assert flights.stats() == {"in_flight": 0, "leaders": 1, "coalesced": 2}
+
+
+def test_different_keys_do_not_share():
+    async def scenario():
+        flights = SingleFlight("test")
+
+        async def compute(value):
+            await asyncio.sleep(0)
+            return value
+
+        return await asyncio.gather(flights.do("a", lambda: compute(1)), flights.do("b", lambda: compute(2)))
+
+    assert asyncio.run(scenario()) == [(1, False), (2, False)]
+
+
+def test_cancelling_one_waiter_does_not_cancel_the_shared_call():
+    async def scenario():
+        flights = SingleFlight("test")
+        release = asyncio.Event()
+
+        async def compute():
+            await release.wait()
+            return "done"
+
+        leader = asyncio.ensure_future(flights.do("q", compute))
+        follower = asyncio.ensure_future(flights.do("q", compute))
+        await asyncio.sleep(0)
+        leader.cancel()
+        await asyncio.sleep(0)
+        release.set()
+        result = await follower
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        return result
+
+    assert asyncio.run(scenario()) == ("done", True)
+
+
+def test_exceptions_reach_every_caller():
+    async def scenario():
+        flights = SingleFlight("test")
+
+        async def compute():
+            await asyncio.sleep(0)
+            raise RuntimeError("boom")
+
+        return await asyncio.gather(flights.do("q", compute), flights.do("q", compute), return_exceptions=True)
+
+    results = asyncio.run(scenario())
+    assert all(isinstance(r, RuntimeError) for r in results)
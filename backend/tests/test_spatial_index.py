@@ -0,0 +1,80 @@
+import math
+
+import pytest
+
+import services.spatial_index as spatial_index
+from services.location_service import EARTH_RADIUS_KM, geohash_cell_size, geohash_encode
+from services.spatial_index import SpatialIndex, build_spatial_index, intersect_with_spatial
+
+BOSTON = (42.3601, -71.0589)
+KM_PER_DEGREE_LAT = EARTH_RADIUS_KM * math.pi / 180
+
+
+def _north_of(point, km):
+    return point[0] + km / KM_PER_DEGREE_LAT, point[1]
+
+
+def test_radius_edge():
+    index = SpatialIndex()
+    index.add("inside", *_north_of(BOSTON, 4.99))
+    index.add("outside", *_north_of(BOSTON, 5.01))
+    found = index.nearby(*BOSTON, radius_km=5.0)
+    assert [record_id for record_id, _ in found] == ["inside"]
+    assert found[0][1] == pytest.approx(4.99, abs=1e-6)
+
+
+def test_nearby_is_sorted_and_limited():
+    index = SpatialIndex()
+    for km in (3, 1, 2):
+        index.add(f"r{km}", *_north_of(BOSTON, km))
+    assert [record_id for record_id, _ in index.nearby(*BOSTON, radius_km=5.0)] == ["r1", "r2", "r3"]
+    assert [record_id for record_id, _ in index.nearby(*BOSTON, radius_km=5.0, limit=2)] == ["r1", "r2"]
+
+
+def test_point_across_a_geohash_cell_boundary_is_found():
+    _, cell_lng = geohash_cell_size(5)
+    boundary = -180 + round((BOSTON[1] + 180) / cell_lng) * cell_lng
+    center = (BOSTON[0], boundary - 1e-5)
+    neighbour = (BOSTON[0], boundary + 1e-5)
+    assert geohash_encode(*center, 5) != geohash_encode(*neighbour, 5)
+
+    index = SpatialIndex()
+    index.add("neighbour", *neighbour)
+    assert [record_id for record_id, _ in index.nearby(*center, radius_km=0.1)] == ["neighbour"]
+    assert index.within((center[0] - 0.001, center[1] - 0.001, center[0] + 0.001, center[1] + 0.001)) == ["neighbour"]
+
+
+def test_moving_a_point_updates_its_buckets():
+    index = SpatialIndex()
+    index.add("r", *BOSTON)
+    index.add("r", 45.5152, -122.6784)
+    assert index.nearby(*BOSTON, radius_km=10.0) == []
+    index.remove("r")
+    assert len(index) == 0 and "r" not in index
+
+
+def _meta(point):
+    return {"coordinates": {"latitude": point[0], "longitude": point[1]}}
+
+
+def test_top_up_adds_the_nearest_missing_restaurants(monkeypatch):
+    monkeypatch.setattr(spatial_index, "_spatial_index", None)
+    points = {
+        "semantic": _north_of(BOSTON, 1),
+        "far": _north_of(BOSTON, 12),
+        "near": _north_of(BOSTON, 2),
+        "middle": _north_of(BOSTON, 6),
+        "out_of_area": (45.5152, -122.6784),
+    }
+    build_spatial_index([(record_id, _meta(point)) for record_id, point in points.items()])
+    monkeypatch.setattr(spatial_index, "fetch_metadata", lambda ids, namespace: {i: {"name": i} for i in ids})
+
+    matches = [
+        {"id": "out_of_area", "score": 0.9},
+        {"id": "semantic", "score": 0.8},
+        {"id": "not_indexed", "score": 0.7},
+    ]
+    kept = intersect_with_spatial(matches, "Boston", min_results=4)
+    assert [m["id"] for m in kept] == ["semantic", "not_indexed", "near", "middle"]
+    assert [m["score"] for m in kept[2:]] == [0.0, 0.0]
+    assert kept[2]["metadata"] == {"name": "near"}
@@ -0,0 +1,36 @@
+"""
+Train the local dish diet/course classifier from the recipe database.
+
+Usage (from backend/):
+    python train_dish_classifier.py                      # writes DISH_CLASSIFIER_PATH
+    python train_dish_classifier.py --output model.joblib --holdout 0.1
+"""
+import argparse
+import json
+
+from config import DISH_CLASSIFIER_PATH
+from logging_config import configure_logging
+from recipe_database import get_recipes
+from services.dish_classifier import train_dish_classifier
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Train the local dish diet/course classifier")
+    parser.add_argument("--output", default=DISH_CLASSIFIER_PATH, help="Where to write the model artifact")
+    parser.add_argument("--holdout", type=float, default=0.05, help="Fraction of recipes held out for accuracy")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    configure_logging()
+
+    recipes = get_recipes()
+    if not recipes:
+        raise SystemExit("Recipe database is empty; place recipes_with_flavour_profiles.csv where recipe_database.py looks")
+
+    classifier = train_dish_classifier(recipes, holdout=args.holdout, seed=args.seed)
+    classifier.save(args.output)
+    print(json.dumps(classifier.metadata, indent=2))
+    print(f"Saved dish classifier to {args.output}")
+
+
+if __name__ == "__main__":
+    main()